@@ -12,10 +12,9 @@ import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).parents[1]))
 
+from app.config import settings
 from app.database import Base
-from app.models import user as _user
-from app.models import photo as _photo
-from app.models import project as _project
+import app.models  # registers every mapped class on Base.metadata
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -26,6 +25,9 @@ config = context.config
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
+# Migrate the same database the app uses (DATABASE_URL / .env)
+config.set_main_option("sqlalchemy.url", settings.database_url.replace("%", "%%"))
+
 # add your model's MetaData object here
 # for 'autogenerate' support
 target_metadata = Base.metadata
@@ -0,0 +1,75 @@
+"""add_stitch_results_and_job_fingerprint
+
+Revision ID: 0cf79ecdf51c
+Revises: b22b753b432a
+Create Date: 2026-10-17 23:45:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0cf79ecdf51c'
+down_revision: Union[str, None] = 'b22b753b432a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ACTIVE_JOBS = sa.text("status IN ('queued', 'running')")
+
+
+def upgrade() -> None:
+    op.create_table('stitch_results',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('project_id', sa.String(length=36), nullable=False),
+    sa.Column('fingerprint', sa.String(length=64), nullable=False),
+    sa.Column('photo_id', sa.String(length=36), nullable=False),
+    sa.Column('s3_key', sa.String(length=500), nullable=False),
+    sa.Column('result', sa.JSON(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['photo_id'], ['photos.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('project_id', 'fingerprint', name='uq_stitch_results_project_id_fingerprint')
+    )
+    with op.batch_alter_table('stitch_results', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_stitch_results_project_id'), ['project_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_stitch_results_photo_id'), ['photo_id'], unique=False)
+
+    op.create_table('stitch_result_inputs',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('result_id', sa.String(length=36), nullable=False),
+    sa.Column('photo_id', sa.String(length=36), nullable=False),
+    sa.ForeignKeyConstraint(['result_id'], ['stitch_results.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['photo_id'], ['photos.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('stitch_result_inputs', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_stitch_result_inputs_result_id'), ['result_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_stitch_result_inputs_photo_id'), ['photo_id'], unique=False)
+
+    with op.batch_alter_table('jobs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('fingerprint', sa.String(length=64), nullable=True))
+        batch_op.create_index(
+            'uq_jobs_active_fingerprint', ['fingerprint'], unique=True,
+            sqlite_where=ACTIVE_JOBS, postgresql_where=ACTIVE_JOBS,
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('jobs', schema=None) as batch_op:
+        batch_op.drop_index('uq_jobs_active_fingerprint')
+        batch_op.drop_column('fingerprint')
+
+    with op.batch_alter_table('stitch_result_inputs', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_stitch_result_inputs_photo_id'))
+        batch_op.drop_index(batch_op.f('ix_stitch_result_inputs_result_id'))
+
+    op.drop_table('stitch_result_inputs')
+    with op.batch_alter_table('stitch_results', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_stitch_results_photo_id'))
+        batch_op.drop_index(batch_op.f('ix_stitch_results_project_id'))
+
+    op.drop_table('stitch_results')
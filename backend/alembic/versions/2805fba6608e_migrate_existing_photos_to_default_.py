@@ -39,7 +39,7 @@ def upgrade() -> None:
             INSERT INTO projects (id, user_id, name, description, created_at)
             VALUES (:project_id, :user_id, 'Default Project',
                     'Automatically created for existing photos',
-                    datetime('now'))
+                    CURRENT_TIMESTAMP)
         """), {'project_id': project_id, 'user_id': user_id})
 
         # Assign all user's photos without project_id to this default project
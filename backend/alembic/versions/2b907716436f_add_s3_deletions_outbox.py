@@ -0,0 +1,44 @@
+"""add_s3_deletions_outbox
+
+Revision ID: 2b907716436f
+Revises: b3bf9736c371
+Create Date: 2026-10-17 22:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2b907716436f'
+down_revision: Union[str, None] = 'b3bf9736c371'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('s3_deletions',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('s3_key', sa.String(length=500), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('next_attempt_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('lease_id', sa.String(length=36), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('s3_deletions', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_s3_deletions_s3_key'), ['s3_key'], unique=False)
+        batch_op.create_index(batch_op.f('ix_s3_deletions_next_attempt_at'), ['next_attempt_at'], unique=False)
+        batch_op.create_index(batch_op.f('ix_s3_deletions_lease_id'), ['lease_id'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('s3_deletions', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_s3_deletions_lease_id'))
+        batch_op.drop_index(batch_op.f('ix_s3_deletions_next_attempt_at'))
+        batch_op.drop_index(batch_op.f('ix_s3_deletions_s3_key'))
+
+    op.drop_table('s3_deletions')
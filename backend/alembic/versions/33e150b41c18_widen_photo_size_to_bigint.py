@@ -0,0 +1,35 @@
+"""widen_photo_size_to_bigint
+
+Revision ID: 33e150b41c18
+Revises: 4d851cd7e078
+Create Date: 2026-10-17 20:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '33e150b41c18'
+down_revision: Union[str, None] = '4d851cd7e078'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Direct uploads allow files above 2 GiB, which overflow INTEGER on PostgreSQL
+    with op.batch_alter_table('photos', schema=None) as batch_op:
+        batch_op.alter_column('size',
+                              existing_type=sa.Integer(),
+                              type_=sa.BigInteger(),
+                              existing_nullable=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('photos', schema=None) as batch_op:
+        batch_op.alter_column('size',
+                              existing_type=sa.BigInteger(),
+                              type_=sa.Integer(),
+                              existing_nullable=False)
@@ -0,0 +1,41 @@
+"""add_photo_derivatives_table
+
+Revision ID: 4958c6968468
+Revises: 77efad31aee7
+Create Date: 2026-10-17 18:50:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4958c6968468'
+down_revision: Union[str, None] = '77efad31aee7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('photo_derivatives',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('photo_id', sa.String(length=36), nullable=False),
+    sa.Column('kind', sa.String(length=20), nullable=False),
+    sa.Column('s3_key', sa.String(length=500), nullable=False),
+    sa.Column('mime', sa.String(length=100), nullable=False),
+    sa.Column('width', sa.Integer(), nullable=False),
+    sa.Column('height', sa.Integer(), nullable=False),
+    sa.Column('size', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.ForeignKeyConstraint(['photo_id'], ['photos.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('photo_id', 'kind', name='uq_photo_derivatives_photo_id_kind')
+    )
+    op.create_index(op.f('ix_photo_derivatives_photo_id'), 'photo_derivatives', ['photo_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_photo_derivatives_photo_id'), table_name='photo_derivatives')
+    op.drop_table('photo_derivatives')
@@ -0,0 +1,43 @@
+"""add_project_photo_stats
+
+Revision ID: 4d851cd7e078
+Revises: c7ae6df56733
+Create Date: 2026-10-17 20:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import text
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4d851cd7e078'
+down_revision: Union[str, None] = 'c7ae6df56733'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('projects', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('photo_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('total_bytes', sa.BigInteger(), server_default='0', nullable=False))
+
+    # Backfill from existing photos
+    conn = op.get_bind()
+    conn.execute(text("""
+        UPDATE projects
+        SET photo_count = (
+                SELECT COUNT(*) FROM photos WHERE photos.project_id = projects.id
+            ),
+            total_bytes = (
+                SELECT COALESCE(SUM(size), 0) FROM photos WHERE photos.project_id = projects.id
+            )
+    """))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('projects', schema=None) as batch_op:
+        batch_op.drop_column('total_bytes')
+        batch_op.drop_column('photo_count')
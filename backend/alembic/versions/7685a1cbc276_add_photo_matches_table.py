@@ -0,0 +1,45 @@
+"""add_photo_matches_table
+
+Revision ID: 7685a1cbc276
+Revises: 2b907716436f
+Create Date: 2026-10-17 23:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7685a1cbc276'
+down_revision: Union[str, None] = '2b907716436f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('photo_matches',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('photo_id', sa.String(length=36), nullable=False),
+    sa.Column('other_photo_id', sa.String(length=36), nullable=False),
+    sa.Column('features', sa.String(length=20), nullable=False),
+    sa.Column('inliers', sa.Integer(), nullable=False),
+    sa.Column('homography', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.ForeignKeyConstraint(['photo_id'], ['photos.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['other_photo_id'], ['photos.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('photo_id', 'other_photo_id', 'features', name='uq_photo_matches_photo_id_other_photo_id_features')
+    )
+    with op.batch_alter_table('photo_matches', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_photo_matches_photo_id'), ['photo_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_photo_matches_other_photo_id'), ['other_photo_id'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('photo_matches', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_photo_matches_other_photo_id'))
+        batch_op.drop_index(batch_op.f('ix_photo_matches_photo_id'))
+
+    op.drop_table('photo_matches')
@@ -0,0 +1,37 @@
+"""add_photo_source
+
+Revision ID: 9b2f61d4a7c8
+Revises: 5d3e8a91c2f4
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b2f61d4a7c8'
+down_revision: Union[str, None] = '5d3e8a91c2f4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('photos', schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column('source', sa.String(length=20), server_default='upload', nullable=False)
+        )
+    # Earlier composites: cached stitch outputs, and photos named by the
+    # stitch job that were never uploaded as blobs
+    op.execute(
+        "UPDATE photos SET source = 'stitch' "
+        "WHERE id IN (SELECT photo_id FROM stitch_results) "
+        "OR (blob_id IS NULL AND original_name LIKE 'stitched-%')"
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('photos', schema=None) as batch_op:
+        batch_op.drop_column('source')
@@ -0,0 +1,47 @@
+"""add_photo_image_metadata
+
+Revision ID: b22b753b432a
+Revises: 7685a1cbc276
+Create Date: 2026-10-17 23:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b22b753b432a'
+down_revision: Union[str, None] = '7685a1cbc276'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing rows stay NULL until `python -m app.commands.backfill_photo_metadata`
+    with op.batch_alter_table('photos', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('width', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('height', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('orientation', sa.SmallInteger(), nullable=True))
+        batch_op.add_column(sa.Column('taken_at', sa.DateTime(timezone=True), nullable=True))
+        batch_op.add_column(sa.Column('camera_make', sa.String(length=100), nullable=True))
+        batch_op.add_column(sa.Column('camera_model', sa.String(length=100), nullable=True))
+        batch_op.add_column(sa.Column('has_icc', sa.Boolean(), nullable=True))
+        batch_op.create_index('ix_photos_project_id_taken_at', ['project_id', 'taken_at'], unique=False)
+        batch_op.create_index('ix_photos_camera_make_camera_model', ['camera_make', 'camera_model'], unique=False)
+        batch_op.create_index('ix_photos_width_height', ['width', 'height'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('photos', schema=None) as batch_op:
+        batch_op.drop_index('ix_photos_width_height')
+        batch_op.drop_index('ix_photos_camera_make_camera_model')
+        batch_op.drop_index('ix_photos_project_id_taken_at')
+        batch_op.drop_column('has_icc')
+        batch_op.drop_column('camera_model')
+        batch_op.drop_column('camera_make')
+        batch_op.drop_column('taken_at')
+        batch_op.drop_column('orientation')
+        batch_op.drop_column('height')
+        batch_op.drop_column('width')
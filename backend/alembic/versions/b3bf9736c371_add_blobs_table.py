@@ -0,0 +1,47 @@
+"""add_blobs_table
+
+Revision ID: b3bf9736c371
+Revises: 33e150b41c18
+Create Date: 2026-10-17 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3bf9736c371'
+down_revision: Union[str, None] = '33e150b41c18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('blobs',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=False),
+    sa.Column('s3_key', sa.String(length=500), nullable=False),
+    sa.Column('mime', sa.String(length=100), nullable=False),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('sha256', name='uq_blobs_sha256')
+    )
+
+    # Existing photos keep their own photos/ objects (blob_id stays NULL)
+    with op.batch_alter_table('photos', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('blob_id', sa.String(length=36), nullable=True))
+        batch_op.create_index('ix_photos_blob_id', ['blob_id'], unique=False)
+        batch_op.create_foreign_key('fk_photos_blob_id', 'blobs', ['blob_id'], ['id'])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('photos', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_photos_blob_id', type_='foreignkey')
+        batch_op.drop_index('ix_photos_blob_id')
+        batch_op.drop_column('blob_id')
+
+    op.drop_table('blobs')
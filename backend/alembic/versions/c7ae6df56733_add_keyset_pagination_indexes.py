@@ -0,0 +1,40 @@
+"""add_keyset_pagination_indexes
+
+Revision ID: c7ae6df56733
+Revises: 4958c6968468
+Create Date: 2026-10-17 19:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+from sqlalchemy import text
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7ae6df56733'
+down_revision: Union[str, None] = '4958c6968468'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    if conn.dialect.name == 'sqlite':
+        # SQLite stores timestamps as text. Rows created by CURRENT_TIMESTAMP
+        # lack the fractional part that SQLAlchemy writes for bound values,
+        # which breaks (created_at, id) comparisons; pad them to one format.
+        for table in ('photos', 'projects'):
+            conn.execute(text(f"""
+                UPDATE {table}
+                SET created_at = created_at || '.000000'
+                WHERE length(created_at) = 19
+            """))
+
+    op.create_index('ix_photos_project_id_created_at_id', 'photos', ['project_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_projects_user_id_created_at_id', 'projects', ['user_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_projects_user_id_created_at_id', table_name='projects')
+    op.drop_index('ix_photos_project_id_created_at_id', table_name='photos')
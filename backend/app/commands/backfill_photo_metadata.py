@@ -0,0 +1,74 @@
+"""Fill the image metadata columns of photos uploaded before they existed.
+
+Usage (from the backend directory):
+    python -m app.commands.backfill_photo_metadata [--batch-size 500] [--concurrency 8]
+
+Reads only the first bytes of each original with a ranged GET (see
+MetadataService.read_object), never the whole file, and parses the
+header without decoding pixels. Photos whose header cannot be parsed keep
+NULL columns and are retried on the next run.
+"""
+
+import argparse
+import asyncio
+
+from ..config import settings
+from ..database import async_session_maker, engine
+# Register every mapped class before the first query
+from .. import models as _models
+from ..repositories import photos_repository as photo_repo
+from ..services.metadata_service import metadata_service
+from ..services.s3_service import s3_service
+
+
+async def main(*, batch_size: int, concurrency: int) -> tuple[int, int]:
+    """
+    Returns:
+        (photos scanned, photos updated)
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    scanned = updated = 0
+    after_id = None
+
+    async def read(photo) -> dict:
+        async with semaphore:
+            return await metadata_service.read_object(photo.s3_key, photo.size, photo.mime)
+
+    try:
+        while True:
+            async with async_session_maker() as session:
+                photos = await photo_repo.list_photos_missing_metadata(
+                    session, after_id=after_id, limit=batch_size
+                )
+                if not photos:
+                    break
+                after_id = photos[-1].id
+                scanned += len(photos)
+
+                results = await asyncio.gather(*(read(p) for p in photos))
+                for photo, metadata in zip(photos, results):
+                    if metadata["width"] is None:
+                        print(f"unreadable: {photo.id} ({photo.s3_key})")
+                        continue
+                    await photo_repo.update_photo_metadata(session, photo.id, metadata)
+                    updated += 1
+                await session.commit()
+            print(f"{scanned} scanned, {updated} updated")
+    finally:
+        await s3_service.close()
+        await engine.dispose()
+    return scanned, updated
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=500, help="Photos per transaction (default: 500)")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=settings.metadata_backfill_concurrency,
+        help=f"Concurrent ranged reads (default: {settings.metadata_backfill_concurrency})",
+    )
+    args = parser.parse_args()
+    scanned, updated = asyncio.run(main(batch_size=args.batch_size, concurrency=args.concurrency))
+    print(f"Scanned {scanned} photo(s), updated {updated}")
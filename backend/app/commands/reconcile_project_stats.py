@@ -0,0 +1,33 @@
+"""Repair denormalized per-project photo counts and storage totals.
+
+Usage (from the backend directory):
+    python -m app.commands.reconcile_project_stats [--project-id ID]
+
+The counters are maintained incrementally on upload and delete; this
+recomputes them from the photos table in case they ever drift (manual DB
+edits, crashes between statements on databases without transactional DDL).
+"""
+
+import argparse
+import asyncio
+
+from ..database import async_session_maker, engine
+# Register every mapped class before the first query
+from .. import models as _models
+from ..repositories import projects_repository as project_repo
+
+
+async def main(project_id: str | None = None) -> int:
+    async with async_session_maker() as session:
+        fixed = await project_repo.reconcile_project_stats(session, project_id=project_id)
+        await session.commit()
+    await engine.dispose()
+    return fixed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--project-id", help="Only reconcile this project")
+    args = parser.parse_args()
+    fixed = asyncio.run(main(args.project_id))
+    print(f"Corrected {fixed} project(s)")
@@ -0,0 +1,85 @@
+"""Delete S3 objects that no database row references anymore.
+
+Usage (from the backend directory):
+    python -m app.commands.reconcile_s3 [--prefix photos/ ...] [--min-age-hours 24] [--dry-run]
+
+Lists the bucket prefixes page by page and checks each page against the
+photos, blobs and photo_derivatives tables (and the deletion outbox).
+Unreferenced objects are queued in the outbox and deleted by the same
+sweeper the API uses. Objects younger than ``--min-age-hours`` are skipped
+so in-flight uploads (presigned PUTs awaiting completion, blobs uploaded
+before their row commits) are never touched.
+"""
+
+import argparse
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from ..database import async_session_maker, engine
+# Register every mapped class before the first query
+from .. import models as _models
+from ..repositories import deletions_repository as deletion_repo
+from ..services.deletion_sweeper import deletion_sweeper
+from ..services.s3_service import s3_service
+
+DEFAULT_PREFIXES = ("photos/", "blobs/", "derived/")
+
+
+async def main(
+    prefixes: list[str],
+    *,
+    min_age: timedelta,
+    dry_run: bool = False,
+) -> tuple[int, int, int]:
+    """
+    Returns:
+        (objects scanned, orphans found, objects deleted)
+    """
+    cutoff = datetime.now(timezone.utc) - min_age
+    scanned = orphaned = 0
+    try:
+        for prefix in prefixes:
+            async for page in s3_service.iter_objects(prefix):
+                scanned += len(page)
+                candidates = [obj["key"] for obj in page if obj["last_modified"] < cutoff]
+                async with async_session_maker() as session:
+                    referenced = await deletion_repo.referenced_keys(session, candidates)
+                    orphans = [key for key in candidates if key not in referenced]
+                    orphaned += len(orphans)
+                    for key in orphans:
+                        print(f"{'would delete' if dry_run else 'orphan'}: {key}")
+                    if orphans and not dry_run:
+                        await deletion_repo.enqueue_deletions(session, orphans)
+                        await session.commit()
+
+        deleted = 0 if dry_run else await deletion_sweeper.drain()
+    finally:
+        await s3_service.close()
+        await engine.dispose()
+    return scanned, orphaned, deleted
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--prefix",
+        action="append",
+        dest="prefixes",
+        help="Bucket prefix to scan (repeatable; default: photos/, blobs/ and derived/)",
+    )
+    parser.add_argument(
+        "--min-age-hours",
+        type=float,
+        default=24.0,
+        help="Only delete objects older than this (default: 24)",
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Only report orphans")
+    args = parser.parse_args()
+    scanned, orphaned, deleted = asyncio.run(
+        main(
+            args.prefixes or list(DEFAULT_PREFIXES),
+            min_age=timedelta(hours=args.min_age_hours),
+            dry_run=args.dry_run,
+        )
+    )
+    print(f"Scanned {scanned} object(s), found {orphaned} orphan(s), processed {deleted} deletion(s)")
@@ -1,15 +1,66 @@
 # app/database.py
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 
+from .config import settings
 
-DATABASE_URL = "sqlite+aiosqlite:///./app.db"
 
-engine = create_async_engine(
-    DATABASE_URL,
-    future=True,
-    echo=False,
-)
+DATABASE_URL = settings.database_url
+
+
+def _set_sqlite_pragmas(dbapi_connection, _connection_record) -> None:
+    # WAL lets readers proceed while a writer commits; NORMAL sync is
+    # durable across app crashes (only an OS crash can lose the last
+    # commits); busy_timeout makes writers wait instead of failing fast
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={settings.sqlite_journal_mode}")
+    cursor.execute(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+def create_engine_from_settings(url: str = DATABASE_URL) -> AsyncEngine:
+    """
+    Build the async engine for ``url``.
+
+    - sqlite+aiosqlite: WAL journal and tuned pragmas on every connection
+    - postgresql+asyncpg: sized connection pool with pre-ping and recycling,
+      plus a configurable prepared-statement cache (set it to 0 behind
+      PgBouncer in transaction mode)
+    """
+    backend = make_url(url).get_backend_name()
+
+    if backend == "sqlite":
+        engine = create_async_engine(url, future=True, echo=settings.db_echo)
+        event.listen(engine.sync_engine, "connect", _set_sqlite_pragmas)
+        return engine
+
+    connect_args = {}
+    if backend == "postgresql":
+        connect_args = {
+            # SQLAlchemy's per-connection cache of prepared statements
+            "prepared_statement_cache_size": settings.db_statement_cache_size,
+            # asyncpg's own statement cache
+            "statement_cache_size": settings.db_statement_cache_size,
+        }
+
+    return create_async_engine(
+        url,
+        future=True,
+        echo=settings.db_echo,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        connect_args=connect_args,
+    )
+
+
+engine = create_engine_from_settings()
 
 class Base(DeclarativeBase):
     pass
@@ -5,28 +5,41 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from ..database import get_db
 from ..utils.auth import decode_access_token
 from ..repositories import users_repository
-from ..models.user import User
+from ..services.principal_cache import Principal, principal_cache
 
 security = HTTPBearer()
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     session: AsyncSession = Depends(get_db)
-) -> User:
+) -> Principal:
     token = credentials.credentials
-    email = decode_access_token(token)
+    token_data = decode_access_token(token)
 
-    if email is None:
+    if token_data is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
         )
 
-    user = await users_repository.get_user_by_email(session, email)
+    # Older tokens only carry the email; newer ones also carry the user id,
+    # which is a primary-key lookup
+    subject = token_data.user_id or token_data.email
+    principal = principal_cache.get(subject)
+    if principal is not None:
+        return principal
+
+    if token_data.user_id is not None:
+        user = await users_repository.get_user_by_id(session, token_data.user_id)
+    else:
+        user = await users_repository.get_user_by_email(session, token_data.email)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
         )
 
-    return user
+    # Hand out a plain copy: the row belongs to this request's session
+    principal = Principal.from_user(user)
+    principal_cache.put(subject, principal)
+    return principal
@@ -1,11 +1,21 @@
-from fastapi import FastAPI
+import os
+import secrets
+
+from fastapi import Depends, FastAPI, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from fastapi.middleware.cors import CORSMiddleware
 
+from .config import settings
 from .database import engine, Base
-from .routers import photos, auth, projects
-from .models import photo as _photo
-from .models import user as _user
-from .models import project as _project
+from .routers import photos, auth, projects, stitch, jobs
+from .services.s3_service import s3_service
+from .services.job_queue import job_queue
+from .services.compositing_service import compositing_service
+from .services.principal_cache import principal_cache
+from .services.password_hasher import password_hasher
+from .services.deletion_sweeper import deletion_sweeper
+from .services.disk_cache import disk_cache
+from . import models as _models  # registers every mapped class
 
 app = FastAPI(
     title="API (async, SQLite)",
@@ -29,11 +39,63 @@ async def on_startup():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
 
+    # Scratch space of stitch jobs and renditions (mkdtemp needs it to exist)
+    if settings.stitch_work_dir:
+        os.makedirs(settings.stitch_work_dir, exist_ok=True)
+
+    # Open the shared S3 client (connection pool) once per process
+    await s3_service.start()
+
+    # Start background workers for stitch/render jobs
+    job_queue.register("stitch", compositing_service.run_stitch_job)
+    await job_queue.start()
+
+    # Drain the S3 deletion outbox in the background
+    await deletion_sweeper.start()
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await deletion_sweeper.stop()
+    await job_queue.stop()
+    await s3_service.close()
+    password_hasher.close()
+
 
 app.include_router(auth.router, prefix="/auth", tags=["auth"])
 app.include_router(projects.router, prefix="/projects", tags=["projects"])
 app.include_router(photos.router, tags=["photos"])
+app.include_router(stitch.router, tags=["stitch"])
+app.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
 
 @app.get("/health")
 async def health():
     return {"ok": True}
+
+
+_metrics_auth = HTTPBearer(auto_error=False)
+
+
+async def require_metrics_token(
+    credentials: HTTPAuthorizationCredentials | None = Depends(_metrics_auth),
+) -> None:
+    # Internal details (pool sizes, queues, cache paths): only for whoever
+    # holds METRICS_TOKEN, and hidden entirely when it is not configured
+    if not settings.metrics_token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if credentials is None or not secrets.compare_digest(
+        credentials.credentials.encode(), settings.metrics_token.encode()
+    ):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+
+
+@app.get("/metrics", dependencies=[Depends(require_metrics_token)], include_in_schema=False)
+async def metrics():
+    return {
+        "s3": s3_service.pool_stats(),
+        "disk_cache": disk_cache.stats(),
+        "jobs": job_queue.stats(),
+        "auth_cache": principal_cache.stats(),
+        "password_hasher": password_hasher.stats(),
+        "deletions": deletion_sweeper.stats(),
+    }
@@ -0,0 +1,19 @@
+"""ORM models.
+
+Importing this package registers every mapped class on ``Base.metadata``,
+so string relationship targets resolve and Alembic sees all tables.
+"""
+
+from . import blob, job, photo, photo_derivative, photo_match, project, s3_deletion, stitch_result, user
+
+__all__ = [
+    "blob",
+    "job",
+    "photo",
+    "photo_derivative",
+    "photo_match",
+    "project",
+    "s3_deletion",
+    "stitch_result",
+    "user",
+]
@@ -0,0 +1,24 @@
+from sqlalchemy import String, Integer, BigInteger, DateTime, func
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+from ..database import Base
+import uuid
+
+
+class Blob(Base):
+    """
+    Content-addressed S3 object shared by every Photo with the same bytes.
+
+    ref_count tracks how many photos point at the blob; the object is
+    deleted when the last one goes away.
+    """
+    __tablename__ = "blobs"
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    sha256: Mapped[str] = mapped_column(String(64), nullable=False, unique=True)
+    size: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    s3_key: Mapped[str] = mapped_column(String(500), nullable=False)
+    mime: Mapped[str] = mapped_column(String(100), nullable=False)
+    ref_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+    photos = relationship("Photo", back_populates="blob")
@@ -0,0 +1,69 @@
+from sqlalchemy import String, Integer, Float, Text, DateTime, JSON, ForeignKey, Index, func, text
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+from ..database import Base
+import uuid
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+
+# Statuses of jobs that still count for single-flight coalescing
+_ACTIVE = text(f"status IN ('{JOB_QUEUED}', '{JOB_RUNNING}')")
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # At most one queued/running job per fingerprint: identical requests
+        # submitted concurrently share one job (see JobQueue.submit)
+        Index(
+            "uq_jobs_active_fingerprint",
+            "fingerprint",
+            unique=True,
+            sqlite_where=_ACTIVE,
+            postgresql_where=_ACTIVE,
+        ),
+    )
+
+    id: Mapped[str] = mapped_column(
+        String(36),
+        primary_key=True,
+        default=lambda: str(uuid.uuid4())
+    )
+    user_id: Mapped[str] = mapped_column(
+        String(36),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True
+    )
+    project_id: Mapped[str | None] = mapped_column(
+        String(36),
+        ForeignKey("projects.id", ondelete="CASCADE"),
+        nullable=True,
+        index=True
+    )
+    kind: Mapped[str] = mapped_column(String(50), nullable=False)
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default=JOB_QUEUED, index=True)
+    params: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
+    # Identifies the work requested, for jobs that can be coalesced/cached
+    fingerprint: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    result: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    # Low-resolution preview of the result published while the job runs
+    # (s3_key, mime, width, height, size)
+    preview: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    progress: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    created_at: Mapped[DateTime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now()
+    )
+    started_at: Mapped[DateTime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    finished_at: Mapped[DateTime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    heartbeat_at: Mapped[DateTime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    # Relationships
+    user = relationship("User", back_populates="jobs")
+    project = relationship("Project", back_populates="jobs")
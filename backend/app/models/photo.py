@@ -1,18 +1,54 @@
-from sqlalchemy import String, Integer, DateTime, ForeignKey, func
+from datetime import datetime, timezone
+from sqlalchemy import String, BigInteger, Integer, SmallInteger, Boolean, DateTime, ForeignKey, Index, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from ..database import Base
 
+# Where a photo came from; stitch outputs are not stitch inputs by default
+PHOTO_SOURCE_UPLOAD = "upload"
+PHOTO_SOURCE_STITCH = "stitch"
+
 class Photo(Base):
     __tablename__ = "photos"
+    __table_args__ = (
+        # Keyset pagination: WHERE project_id = ? AND (created_at, id) < (?, ?)
+        Index("ix_photos_project_id_created_at_id", "project_id", "created_at", "id"),
+        Index("ix_photos_project_id_taken_at", "project_id", "taken_at"),
+        Index("ix_photos_camera_make_camera_model", "camera_make", "camera_model"),
+        Index("ix_photos_width_height", "width", "height"),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True)
     s3_key: Mapped[str] = mapped_column(String(500), nullable=False)
     original_name: Mapped[str] = mapped_column(String(255), nullable=False)
     mime: Mapped[str] = mapped_column(String(100), nullable=False)
-    size: Mapped[int] = mapped_column(Integer, nullable=False)
+    size: Mapped[int] = mapped_column(BigInteger, nullable=False)
     user_id: Mapped[str] = mapped_column(String(36), ForeignKey("users.id"), nullable=False)
     project_id: Mapped[str] = mapped_column(String(36), ForeignKey("projects.id", ondelete="CASCADE"), nullable=False, index=True)
-    created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    # Set for uploads stored content-addressed; s3_key then equals blob.s3_key
+    blob_id: Mapped[str | None] = mapped_column(String(36), ForeignKey("blobs.id"), nullable=True, index=True)
+    source: Mapped[str] = mapped_column(
+        String(20), nullable=False, default=PHOTO_SOURCE_UPLOAD, server_default=PHOTO_SOURCE_UPLOAD
+    )
+    # Read from the image header at upload (utils/image_metadata); NULL for
+    # non-images and rows not backfilled yet. width/height are as displayed
+    width: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    height: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    orientation: Mapped[int | None] = mapped_column(SmallInteger, nullable=True)  # EXIF 1-8
+    taken_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    camera_make: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    camera_model: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    has_icc: Mapped[bool | None] = mapped_column(Boolean, nullable=True)
+    # Python-side default keeps sub-second precision (SQLite CURRENT_TIMESTAMP
+    # has none), so (created_at, id) is a reliable keyset
+    created_at: Mapped[DateTime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        server_default=func.now(),
+    )
 
     user = relationship("User", back_populates="photos")
     project = relationship("Project", back_populates="photos")
+    blob = relationship("Blob", back_populates="photos")
+    derivatives = relationship(
+        "PhotoDerivative", back_populates="photo", cascade="all, delete-orphan", passive_deletes=True
+    )
@@ -0,0 +1,26 @@
+from sqlalchemy import String, Integer, DateTime, ForeignKey, UniqueConstraint, func
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+from ..database import Base
+import uuid
+
+
+class PhotoDerivative(Base):
+    """A resized rendition (thumbnail, preview, ...) of a Photo stored under derived/ in S3."""
+    __tablename__ = "photo_derivatives"
+    __table_args__ = (
+        UniqueConstraint("photo_id", "kind", name="uq_photo_derivatives_photo_id_kind"),
+    )
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    photo_id: Mapped[str] = mapped_column(
+        String(36), ForeignKey("photos.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    kind: Mapped[str] = mapped_column(String(20), nullable=False)
+    s3_key: Mapped[str] = mapped_column(String(500), nullable=False)
+    mime: Mapped[str] = mapped_column(String(100), nullable=False)
+    width: Mapped[int] = mapped_column(Integer, nullable=False)
+    height: Mapped[int] = mapped_column(Integer, nullable=False)
+    size: Mapped[int] = mapped_column(Integer, nullable=False)
+    created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+    photo = relationship("Photo", back_populates="derivatives")
@@ -0,0 +1,36 @@
+from sqlalchemy import String, Integer, DateTime, JSON, ForeignKey, UniqueConstraint, func
+from sqlalchemy.orm import Mapped, mapped_column
+from ..database import Base
+import uuid
+
+
+class PhotoMatch(Base):
+    """
+    Cached result of matching two photos' panorama features.
+
+    One row per unordered pair (``photo_id`` < ``other_photo_id``) and
+    feature kind, so re-stitching a project only matches the pairs that
+    involve newly added photos. Rejected pairs are cached too.
+    """
+    __tablename__ = "photo_matches"
+    __table_args__ = (
+        UniqueConstraint(
+            "photo_id", "other_photo_id", "features",
+            name="uq_photo_matches_photo_id_other_photo_id_features",
+        ),
+    )
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    photo_id: Mapped[str] = mapped_column(
+        String(36), ForeignKey("photos.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    other_photo_id: Mapped[str] = mapped_column(
+        String(36), ForeignKey("photos.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    # Derivative kind of the features that were matched (see compositing_service)
+    features: Mapped[str] = mapped_column(String(20), nullable=False)
+    inliers: Mapped[int] = mapped_column(Integer, nullable=False)
+    # Row-major 3x3 matrix mapping other_photo_id's proxy pixels onto photo_id's;
+    # None when the photos do not overlap
+    homography: Mapped[list | None] = mapped_column(JSON, nullable=True)
+    created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
@@ -1,4 +1,5 @@
-from sqlalchemy import String, Text, DateTime, ForeignKey, func
+from datetime import datetime, timezone
+from sqlalchemy import String, Text, Integer, BigInteger, DateTime, ForeignKey, Index, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from ..database import Base
 import uuid
@@ -6,6 +7,10 @@ import uuid
 
 class Project(Base):
     __tablename__ = "projects"
+    __table_args__ = (
+        # Keyset pagination: WHERE user_id = ? AND (created_at, id) < (?, ?)
+        Index("ix_projects_user_id_created_at_id", "user_id", "created_at", "id"),
+    )
 
     id: Mapped[str] = mapped_column(
         String(36),
@@ -20,8 +25,17 @@ class Project(Base):
     )
     name: Mapped[str] = mapped_column(String(200), nullable=False)
     description: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Denormalized from photos; kept in step by the photo repository and
+    # DeletionService (see projects_repository.reconcile_project_stats)
+    photo_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    total_bytes: Mapped[int] = mapped_column(
+        BigInteger, nullable=False, default=0, server_default="0"
+    )
     created_at: Mapped[DateTime] = mapped_column(
         DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
         server_default=func.now()
     )
 
@@ -32,3 +46,8 @@ class Project(Base):
         back_populates="project",
         cascade="all, delete-orphan"
     )
+    jobs = relationship(
+        "Job",
+        back_populates="project",
+        cascade="all, delete-orphan"
+    )
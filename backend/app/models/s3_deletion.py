@@ -0,0 +1,32 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import String, Integer, Text, DateTime, func
+from sqlalchemy.orm import Mapped, mapped_column
+from ..database import Base
+import uuid
+
+
+class S3Deletion(Base):
+    """
+    Outbox row for an S3 object that must be deleted.
+
+    Written in the same transaction as the DB delete that orphaned the
+    object and drained by the deletion sweeper, so a crash or S3 outage
+    between commit and cleanup can never leak the object.
+    """
+    __tablename__ = "s3_deletions"
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    s3_key: Mapped[str] = mapped_column(String(500), nullable=False, index=True)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # Set from Python (not server_default) so it compares correctly on SQLite
+    next_attempt_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        index=True,
+        default=lambda: datetime.now(timezone.utc),
+    )
+    # Token of the sweeper currently holding the row (until next_attempt_at)
+    lease_id: Mapped[str | None] = mapped_column(String(36), nullable=True, index=True)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
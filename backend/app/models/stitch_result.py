@@ -0,0 +1,46 @@
+from sqlalchemy import String, DateTime, JSON, ForeignKey, UniqueConstraint, func
+from sqlalchemy.orm import Mapped, mapped_column
+from ..database import Base
+import uuid
+
+
+class StitchResult(Base):
+    """
+    A finished stitch, keyed by the fingerprint of its request.
+
+    The fingerprint covers the project, the ordered input photo ids and every
+    output parameter (see compositing_service.stitch_fingerprint), so an
+    identical request can be answered with the stored composite instead of
+    rendering it again.
+    """
+    __tablename__ = "stitch_results"
+    __table_args__ = (
+        UniqueConstraint("project_id", "fingerprint", name="uq_stitch_results_project_id_fingerprint"),
+    )
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    project_id: Mapped[str] = mapped_column(
+        String(36), ForeignKey("projects.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    fingerprint: Mapped[str] = mapped_column(String(64), nullable=False)
+    # The composite photo; deleting it drops the cache entry
+    photo_id: Mapped[str] = mapped_column(
+        String(36), ForeignKey("photos.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    s3_key: Mapped[str] = mapped_column(String(500), nullable=False)
+    # The job result returned to clients (photo_id, width, height, ...)
+    result: Mapped[dict] = mapped_column(JSON, nullable=False)
+    created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+
+class StitchResultInput(Base):
+    """An input photo of a cached stitch; deleting the photo invalidates the result."""
+    __tablename__ = "stitch_result_inputs"
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    result_id: Mapped[str] = mapped_column(
+        String(36), ForeignKey("stitch_results.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    photo_id: Mapped[str] = mapped_column(
+        String(36), ForeignKey("photos.id", ondelete="CASCADE"), nullable=False, index=True
+    )
@@ -0,0 +1,98 @@
+from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, delete, func
+from ..models.blob import Blob
+from ..models.photo import Photo
+
+
+async def get_blobs_by_sha(session: AsyncSession, digests: List[str]) -> dict[str, Blob]:
+    if not digests:
+        return {}
+    result = await session.execute(select(Blob).where(Blob.sha256.in_(set(digests))))
+    return {blob.sha256: blob for blob in result.scalars().all()}
+
+
+async def create_blob(
+    session: AsyncSession,
+    *,
+    id: str,
+    sha256: str,
+    size: int,
+    s3_key: str,
+    mime: str,
+) -> Blob:
+    """Insert a blob holding one reference"""
+    blob = Blob(id=id, sha256=sha256, size=size, s3_key=s3_key, mime=mime, ref_count=1)
+    session.add(blob)
+    await session.flush()
+    return blob
+
+
+async def add_blob_ref(session: AsyncSession, blob_id: str, count: int = 1) -> bool:
+    """
+    Take ``count`` more references on a blob.
+
+    Only succeeds while the blob is still referenced: a blob whose count
+    already dropped to zero is being deleted and must not be resurrected.
+
+    Returns:
+        True if the references were taken
+    """
+    result = await session.execute(
+        update(Blob)
+        .where(Blob.id == blob_id, Blob.ref_count > 0)
+        .values(ref_count=Blob.ref_count + count)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+async def release_blob_ref(session: AsyncSession, blob_id: str, count: int = 1) -> Optional[str]:
+    """
+    Drop ``count`` references; delete the blob row when none are left.
+
+    Returns:
+        The blob's S3 key if this call removed the last reference (the
+        caller deletes the object after commit), otherwise None
+    """
+    await session.execute(
+        update(Blob)
+        .where(Blob.id == blob_id)
+        .values(ref_count=Blob.ref_count - count)
+        .execution_options(synchronize_session=False)
+    )
+    s3_key = (
+        await session.execute(
+            select(Blob.s3_key).where(Blob.id == blob_id, Blob.ref_count <= 0)
+        )
+    ).scalar_one_or_none()
+    if s3_key is None:
+        return None
+    await session.execute(
+        delete(Blob)
+        .where(Blob.id == blob_id, Blob.ref_count <= 0)
+        .execution_options(synchronize_session=False)
+    )
+    return s3_key
+
+
+async def count_blob_refs_for_project(session: AsyncSession, project_id: str) -> dict[str, int]:
+    """Number of photos in a project per blob id"""
+    stmt = (
+        select(Photo.blob_id, func.count(Photo.id))
+        .where(Photo.project_id == project_id, Photo.blob_id.is_not(None))
+        .group_by(Photo.blob_id)
+    )
+    result = await session.execute(stmt)
+    return {blob_id: count for blob_id, count in result.all()}
+
+
+async def count_blob_refs_for_user(session: AsyncSession, user_id: str) -> dict[str, int]:
+    """Number of a user's photos per blob id"""
+    stmt = (
+        select(Photo.blob_id, func.count(Photo.id))
+        .where(Photo.user_id == user_id, Photo.blob_id.is_not(None))
+        .group_by(Photo.blob_id)
+    )
+    result = await session.execute(stmt)
+    return {blob_id: count for blob_id, count in result.all()}
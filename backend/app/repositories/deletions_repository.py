@@ -0,0 +1,117 @@
+from datetime import datetime, timedelta, timezone
+from typing import List
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, delete, insert, union
+from ..models.blob import Blob
+from ..models.photo import Photo
+from ..models.photo_derivative import PhotoDerivative
+from ..models.s3_deletion import S3Deletion
+import uuid
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+async def enqueue_deletions(session: AsyncSession, s3_keys: List[str]) -> int:
+    """Queue S3 keys for deletion in the caller's transaction (no commit)"""
+    keys = list(dict.fromkeys(s3_keys))
+    if not keys:
+        return 0
+    now = _now()
+    await session.execute(
+        insert(S3Deletion),
+        [
+            {"id": str(uuid.uuid4()), "s3_key": key, "attempts": 0, "next_attempt_at": now}
+            for key in keys
+        ],
+    )
+    return len(keys)
+
+
+async def claim_due_deletions(
+    session: AsyncSession,
+    *,
+    limit: int,
+    lease: timedelta,
+) -> List[S3Deletion]:
+    """
+    Lease up to ``limit`` due rows to the calling sweeper.
+
+    The rows are stamped with a fresh lease id and pushed ``lease`` into the
+    future in one conditional UPDATE, so concurrent sweepers (several API
+    processes) never claim the same row; rows of a sweeper that dies become
+    due again when the lease runs out.
+    """
+    now = _now()
+    lease_id = str(uuid.uuid4())
+    due = (
+        select(S3Deletion.id)
+        .where(S3Deletion.next_attempt_at <= now)
+        .order_by(S3Deletion.next_attempt_at.asc())
+        .limit(limit)
+    )
+    await session.execute(
+        update(S3Deletion)
+        .where(S3Deletion.id.in_(due.scalar_subquery()), S3Deletion.next_attempt_at <= now)
+        .values(lease_id=lease_id, next_attempt_at=now + lease)
+        .execution_options(synchronize_session=False)
+    )
+    await session.commit()
+    result = await session.execute(select(S3Deletion).where(S3Deletion.lease_id == lease_id))
+    return list(result.scalars().all())
+
+
+async def complete_deletions(session: AsyncSession, ids: List[str]) -> None:
+    """Drop rows whose objects are gone"""
+    if ids:
+        await session.execute(
+            delete(S3Deletion)
+            .where(S3Deletion.id.in_(ids))
+            .execution_options(synchronize_session=False)
+        )
+        await session.commit()
+
+
+async def reschedule_deletions(
+    session: AsyncSession,
+    rows: List[S3Deletion],
+    *,
+    error: str,
+    backoff: timedelta,
+    max_backoff: timedelta,
+) -> None:
+    """Release failed rows for another attempt with exponential backoff"""
+    now = _now()
+    for row in rows:
+        delay = min(backoff * (2 ** row.attempts), max_backoff)
+        await session.execute(
+            update(S3Deletion)
+            .where(S3Deletion.id == row.id)
+            .values(
+                attempts=S3Deletion.attempts + 1,
+                next_attempt_at=now + delay,
+                lease_id=None,
+                last_error=error,
+            )
+            .execution_options(synchronize_session=False)
+        )
+    await session.commit()
+
+
+async def referenced_keys(session: AsyncSession, s3_keys: List[str]) -> set[str]:
+    """
+    Subset of ``s3_keys`` that is still in use or already queued for deletion.
+
+    Used by the bucket reconciliation scan, one listing page at a time.
+    """
+    if not s3_keys:
+        return set()
+    stmt = union(
+        select(Photo.s3_key).where(Photo.s3_key.in_(s3_keys)),
+        select(Blob.s3_key).where(Blob.s3_key.in_(s3_keys)),
+        select(PhotoDerivative.s3_key).where(PhotoDerivative.s3_key.in_(s3_keys)),
+        select(S3Deletion.s3_key).where(S3Deletion.s3_key.in_(s3_keys)),
+    )
+    result = await session.execute(stmt)
+    return set(result.scalars().all())
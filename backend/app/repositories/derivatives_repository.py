@@ -0,0 +1,87 @@
+from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from ..models.photo import Photo
+from ..models.photo_derivative import PhotoDerivative
+import uuid
+
+
+async def get_derivative(
+    session: AsyncSession,
+    photo_id: str,
+    kind: str,
+) -> Optional[PhotoDerivative]:
+    stmt = select(PhotoDerivative).where(
+        PhotoDerivative.photo_id == photo_id,
+        PhotoDerivative.kind == kind,
+    )
+    result = await session.execute(stmt)
+    return result.scalar_one_or_none()
+
+
+async def get_derivatives(
+    session: AsyncSession,
+    photo_ids: List[str],
+    kind: str,
+) -> dict[str, PhotoDerivative]:
+    """``kind`` derivatives of several photos, keyed by photo id"""
+    if not photo_ids:
+        return {}
+    stmt = select(PhotoDerivative).where(
+        PhotoDerivative.photo_id.in_(set(photo_ids)),
+        PhotoDerivative.kind == kind,
+    )
+    result = await session.execute(stmt)
+    return {d.photo_id: d for d in result.scalars().all()}
+
+
+async def create_derivative(
+    session: AsyncSession,
+    *,
+    photo_id: str,
+    kind: str,
+    s3_key: str,
+    mime: str,
+    width: int,
+    height: int,
+    size: int,
+) -> PhotoDerivative:
+    obj = PhotoDerivative(
+        id=str(uuid.uuid4()),
+        photo_id=photo_id,
+        kind=kind,
+        s3_key=s3_key,
+        mime=mime,
+        width=width,
+        height=height,
+        size=size,
+    )
+    session.add(obj)
+    await session.flush()
+    return obj
+
+
+async def list_derivative_keys_for_photo(session: AsyncSession, photo_id: str) -> List[str]:
+    stmt = select(PhotoDerivative.s3_key).where(PhotoDerivative.photo_id == photo_id)
+    result = await session.execute(stmt)
+    return list(result.scalars().all())
+
+
+async def list_derivative_keys_for_project(session: AsyncSession, project_id: str) -> List[str]:
+    stmt = (
+        select(PhotoDerivative.s3_key)
+        .join(Photo, Photo.id == PhotoDerivative.photo_id)
+        .where(Photo.project_id == project_id)
+    )
+    result = await session.execute(stmt)
+    return list(result.scalars().all())
+
+
+async def list_derivative_keys_for_user(session: AsyncSession, user_id: str) -> List[str]:
+    stmt = (
+        select(PhotoDerivative.s3_key)
+        .join(Photo, Photo.id == PhotoDerivative.photo_id)
+        .where(Photo.user_id == user_id)
+    )
+    result = await session.execute(stmt)
+    return list(result.scalars().all())
@@ -0,0 +1,229 @@
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update
+from ..models.job import Job, JOB_QUEUED, JOB_RUNNING, JOB_SUCCEEDED, JOB_FAILED
+import uuid
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+async def create_job(
+    session: AsyncSession,
+    *,
+    user_id: str,
+    kind: str,
+    params: dict,
+    project_id: str | None = None,
+    fingerprint: str | None = None,
+) -> Job:
+    """Create a queued job"""
+    job = Job(
+        id=str(uuid.uuid4()),
+        user_id=user_id,
+        project_id=project_id,
+        kind=kind,
+        status=JOB_QUEUED,
+        params=params,
+        fingerprint=fingerprint,
+        progress=0.0,
+        attempts=0,
+    )
+    session.add(job)
+    await session.flush()
+    return job
+
+
+async def create_finished_job(
+    session: AsyncSession,
+    *,
+    user_id: str,
+    kind: str,
+    params: dict,
+    result: dict,
+    project_id: str | None = None,
+) -> Job:
+    """Create a job that already succeeded (its result was known up front)"""
+    now = _now()
+    job = Job(
+        id=str(uuid.uuid4()),
+        user_id=user_id,
+        project_id=project_id,
+        kind=kind,
+        status=JOB_SUCCEEDED,
+        params=params,
+        result=result,
+        progress=1.0,
+        attempts=0,
+        started_at=now,
+        finished_at=now,
+    )
+    session.add(job)
+    await session.flush()
+    return job
+
+
+async def get_active_job_by_fingerprint(session: AsyncSession, fingerprint: str) -> Optional[Job]:
+    """The queued or running job with this fingerprint, if any"""
+    stmt = select(Job).where(
+        Job.fingerprint == fingerprint,
+        Job.status.in_([JOB_QUEUED, JOB_RUNNING]),
+    )
+    result = await session.execute(stmt)
+    return result.scalar_one_or_none()
+
+
+async def get_job(session: AsyncSession, job_id: str) -> Optional[Job]:
+    return await session.get(Job, job_id)
+
+
+async def get_job_with_ownership_check(
+    session: AsyncSession,
+    job_id: str,
+    user_id: str,
+) -> Optional[Job]:
+    """Get a job only if it belongs to the user"""
+    stmt = select(Job).where(Job.id == job_id, Job.user_id == user_id)
+    result = await session.execute(stmt)
+    return result.scalar_one_or_none()
+
+
+async def claim_next_job(session: AsyncSession, kinds: list[str]) -> Optional[str]:
+    """
+    Atomically move the oldest queued job to running and return its id.
+
+    The conditional UPDATE makes the claim safe when several processes poll
+    the same table (SQLite or PostgreSQL): only one of them sees rowcount 1.
+    """
+    stmt = (
+        select(Job.id)
+        .where(Job.status == JOB_QUEUED, Job.kind.in_(kinds))
+        .order_by(Job.created_at.asc())
+        .limit(1)
+    )
+    job_id = (await session.execute(stmt)).scalar_one_or_none()
+    if job_id is None:
+        return None
+
+    now = _now()
+    result = await session.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.status == JOB_QUEUED)
+        .values(
+            status=JOB_RUNNING,
+            started_at=now,
+            heartbeat_at=now,
+            attempts=Job.attempts + 1,
+        )
+    )
+    await session.commit()
+    return job_id if result.rowcount == 1 else None
+
+
+async def update_progress(session: AsyncSession, job_id: str, progress: float) -> None:
+    await session.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.status == JOB_RUNNING)
+        .values(progress=progress, heartbeat_at=_now())
+    )
+    await session.commit()
+
+
+async def heartbeat(session: AsyncSession, job_id: str) -> None:
+    await session.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.status == JOB_RUNNING)
+        .values(heartbeat_at=_now())
+    )
+    await session.commit()
+
+
+async def set_preview(session: AsyncSession, job_id: str, preview: dict | None) -> None:
+    await session.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.status == JOB_RUNNING)
+        .values(preview=preview)
+    )
+    await session.commit()
+
+
+def _running_attempt(job_id: str, attempt: int | None):
+    cond = (Job.id == job_id) & (Job.status == JOB_RUNNING)
+    return cond if attempt is None else cond & (Job.attempts == attempt)
+
+
+async def mark_succeeded(
+    session: AsyncSession, job_id: str, attempt: int | None, result: dict
+) -> bool:
+    """
+    Record the outcome of claim number ``attempt`` (None: whichever is running).
+
+    Returns:
+        False if the job is no longer running that attempt (it was re-queued
+        as stale, possibly claimed again, or already finished)
+    """
+    updated = await session.execute(
+        update(Job)
+        .where(_running_attempt(job_id, attempt))
+        .values(status=JOB_SUCCEEDED, result=result, error=None, progress=1.0, finished_at=_now())
+    )
+    await session.commit()
+    return updated.rowcount == 1
+
+
+async def mark_failed(
+    session: AsyncSession, job_id: str, attempt: int | None, error: str
+) -> bool:
+    """Like mark_succeeded, for a failed attempt"""
+    updated = await session.execute(
+        update(Job)
+        .where(_running_attempt(job_id, attempt))
+        .values(status=JOB_FAILED, error=error, finished_at=_now())
+    )
+    await session.commit()
+    return updated.rowcount == 1
+
+
+async def requeue(session: AsyncSession, job_id: str) -> None:
+    """Put a running job back in the queue (e.g. on graceful shutdown)"""
+    await session.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.status == JOB_RUNNING)
+        .values(
+            status=JOB_QUEUED, progress=0.0, preview=None, started_at=None, heartbeat_at=None
+        )
+    )
+    await session.commit()
+
+
+async def requeue_stale_jobs(
+    session: AsyncSession,
+    *,
+    stale_after: timedelta,
+    max_attempts: int,
+) -> tuple[int, int]:
+    """
+    Recover jobs whose worker stopped heartbeating (crash, restart, OOM kill).
+
+    Returns:
+        (number of jobs re-queued, number of jobs failed after max_attempts)
+    """
+    cutoff = _now() - stale_after
+    stale = (Job.status == JOB_RUNNING) & (Job.heartbeat_at < cutoff)
+
+    failed = await session.execute(
+        update(Job)
+        .where(stale, Job.attempts >= max_attempts)
+        .values(status=JOB_FAILED, error="Worker stopped responding", finished_at=_now())
+    )
+    requeued = await session.execute(
+        update(Job)
+        .where(stale, Job.attempts < max_attempts)
+        .values(
+            status=JOB_QUEUED, progress=0.0, preview=None, started_at=None, heartbeat_at=None
+        )
+    )
+    await session.commit()
+    return requeued.rowcount, failed.rowcount
@@ -0,0 +1,81 @@
+from typing import List
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete, insert, or_
+from sqlalchemy.dialects import postgresql, sqlite
+from ..models.photo import Photo
+from ..models.photo_match import PhotoMatch
+import uuid
+
+
+async def get_matches(
+    session: AsyncSession,
+    photo_ids: List[str],
+    features: str,
+) -> dict[tuple[str, str], PhotoMatch]:
+    """Cached matches among ``photo_ids``, keyed by (photo_id, other_photo_id)"""
+    if not photo_ids:
+        return {}
+    ids = set(photo_ids)
+    stmt = select(PhotoMatch).where(
+        PhotoMatch.features == features,
+        PhotoMatch.photo_id.in_(ids),
+        PhotoMatch.other_photo_id.in_(ids),
+    )
+    result = await session.execute(stmt)
+    return {(m.photo_id, m.other_photo_id): m for m in result.scalars().all()}
+
+
+async def save_matches(session: AsyncSession, features: str, rows: List[dict]) -> None:
+    """
+    Insert match results (no commit).
+
+    Each row has ``photo_id``, ``other_photo_id`` (photo_id < other_photo_id),
+    ``inliers`` and ``homography``. Pairs a concurrent job already stored
+    are skipped, so the rest of the batch is still saved.
+    """
+    if not rows:
+        return
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        stmt = postgresql.insert(PhotoMatch)
+    elif dialect == "sqlite":
+        stmt = sqlite.insert(PhotoMatch)
+    else:
+        stmt = None
+    if stmt is not None:
+        stmt = stmt.on_conflict_do_nothing(
+            index_elements=["photo_id", "other_photo_id", "features"]
+        )
+    else:
+        stmt = insert(PhotoMatch)
+    await session.execute(
+        stmt,
+        [{"id": str(uuid.uuid4()), "features": features, **row} for row in rows],
+    )
+
+
+async def delete_matches_for_photo(session: AsyncSession, photo_id: str) -> None:
+    await session.execute(
+        delete(PhotoMatch)
+        .where(or_(PhotoMatch.photo_id == photo_id, PhotoMatch.other_photo_id == photo_id))
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def delete_matches_for_project(session: AsyncSession, project_id: str) -> None:
+    # Both photos of a pair are always in the same project
+    photo_ids = select(Photo.id).where(Photo.project_id == project_id)
+    await session.execute(
+        delete(PhotoMatch)
+        .where(PhotoMatch.photo_id.in_(photo_ids))
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def delete_matches_for_user(session: AsyncSession, user_id: str) -> None:
+    photo_ids = select(Photo.id).where(Photo.user_id == user_id)
+    await session.execute(
+        delete(PhotoMatch)
+        .where(PhotoMatch.photo_id.in_(photo_ids))
+        .execution_options(synchronize_session=False)
+    )
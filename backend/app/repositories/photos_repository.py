@@ -1,7 +1,11 @@
+from datetime import datetime
 from typing import List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from ..models.photo import Photo
+from sqlalchemy import select, insert, update, tuple_, and_
+from sqlalchemy.orm import joinedload
+from ..models.photo import Photo, PHOTO_SOURCE_UPLOAD
+from ..models.project import Project
+from .projects_repository import add_photo_stats
 
 
 async def create_photo_meta(
@@ -14,7 +18,11 @@ async def create_photo_meta(
     size: int,
     user_id: str,
     project_id: str,
+    blob_id: str | None = None,
+    source: str = PHOTO_SOURCE_UPLOAD,
+    **metadata,
 ) -> Photo:
+    """``metadata``: image header columns (see utils.image_metadata.METADATA_FIELDS)"""
     obj = Photo(
         id=id,
         s3_key=s3_key,
@@ -23,16 +31,46 @@ async def create_photo_meta(
         size=size,
         user_id=user_id,
         project_id=project_id,
+        blob_id=blob_id,
+        source=source,
+        **metadata,
     )
     session.add(obj)
     await session.flush()
+    await add_photo_stats(session, project_id, photos=1, total_bytes=size)
     return obj
 
 
+async def create_photos_bulk(session: AsyncSession, rows: List[dict]) -> None:
+    """
+    Insert many photo rows with a single executemany INSERT.
+
+    Each row holds the same keyword arguments as create_photo_meta (and
+    all rows the same keys).
+    """
+    if not rows:
+        return
+    await session.execute(insert(Photo), rows)
+
+    totals: dict[str, list[int]] = {}
+    for row in rows:
+        count_bytes = totals.setdefault(row["project_id"], [0, 0])
+        count_bytes[0] += 1
+        count_bytes[1] += row["size"]
+    for project_id, (count, size) in totals.items():
+        await add_photo_stats(session, project_id, photos=count, total_bytes=size)
+
+
 async def get_photo(session: AsyncSession, photo_id: str) -> Optional[Photo]:
     return await session.get(Photo, photo_id)
 
 
+async def photo_exists(session: AsyncSession, photo_id: str) -> bool:
+    """Whether the row exists in the database (bypasses the session's identity map)"""
+    result = await session.execute(select(Photo.id).where(Photo.id == photo_id))
+    return result.scalar_one_or_none() is not None
+
+
 async def get_photo_with_ownership_check(
     session: AsyncSession,
     photo_id: str,
@@ -49,6 +87,43 @@ async def get_photo_with_ownership_check(
     return result.scalar_one_or_none()
 
 
+async def get_owned_photo(
+    session: AsyncSession,
+    *,
+    photo_id: str,
+    project_id: str,
+    user_id: str,
+) -> tuple[bool, Optional[Photo]]:
+    """
+    Check project ownership and fetch the photo in a single query.
+
+    Both lookups are primary-key hits (projects.id, photos.id), joined so
+    that a missing photo is still distinguishable from a foreign project.
+    The photo's blob (content hash) is loaded in the same query.
+
+    Returns:
+        (project_found, photo) - photo is None if it is not in the project
+    """
+    stmt = (
+        select(Project.id, Photo)
+        .select_from(Project)
+        .outerjoin(
+            Photo,
+            and_(
+                Photo.id == photo_id,
+                Photo.project_id == Project.id,
+                Photo.user_id == user_id,
+            ),
+        )
+        .where(Project.id == project_id, Project.user_id == user_id)
+        .options(joinedload(Photo.blob))
+    )
+    row = (await session.execute(stmt)).first()
+    if row is None:
+        return False, None
+    return True, row[1]
+
+
 async def list_photos(
     session: AsyncSession,
     *,
@@ -56,20 +131,92 @@ async def list_photos(
     project_id: str,
     limit: int = 100,
     offset: int = 0,
+    after: Optional[tuple[datetime, str]] = None,
 ) -> List[Photo]:
+    """
+    List photos newest first.
+
+    Pass ``after`` = (created_at, id) of the last photo already seen to
+    continue with keyset pagination instead of ``offset``.
+    """
     stmt = (
         select(Photo)
         .where(
             Photo.user_id == user_id,
             Photo.project_id == project_id
         )
-        .order_by(Photo.created_at.desc())
+        .order_by(Photo.created_at.desc(), Photo.id.desc())
         .limit(limit)
-        .offset(offset)
     )
+    if after is not None:
+        stmt = stmt.where(tuple_(Photo.created_at, Photo.id) < tuple_(*after))
+    else:
+        stmt = stmt.offset(offset)
     res = await session.execute(stmt)
     return list(res.scalars().all())
 
 
+async def list_all_photos(
+    session: AsyncSession,
+    *,
+    user_id: str,
+    project_id: str,
+    source: str | None = None,
+) -> List[Photo]:
+    """All photos of a project in upload order (oldest first), optionally of one ``source``"""
+    stmt = (
+        select(Photo)
+        .where(
+            Photo.user_id == user_id,
+            Photo.project_id == project_id
+        )
+        .order_by(Photo.created_at.asc(), Photo.id.asc())
+    )
+    if source is not None:
+        stmt = stmt.where(Photo.source == source)
+    res = await session.execute(stmt)
+    return list(res.scalars().all())
+
+
+async def get_photos_by_ids(
+    session: AsyncSession,
+    *,
+    user_id: str,
+    project_id: str,
+    photo_ids: List[str],
+) -> List[Photo]:
+    """Photos from the given id list that belong to user AND project (unordered)"""
+    stmt = select(Photo).where(
+        Photo.id.in_(photo_ids),
+        Photo.user_id == user_id,
+        Photo.project_id == project_id,
+    )
+    res = await session.execute(stmt)
+    return list(res.scalars().all())
+
+
+async def list_photos_missing_metadata(
+    session: AsyncSession,
+    *,
+    after_id: str | None = None,
+    limit: int = 500,
+) -> List[Photo]:
+    """Images whose header metadata was never read, in id order (keyset on id)"""
+    stmt = select(Photo).where(Photo.width.is_(None), Photo.mime.like("image/%"))
+    if after_id is not None:
+        stmt = stmt.where(Photo.id > after_id)
+    res = await session.execute(stmt.order_by(Photo.id.asc()).limit(limit))
+    return list(res.scalars().all())
+
+
+async def update_photo_metadata(session: AsyncSession, photo_id: str, metadata: dict) -> None:
+    await session.execute(
+        update(Photo)
+        .where(Photo.id == photo_id)
+        .values(**metadata)
+        .execution_options(synchronize_session=False)
+    )
+
+
 async def delete_photo(session: AsyncSession, photo: Photo) -> None:
     await session.delete(photo)
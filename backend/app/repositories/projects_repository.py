@@ -1,6 +1,7 @@
+from datetime import datetime
 from typing import List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, update, func, tuple_, or_
 from ..models.project import Project
 from ..models.photo import Photo
 import uuid
@@ -72,36 +73,103 @@ async def list_projects_with_photo_count(
     user_id: str,
     limit: int = 100,
     offset: int = 0,
+    after: Optional[tuple[datetime, str]] = None,
 ) -> List[dict]:
-    """List projects with photo counts"""
+    """
+    List projects with photo counts, newest first.
+
+    Counts come from the denormalized columns, so this is a range read on
+    (user_id, created_at, id) that does not touch the photos table.
+
+    Pass ``after`` = (created_at, id) of the last project already seen to
+    continue with keyset pagination instead of ``offset``.
+    """
     stmt = (
-        select(
-            Project,
-            func.count(Photo.id).label('photo_count')
-        )
-        .outerjoin(Photo, Photo.project_id == Project.id)
+        select(Project)
         .where(Project.user_id == user_id)
-        .group_by(Project.id)
-        .order_by(Project.created_at.desc())
+        .order_by(Project.created_at.desc(), Project.id.desc())
         .limit(limit)
-        .offset(offset)
     )
+    if after is not None:
+        stmt = stmt.where(tuple_(Project.created_at, Project.id) < tuple_(*after))
+    else:
+        stmt = stmt.offset(offset)
     result = await session.execute(stmt)
 
     # Convert to list of dicts with project data and photo_count
     projects = []
-    for project, photo_count in result.all():
+    for project in result.scalars().all():
         projects.append({
             'id': project.id,
             'user_id': project.user_id,
             'name': project.name,
             'description': project.description,
             'created_at': project.created_at,
-            'photo_count': photo_count or 0,
+            'photo_count': project.photo_count,
+            'total_bytes': project.total_bytes,
         })
     return projects
 
 
+async def add_photo_stats(
+    session: AsyncSession,
+    project_id: str,
+    *,
+    photos: int,
+    total_bytes: int,
+) -> None:
+    """
+    Adjust a project's photo_count/total_bytes by a delta.
+
+    Runs as a single relative UPDATE in the caller's transaction, so
+    concurrent uploads and deletes cannot lose increments.
+    """
+    await session.execute(
+        update(Project)
+        .where(Project.id == project_id)
+        .values(
+            photo_count=Project.photo_count + photos,
+            total_bytes=Project.total_bytes + total_bytes,
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def reconcile_project_stats(
+    session: AsyncSession,
+    *,
+    project_id: str | None = None,
+) -> int:
+    """
+    Recompute photo_count/total_bytes from the photos table.
+
+    Only rows that drifted are written. Does not commit.
+
+    Returns:
+        Number of projects that were corrected
+    """
+    actual_count = (
+        select(func.count(Photo.id))
+        .where(Photo.project_id == Project.id)
+        .scalar_subquery()
+    )
+    actual_bytes = (
+        select(func.coalesce(func.sum(Photo.size), 0))
+        .where(Photo.project_id == Project.id)
+        .scalar_subquery()
+    )
+    stmt = (
+        update(Project)
+        .where(or_(Project.photo_count != actual_count, Project.total_bytes != actual_bytes))
+        .values(photo_count=actual_count, total_bytes=actual_bytes)
+        .execution_options(synchronize_session=False)
+    )
+    if project_id is not None:
+        stmt = stmt.where(Project.id == project_id)
+    result = await session.execute(stmt)
+    return result.rowcount
+
+
 async def update_project(
     session: AsyncSession,
     project: Project,
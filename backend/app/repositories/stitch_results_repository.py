@@ -0,0 +1,77 @@
+from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete, insert, or_
+from ..models.project import Project
+from ..models.stitch_result import StitchResult, StitchResultInput
+import uuid
+
+
+async def get_result(
+    session: AsyncSession,
+    project_id: str,
+    fingerprint: str,
+) -> Optional[StitchResult]:
+    stmt = select(StitchResult).where(
+        StitchResult.project_id == project_id,
+        StitchResult.fingerprint == fingerprint,
+    )
+    result = await session.execute(stmt)
+    return result.scalar_one_or_none()
+
+
+async def create_result(
+    session: AsyncSession,
+    *,
+    project_id: str,
+    fingerprint: str,
+    photo_id: str,
+    s3_key: str,
+    result: dict,
+    input_photo_ids: List[str],
+) -> StitchResult:
+    """Record a finished stitch and its inputs (no commit)"""
+    obj = StitchResult(
+        id=str(uuid.uuid4()),
+        project_id=project_id,
+        fingerprint=fingerprint,
+        photo_id=photo_id,
+        s3_key=s3_key,
+        result=result,
+    )
+    session.add(obj)
+    await session.flush()
+    await session.execute(
+        insert(StitchResultInput),
+        [
+            {"id": str(uuid.uuid4()), "result_id": obj.id, "photo_id": photo_id}
+            for photo_id in dict.fromkeys(input_photo_ids)
+        ],
+    )
+    return obj
+
+
+async def delete_results_for_photo(session: AsyncSession, photo_id: str) -> None:
+    """Invalidate cached stitches that used the photo as an input or produced it"""
+    uses_photo = select(StitchResultInput.result_id).where(StitchResultInput.photo_id == photo_id)
+    await session.execute(
+        delete(StitchResult)
+        .where(or_(StitchResult.id.in_(uses_photo), StitchResult.photo_id == photo_id))
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def delete_results_for_project(session: AsyncSession, project_id: str) -> None:
+    await session.execute(
+        delete(StitchResult)
+        .where(StitchResult.project_id == project_id)
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def delete_results_for_user(session: AsyncSession, user_id: str) -> None:
+    project_ids = select(Project.id).where(Project.user_id == user_id)
+    await session.execute(
+        delete(StitchResult)
+        .where(StitchResult.project_id.in_(project_ids))
+        .execution_options(synchronize_session=False)
+    )
@@ -6,17 +6,25 @@ from ..database import get_db
 from ..schemas.user import UserCreate, UserLogin, Token, UserResponse
 from ..repositories import users_repository
 from ..utils.auth import (
-    verify_password,
-    get_password_hash,
     create_access_token,
     ACCESS_TOKEN_EXPIRE_MINUTES
 )
 from ..dependencies.auth import get_current_user
-from ..models.user import User
 from ..services.deletion_service import deletion_service
+from ..services.principal_cache import Principal, principal_cache
+from ..services.password_hasher import password_hasher, PasswordHasherBusy
 
 router = APIRouter()
 
+
+def _auth_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many authentication requests, try again shortly",
+        headers={"Retry-After": "1"},
+    )
+
+
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def register(
     user_data: UserCreate,
@@ -29,7 +37,10 @@ async def register(
             detail="Email already registered"
         )
 
-    hashed_password = get_password_hash(user_data.password)
+    try:
+        hashed_password = await password_hasher.hash(user_data.password)
+    except PasswordHasherBusy:
+        raise _auth_busy()
     user = await users_repository.create_user(
         session,
         name=user_data.name,
@@ -47,7 +58,13 @@ async def login(
     session: AsyncSession = Depends(get_db)
 ):
     user = await users_repository.get_user_by_email(session, user_data.email)
-    if not user or not verify_password(user_data.password, user.hashed_password):
+    try:
+        valid = user is not None and await password_hasher.verify(
+            user_data.password, user.hashed_password
+        )
+    except PasswordHasherBusy:
+        raise _auth_busy()
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
@@ -55,14 +72,14 @@ async def login(
 
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
+        data={"sub": user.email, "uid": user.id}, expires_delta=access_token_expires
     )
 
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_info(
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     return current_user
 
@@ -70,8 +87,18 @@ async def get_current_user_info(
 @router.delete("/me")
 async def delete_current_user(
     session: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """Delete the current user and all their projects/photos (DB + S3)"""
-    await deletion_service.delete_user(session, current_user)
-    return {"ok": True, "id": current_user.id}
+    user = await users_repository.get_user_by_id(session, current_user.id)
+    if user is None:
+        principal_cache.invalidate_user(current_user.id)
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+
+    user_id = user.id
+    await deletion_service.delete_user(session, user)
+    principal_cache.invalidate_user(user_id)
+    return {"ok": True, "id": user_id}
@@ -0,0 +1,77 @@
+import logging
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import FileResponse, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.background import BackgroundTask
+
+from ..database import get_db
+from ..dependencies.auth import get_current_user
+from ..services.principal_cache import Principal
+from ..repositories import jobs_repository as repo
+from ..schemas.job import JobOut
+from ..services.s3_service import s3_service
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+@router.get("/{job_id}", response_model=JobOut)
+async def get_job(
+    job_id: str,
+    session: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """Poll the status and progress of a background job"""
+    job = await repo.get_job_with_ownership_check(session, job_id, current_user.id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    return job
+
+
+@router.get("/{job_id}/preview", summary="Download the preview of a job's result")
+async def get_job_preview(
+    job_id: str,
+    session: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """
+    Low-resolution preview of the result, available as soon as ``preview``
+    is set on the job (stitch jobs publish it before the full render).
+    """
+    job = await repo.get_job_with_ownership_check(session, job_id, current_user.id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    if not job.preview:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No preview available"
+        )
+
+    s3_key, mime = job.preview["s3_key"], job.preview["mime"]
+    # A job's preview can still be replaced (e.g. when it is retried)
+    headers = {"Cache-Control": "private, no-cache"}
+    try:
+        local_path = await s3_service.acquire_local(s3_key)
+    except Exception as e:
+        logger.warning(f"Disk cache fill failed for {s3_key}: {e}")
+        local_path = None
+    if local_path is not None:
+        return FileResponse(
+            local_path,
+            media_type=mime,
+            headers=headers,
+            background=BackgroundTask(s3_service.release_local, s3_key),
+        )
+    try:
+        content = await s3_service.download_file(s3_key)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to download preview: {str(e)}")
+    return Response(content, media_type=mime, headers=headers)
@@ -1,19 +1,45 @@
+import asyncio
+import logging
+import math
 import os
 import uuid
-from io import BytesIO
+from typing import Literal
 
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
-from fastapi.responses import StreamingResponse
+from fastapi import (
+    APIRouter, UploadFile, File, HTTPException, Depends, Header, Query, BackgroundTasks
+)
+from fastapi.responses import FileResponse, RedirectResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from ..config import settings
 from ..database import get_db
 from ..repositories import photos_repository as photo_repo
 from ..repositories import projects_repository as project_repo
 from ..services.s3_service import s3_service
+from ..services.blob_service import blob_service, EmptyUpload
 from ..services.deletion_service import deletion_service
+from ..services.derivative_service import derivative_service
+from ..services.metadata_service import metadata_service
 from ..dependencies.auth import get_current_user
-from ..models.user import User
-from ..schemas.photo import PhotoOut
+from ..services.principal_cache import Principal
+from ..schemas.photo import (
+    PhotoOut,
+    PhotoPage,
+    BatchUploadItem,
+    BatchUploadOut,
+    DirectUploadRequest,
+    DirectUploadOut,
+    DirectUploadComplete,
+    PresignedPart,
+)
+from ..utils.http_cache import format_http_date, if_range_matches, is_not_modified
+from ..utils.http_range import RangeNotSatisfiable, parse_range_header
+from ..utils.cursor import InvalidCursor, decode_cursor, encode_cursor
+from ..utils.upload_ticket import create_upload_ticket, decode_upload_ticket
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -25,12 +51,19 @@ def _safe_ext(name: str | None) -> str:
     return ext if 0 < len(ext) <= 10 else ""
 
 
+def _upload_error(error: Exception) -> HTTPException:
+    if isinstance(error, EmptyUpload):
+        return HTTPException(status_code=400, detail="Empty file")
+    return HTTPException(status_code=500, detail=f"Failed to upload file to S3: {str(error)}")
+
+
 @router.post("/projects/{project_id}/photos", summary="Upload single photo to project g")
 async def upload_photo(
     project_id: str,
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     session: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """
     Upload ONE photo to a specific project.
@@ -43,55 +76,332 @@ async def upload_photo(
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
 
-    # 2) Generate photo id and S3 key
-    fid = str(uuid.uuid4())
-    ext = _safe_ext(file.filename)
-    s3_key = f"photos/{fid}{ext}"
-
-    # 3) Read file content (note: loads entire file into RAM)
-    file_content = await file.read()
-    if not file_content:
-        raise HTTPException(status_code=400, detail="Empty file")
-
-    file_size = len(file_content)
-    content_type = file.content_type or "application/octet-stream"
-    original_name = file.filename or f"{fid}{ext}"
-
-    # 4) Upload to S3
-    try:
-        await s3_service.upload_file(
-            file_data=file_content,
-            s3_key=s3_key,
-            content_type=content_type,
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to upload file to S3: {str(e)}")
+    # 2) Hash the upload; stream it to S3 only if this content is new
+    [stored] = await blob_service.store_uploads(session, [file])
+    if stored.error is not None:
+        raise _upload_error(stored.error)
 
-    # 5) Save metadata to database
+    # 3) Save metadata (including image headers) to database
+    fid = str(uuid.uuid4())
+    content_type = stored.content_type
+    metadata = await metadata_service.read_upload(file, content_type)
     await photo_repo.create_photo_meta(
         session,
         id=fid,
-        s3_key=s3_key,
-        original_name=original_name,
+        s3_key=stored.blob.s3_key,
+        original_name=file.filename or fid,
         mime=content_type,
-        size=file_size,
+        size=stored.size,
         user_id=current_user.id,
         project_id=project_id,
+        blob_id=stored.blob.id,
+        **metadata,
     )
 
-    await session.commit()
+    try:
+        await session.commit()
+    except Exception:
+        if stored.created:
+            await s3_service.delete_file(stored.blob.s3_key)
+        raise
+
+    # 4) Build thumbnail/preview after the response is sent
+    if settings.derivatives_on_upload and content_type.startswith("image/"):
+        background_tasks.add_task(derivative_service.generate_all, fid)
+
     return {"item": fid}
 
 
+@router.post(
+    "/projects/{project_id}/photos/batch",
+    response_model=BatchUploadOut,
+    summary="Upload many photos to project",
+)
+async def upload_photos_batch(
+    project_id: str,
+    background_tasks: BackgroundTasks,
+    files: list[UploadFile] = File(...),
+    session: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """
+    Upload several photos in one multipart request (repeat the "files" field).
+
+    Files are hashed and new content is streamed to S3 concurrently (at
+    most batch_upload_concurrency at a time); content that is already
+    stored is not uploaded again. All rows are written with one INSERT and
+    one commit. A failed file does not fail the batch; check each item's
+    "ok" flag.
+    """
+    project = await project_repo.get_project_with_ownership_check(
+        session, project_id, current_user.id
+    )
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    if len(files) > settings.batch_upload_max_files:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.batch_upload_max_files} files per batch",
+        )
+
+    stored = await blob_service.store_uploads(
+        session, files, concurrency=settings.batch_upload_concurrency
+    )
+    metadata = await asyncio.gather(*(
+        metadata_service.read_upload(file, result.content_type)
+        for file, result in zip(files, stored)
+    ))
+
+    items: list[BatchUploadItem] = []
+    rows: list[dict] = []
+    for file, result, file_metadata in zip(files, stored, metadata):
+        filename = file.filename or ""
+        if result.error is not None:
+            items.append(
+                BatchUploadItem(filename=filename, ok=False, error=_upload_error(result.error).detail)
+            )
+            continue
+        fid = str(uuid.uuid4())
+        rows.append({
+            "id": fid,
+            "s3_key": result.blob.s3_key,
+            "original_name": file.filename or fid,
+            "mime": result.content_type,
+            "size": result.size,
+            "user_id": current_user.id,
+            "project_id": project_id,
+            "blob_id": result.blob.id,
+            **file_metadata,
+        })
+        items.append(BatchUploadItem(filename=filename, ok=True, photo_id=fid, size=result.size))
+
+    try:
+        await photo_repo.create_photos_bulk(session, rows)
+        await session.commit()
+    except Exception as e:
+        await session.rollback()
+        await s3_service.delete_files([r.blob.s3_key for r in stored if r.created])
+        raise HTTPException(status_code=500, detail=f"Failed to save photos: {str(e)}")
+
+    if settings.derivatives_on_upload:
+        for row in rows:
+            if row["mime"].startswith("image/"):
+                background_tasks.add_task(derivative_service.generate_all, row["id"])
+
+    return BatchUploadOut(
+        items=items,
+        uploaded=len(rows),
+        failed=len(items) - len(rows),
+    )
+
+
+@router.post(
+    "/projects/{project_id}/photos/uploads",
+    response_model=DirectUploadOut,
+    summary="Start a direct-to-S3 upload",
+)
+async def start_direct_upload(
+    project_id: str,
+    data: DirectUploadRequest,
+    session: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """
+    Phase 1 of a direct upload: returns a presigned PUT URL (or one URL per
+    part for large files) plus a signed ticket. The client sends the bytes
+    straight to S3 and then calls .../uploads/complete with the ticket.
+    """
+    project = await project_repo.get_project_with_ownership_check(
+        session, project_id, current_user.id
+    )
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    if data.size > settings.presigned_upload_max_size:
+        raise HTTPException(status_code=413, detail="File too large")
+
+    fid = str(uuid.uuid4())
+    s3_key = f"photos/{fid}{_safe_ext(data.filename)}"
+    expiration = settings.presigned_url_expiration
+    ticket_data = {
+        "photo_id": fid,
+        "project_id": project_id,
+        "user_id": current_user.id,
+        "s3_key": s3_key,
+        "name": data.filename,
+        "mime": data.content_type,
+        "size": data.size,
+    }
+
+    try:
+        if data.size <= settings.presigned_multipart_threshold:
+            url = await s3_service.generate_presigned_put_url(
+                s3_key, data.content_type, expiration
+            )
+            return DirectUploadOut(
+                photo_id=fid,
+                ticket=create_upload_ticket(ticket_data, expiration),
+                method="PUT",
+                url=url,
+                headers={"Content-Type": data.content_type},
+            )
+
+        # S3 allows at most 10,000 parts per upload
+        part_size = max(settings.s3_multipart_part_size, math.ceil(data.size / 10_000))
+        part_count = math.ceil(data.size / part_size)
+        upload_id = await s3_service.create_multipart_upload(s3_key, data.content_type)
+        urls = await s3_service.generate_presigned_part_urls(
+            s3_key, upload_id, part_count, expiration
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to prepare upload: {str(e)}")
+
+    ticket_data["upload_id"] = upload_id
+    return DirectUploadOut(
+        photo_id=fid,
+        ticket=create_upload_ticket(ticket_data, expiration),
+        method="MULTIPART",
+        part_size=part_size,
+        parts=[PresignedPart(part_number=i + 1, url=u) for i, u in enumerate(urls)],
+    )
+
+
+@router.post(
+    "/projects/{project_id}/photos/uploads/complete",
+    summary="Finalize a direct-to-S3 upload",
+)
+async def complete_direct_upload(
+    project_id: str,
+    data: DirectUploadComplete,
+    background_tasks: BackgroundTasks,
+    session: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """
+    Phase 2 of a direct upload: completes the multipart upload if needed,
+    verifies the object with a HEAD request, reads the image header with a
+    ranged GET and records the photo.
+    Returns: {"item": "<photo_id>"}
+    """
+    ticket = _read_upload_ticket(data.ticket, project_id, current_user.id)
+
+    # Finalizing twice is harmless
+    existing = await photo_repo.get_photo(session, ticket["photo_id"])
+    if existing is not None:
+        return {"item": existing.id}
+
+    s3_key = ticket["s3_key"]
+    if ticket.get("upload_id"):
+        if not data.parts:
+            raise HTTPException(status_code=400, detail="Missing uploaded parts")
+        try:
+            await s3_service.complete_multipart_upload(
+                s3_key,
+                ticket["upload_id"],
+                [{"PartNumber": p.part_number, "ETag": p.etag} for p in data.parts],
+            )
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Failed to complete upload: {str(e)}")
+
+    head = await s3_service.head_file(s3_key)
+    if head is None:
+        raise HTTPException(status_code=400, detail="Uploaded file not found in storage")
+    if head["size"] != ticket["size"]:
+        await s3_service.delete_file(s3_key)
+        raise HTTPException(
+            status_code=400,
+            detail=f"Uploaded size {head['size']} does not match declared size {ticket['size']}",
+        )
+
+    project = await project_repo.get_project_with_ownership_check(
+        session, project_id, current_user.id
+    )
+    if not project:
+        # Project was deleted while the client was uploading
+        await s3_service.delete_file(s3_key)
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    metadata = await metadata_service.read_object(s3_key, head["size"], ticket["mime"])
+    try:
+        await photo_repo.create_photo_meta(
+            session,
+            id=ticket["photo_id"],
+            s3_key=s3_key,
+            original_name=ticket["name"],
+            mime=ticket["mime"],
+            size=head["size"],
+            user_id=current_user.id,
+            project_id=project_id,
+            **metadata,
+        )
+        await session.commit()
+    except IntegrityError:
+        # A concurrent finalize of the same ticket recorded the photo first,
+        # or the project was deleted since the ownership check
+        await session.rollback()
+        existing = await photo_repo.get_photo(session, ticket["photo_id"])
+        if existing is None:
+            await s3_service.delete_file(s3_key)
+            raise HTTPException(status_code=404, detail="Project not found")
+        return {"item": existing.id}
+
+    if settings.derivatives_on_upload and ticket["mime"].startswith("image/"):
+        background_tasks.add_task(derivative_service.generate_all, ticket["photo_id"])
+
+    return {"item": ticket["photo_id"]}
+
+
+@router.post(
+    "/projects/{project_id}/photos/uploads/abort",
+    summary="Abort a direct-to-S3 upload",
+)
+async def abort_direct_upload(
+    project_id: str,
+    data: DirectUploadComplete,
+    session: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """Discard an unfinished direct upload so no parts or objects are left behind"""
+    ticket = _read_upload_ticket(data.ticket, project_id, current_user.id)
+    # A completed upload is a photo now; it is removed with DELETE instead
+    if await photo_repo.get_photo(session, ticket["photo_id"]) is not None:
+        raise HTTPException(status_code=409, detail="Upload was already completed")
+    if ticket.get("upload_id"):
+        await s3_service.abort_multipart_upload(ticket["s3_key"], ticket["upload_id"])
+    else:
+        await s3_service.delete_file(ticket["s3_key"])
+    return {"ok": True, "id": ticket["photo_id"]}
+
+
+def _read_upload_ticket(raw: str, project_id: str, user_id: str) -> dict:
+    ticket = decode_upload_ticket(raw)
+    if (
+        ticket is None
+        or ticket.get("project_id") != project_id
+        or ticket.get("user_id") != user_id
+    ):
+        raise HTTPException(status_code=400, detail="Invalid or expired upload ticket")
+    return ticket
+
+
 @router.get("/projects/{project_id}/photos", summary="List photos in project")
 async def list_photos(
     project_id: str,
-    limit: int = 100,
+    limit: int = Query(100, ge=1, le=1000),
     offset: int = 0,
+    cursor: str | None = None,
     session: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-) -> dict[str, list[PhotoOut]]:
-    """List all photos in a specific project"""
+    current_user: Principal = Depends(get_current_user),
+) -> PhotoPage:
+    """
+    List photos in a specific project, newest first.
+
+    Pass the returned next_cursor as ?cursor= to get the following page.
+    """
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
     # Verify project ownership
     project = await project_repo.get_project_with_ownership_check(
         session, project_id, current_user.id
@@ -99,51 +409,168 @@ async def list_photos(
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
 
+    # Fetch one extra row to know whether another page exists
     rows = await photo_repo.list_photos(
         session,
         user_id=current_user.id,
         project_id=project_id,
-        limit=limit,
-        offset=offset
+        limit=limit + 1,
+        offset=offset,
+        after=after,
     )
-    return {"items": [PhotoOut.model_validate(r) for r in rows]}
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return PhotoPage(items=[PhotoOut.model_validate(r) for r in rows], next_cursor=next_cursor)
 
 
 @router.get("/projects/{project_id}/photos/{photo_id}", summary="View/download photo")
 async def get_photo(
     project_id: str,
     photo_id: str,
+    variant: Literal["original", "thumb", "preview"] = Query("original", alias="size"),
+    redirect: bool = False,
+    range_header: str | None = Header(None, alias="Range"),
+    if_range: str | None = Header(None, alias="If-Range"),
+    if_none_match: str | None = Header(None, alias="If-None-Match"),
+    if_modified_since: str | None = Header(None, alias="If-Modified-Since"),
     session: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
-    """Get a specific photo from a project"""
-    # Verify project ownership
-    project = await project_repo.get_project_with_ownership_check(
-        session, project_id, current_user.id
-    )
-    if not project:
-        raise HTTPException(status_code=404, detail="Project not found")
+    """
+    Get a specific photo from a project (supports single-range requests).
+    Use ?size=thumb or ?size=preview for a downscaled rendition, and
+    ?redirect=1 to get a 302 to a short-lived presigned S3 URL instead of
+    streaming the bytes through the API.
 
-    # Get photo with triple check: exists, belongs to user, belongs to project
-    photo = await photo_repo.get_photo_with_ownership_check(
-        session, photo_id, current_user.id, project_id
+    Photos are immutable, so responses carry a strong ETag and long-lived
+    Cache-Control; conditional requests get a 304 without touching S3. The
+    exception is a rendition that does not exist yet: it is rendered first,
+    since its ETag is what the request is validated against.
+    """
+    # One query: project belongs to user AND photo belongs to project
+    project_found, photo = await photo_repo.get_owned_photo(
+        session, photo_id=photo_id, project_id=project_id, user_id=current_user.id
     )
+    if not project_found:
+        raise HTTPException(status_code=404, detail="Project not found")
     if not photo:
         raise HTTPException(status_code=404, detail="Photo not found")
 
-    # Download from S3
+    s3_key, mime, size, filename = photo.s3_key, photo.mime, photo.size, photo.original_name
+    # The content hash where we have one, else the photo id (its object never changes)
+    etag = f'"{photo.blob.sha256}"' if photo.blob is not None else f'"{photo.id}"'
+    immutable = True
+
+    # Serve a thumbnail/preview rendition, generating it on first request
+    # (an existing one is only looked up in the DB)
+    if variant != "original" and derivative_service.supports(photo):
+        try:
+            derivative = await derivative_service.get_or_create(session, photo, variant)
+            s3_key, mime, size = derivative.s3_key, derivative.mime, derivative.size
+            stem, _ = os.path.splitext(photo.original_name)
+            filename = f"{stem}-{variant}{_safe_ext(derivative.s3_key)}"
+            etag = f'"{derivative.id}"'
+        except Exception as e:
+            # Fall back to the original rather than breaking the gallery,
+            # but don't let browsers keep the fallback forever
+            logger.warning(f"Could not build {variant} for photo {photo.id}: {e}")
+            immutable = False
+
+    if redirect:
+        try:
+            url = await s3_service.generate_presigned_url(
+                s3_key,
+                settings.presigned_url_expiration,
+                content_type=mime,
+                content_disposition=f'inline; filename="{filename}"',
+            )
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to sign download URL: {str(e)}")
+        return RedirectResponse(url, status_code=302)
+
+    cache_headers = {
+        "ETag": etag,
+        "Last-Modified": format_http_date(photo.created_at),
+        "Cache-Control": (
+            f"private, max-age={settings.photo_cache_max_age}, immutable"
+            if immutable else "private, no-cache"
+        ),
+    }
+    if is_not_modified(
+        etag=etag,
+        last_modified=photo.created_at,
+        if_none_match=if_none_match,
+        if_modified_since=if_modified_since,
+    ):
+        return Response(status_code=304, headers=cache_headers)
+
+    # Renditions are small and hot: keep them on local disk. Originals are
+    # served from disk when stitching already cached them, otherwise streamed
     try:
-        file_data = await s3_service.download_file(photo.s3_key)
+        local_path = await s3_service.acquire_local(s3_key, fill=variant != "original")
+    except Exception as e:
+        logger.warning(f"Disk cache fill failed for {s3_key}: {e}")
+        local_path = None
+    if local_path is not None:
+        # FileResponse handles Range/If-Range itself
+        return FileResponse(
+            local_path,
+            media_type=mime,
+            filename=filename,
+            content_disposition_type="inline",
+            headers=cache_headers,
+            background=BackgroundTask(s3_service.release_local, s3_key),
+        )
+
+    if not if_range_matches(if_range, etag):
+        range_header = None
+    return await _stream_object(s3_key, mime, size, filename, range_header, cache_headers)
+
+
+async def _stream_object(
+    s3_key: str,
+    mime: str,
+    size: int,
+    filename: str,
+    range_header: str | None,
+    extra_headers: dict[str, str] | None = None,
+) -> StreamingResponse:
+    """Relay an S3 object (or a single byte range of it) to the client."""
+    try:
+        byte_range = parse_range_header(range_header, size)
+    except RangeNotSatisfiable:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+
+    # Open a streaming download from S3 (only the requested range, if any)
+    try:
+        stream = await s3_service.open_stream(s3_key, byte_range=byte_range)
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Failed to download file from S3: {str(e)}"
         )
 
-    # Return as streaming response
+    headers = {
+        **(extra_headers or {}),
+        "Content-Disposition": f'inline; filename="{filename}"',
+        "Accept-Ranges": "bytes",
+        "Content-Length": str(stream.content_length),
+    }
+    if byte_range is not None:
+        headers["Content-Range"] = f"bytes {byte_range[0]}-{byte_range[1]}/{size}"
+
+    # Relay S3 body chunks to the client as they arrive
     return StreamingResponse(
-        BytesIO(file_data),
-        media_type=photo.mime,
-        headers={"Content-Disposition": f'inline; filename="{photo.original_name}"'},
+        stream.iter_chunks(settings.download_chunk_size),
+        status_code=206 if byte_range is not None else 200,
+        media_type=mime,
+        headers=headers,
+        background=BackgroundTask(stream.aclose),
     )
 
 
@@ -152,18 +579,15 @@ async def delete_photo(
     project_id: str,
     photo_id: str,
     session: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Delete a photo from DB and S3"""
-    project = await project_repo.get_project_with_ownership_check(
-        session, project_id, current_user.id
+    # One query: project belongs to user AND photo belongs to project
+    project_found, photo = await photo_repo.get_owned_photo(
+        session, photo_id=photo_id, project_id=project_id, user_id=current_user.id
     )
-    if not project:
+    if not project_found:
         raise HTTPException(status_code=404, detail="Project not found")
-
-    photo = await photo_repo.get_photo_with_ownership_check(
-        session, photo_id, current_user.id, project_id
-    )
     if not photo:
         raise HTTPException(status_code=404, detail="Photo not found")
 
@@ -1,13 +1,13 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..database import get_db
 from ..dependencies.auth import get_current_user
-from ..models.user import User
-from ..schemas.project import ProjectCreate, ProjectOut, ProjectWithPhotoCount
+from ..services.principal_cache import Principal
+from ..schemas.project import ProjectCreate, ProjectOut, ProjectPage
 from ..repositories import projects_repository as repo
 from ..services.deletion_service import deletion_service
+from ..utils.cursor import InvalidCursor, decode_cursor, encode_cursor
 
 router = APIRouter()
 
@@ -16,7 +16,7 @@ router = APIRouter()
 async def create_project(
     project_data: ProjectCreate,
     session: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """Create a new project"""
     project = await repo.create_project(
@@ -30,28 +30,50 @@ async def create_project(
     return project
 
 
-@router.get("", response_model=List[ProjectWithPhotoCount])
+@router.get("", response_model=ProjectPage)
 async def list_projects(
-    limit: int = 100,
+    limit: int = Query(100, ge=1, le=1000),
     offset: int = 0,
+    cursor: str | None = None,
     session: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
-    """List all projects for the current user"""
+    """
+    List projects for the current user, newest first.
+
+    Pass the returned next_cursor as ?cursor= to get the following page;
+    it stays fast and stable however deep you page (offset is still
+    accepted for the first page / old clients).
+    """
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except InvalidCursor:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+    # Fetch one extra row to know whether another page exists
     projects = await repo.list_projects_with_photo_count(
         session,
         user_id=current_user.id,
-        limit=limit,
+        limit=limit + 1,
         offset=offset,
+        after=after,
     )
-    return projects
+    next_cursor = None
+    if len(projects) > limit:
+        projects = projects[:limit]
+        last = projects[-1]
+        next_cursor = encode_cursor(last["created_at"], last["id"])
+    return {"items": projects, "next_cursor": next_cursor}
 
 
 @router.get("/{project_id}", response_model=ProjectOut)
 async def get_project(
     project_id: str,
     session: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """Get a specific project"""
     project = await repo.get_project_with_ownership_check(
@@ -69,7 +91,7 @@ async def get_project(
 async def delete_project(
     project_id: str,
     session: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """Delete a project and all its photos (DB + S3)"""
     project = await repo.get_project_with_ownership_check(
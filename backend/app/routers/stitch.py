@@ -0,0 +1,85 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..database import get_db
+from ..dependencies.auth import get_current_user
+from ..services.principal_cache import Principal
+from ..repositories import projects_repository as project_repo
+from ..schemas.job import JobSubmitted
+from ..schemas.stitch import StitchRequest
+from ..services.compositing_service import compositing_service, stitch_fingerprint, StitchError
+from ..services.job_queue import job_queue
+
+router = APIRouter()
+
+
+@router.post(
+    "/projects/{project_id}/stitch",
+    response_model=JobSubmitted,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Combine project photos into one image",
+)
+async def stitch_project(
+    project_id: str,
+    params: StitchRequest,
+    session: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """
+    Queue a job combining photos of a project using a grid, horizontal or
+    vertical layout, or into a panorama of overlapping shots. The result is
+    stored as a new photo in the same project.
+    Poll GET /jobs/{job_id} for progress; on success ``result.photo_id`` is set.
+
+    Repeating an earlier request returns a job that already succeeded with
+    the stored composite (``result.cached``), and identical requests
+    submitted while one is running share its job.
+    """
+    project = await project_repo.get_project_with_ownership_check(
+        session, project_id, current_user.id
+    )
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    # Validate the selection now and pin it, so the job combines exactly
+    # the photos that existed at submission time
+    try:
+        photos = await compositing_service.select_photos(
+            session,
+            user_id=current_user.id,
+            project_id=project_id,
+            photo_ids=params.photo_ids,
+        )
+    except StitchError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if params.layout == "panorama" and len(photos) > settings.stitch_panorama_max_images:
+        raise HTTPException(
+            status_code=400,
+            detail=f"A panorama can combine at most {settings.stitch_panorama_max_images} photos",
+        )
+
+    job_params = params.model_dump()
+    job_params["photo_ids"] = [p.id for p in photos]
+    fingerprint = stitch_fingerprint(project_id, job_params)
+    cached = await compositing_service.cached_result(session, project_id, fingerprint)
+    if cached is not None:
+        job = await job_queue.record_finished(
+            session,
+            user_id=current_user.id,
+            project_id=project_id,
+            kind="stitch",
+            params=job_params,
+            result=cached,
+        )
+        return {"job_id": job.id, "status": job.status}
+
+    job = await job_queue.submit(
+        session,
+        user_id=current_user.id,
+        project_id=project_id,
+        kind="stitch",
+        params=job_params,
+        fingerprint=fingerprint,
+    )
+    return {"job_id": job.id, "status": job.status}
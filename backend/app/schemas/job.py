@@ -0,0 +1,32 @@
+from datetime import datetime
+from pydantic import BaseModel
+
+
+class JobPreview(BaseModel):
+    """Low-resolution preview of a job's result (GET /jobs/{job_id}/preview)"""
+    mime: str
+    width: int
+    height: int
+
+
+class JobOut(BaseModel):
+    """Schema for background job status"""
+    id: str
+    kind: str
+    status: str
+    progress: float
+    project_id: str | None
+    result: dict | None
+    preview: JobPreview | None = None
+    error: str | None
+    created_at: datetime
+    started_at: datetime | None
+    finished_at: datetime | None
+
+    model_config = {"from_attributes": True}
+
+
+class JobSubmitted(BaseModel):
+    """Schema returned when a job is accepted"""
+    job_id: str
+    status: str
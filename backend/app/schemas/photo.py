@@ -1,5 +1,6 @@
 from datetime import datetime
-from pydantic import BaseModel
+from typing import Literal
+from pydantic import BaseModel, Field
 
 
 class PhotoOut(BaseModel):
@@ -8,5 +9,70 @@ class PhotoOut(BaseModel):
     mime: str
     size: int
     created_at: datetime
+    source: str = "upload"  # upload | stitch (the output of a stitch job)
+    # From the image header; width/height as displayed (EXIF orientation
+    # applied). None for non-images and photos not backfilled yet
+    width: int | None = None
+    height: int | None = None
+    orientation: int | None = None
+    taken_at: datetime | None = None
+    camera_make: str | None = None
+    camera_model: str | None = None
+    has_icc: bool | None = None
 
     model_config = {"from_attributes": True}
+
+
+class PhotoPage(BaseModel):
+    """One page of photos; pass next_cursor back as ?cursor= for the next one"""
+    items: list[PhotoOut]
+    next_cursor: str | None = None
+
+
+class BatchUploadItem(BaseModel):
+    """Outcome of one file in a batch upload"""
+    filename: str
+    ok: bool
+    photo_id: str | None = None
+    size: int | None = None
+    error: str | None = None
+
+
+class BatchUploadOut(BaseModel):
+    items: list[BatchUploadItem]
+    uploaded: int
+    failed: int
+
+
+class DirectUploadRequest(BaseModel):
+    """Schema for starting a direct-to-S3 upload"""
+    filename: str = Field(..., min_length=1, max_length=255)
+    content_type: str = Field("application/octet-stream", max_length=100)
+    size: int = Field(..., gt=0)
+
+
+class PresignedPart(BaseModel):
+    part_number: int
+    url: str
+
+
+class DirectUploadOut(BaseModel):
+    """Where and how the client should send the file"""
+    photo_id: str
+    ticket: str
+    method: Literal["PUT", "MULTIPART"]
+    url: str | None = None
+    headers: dict[str, str] = {}
+    part_size: int | None = None
+    parts: list[PresignedPart] = []
+
+
+class UploadedPart(BaseModel):
+    part_number: int = Field(..., ge=1)
+    etag: str
+
+
+class DirectUploadComplete(BaseModel):
+    """Schema for finalizing (or aborting) a direct upload"""
+    ticket: str
+    parts: list[UploadedPart] = []
@@ -21,6 +21,8 @@ class ProjectOut(BaseModel):
     name: str
     description: str | None
     created_at: datetime
+    photo_count: int = 0
+    total_bytes: int = 0
 
     class Config:
         from_attributes = True
@@ -34,6 +36,13 @@ class ProjectWithPhotoCount(BaseModel):
     description: str | None
     created_at: datetime
     photo_count: int
+    total_bytes: int = 0
 
     class Config:
         from_attributes = True
+
+
+class ProjectPage(BaseModel):
+    """One page of projects; pass next_cursor back as ?cursor= for the next one"""
+    items: list[ProjectWithPhotoCount]
+    next_cursor: str | None = None
@@ -0,0 +1,22 @@
+from typing import Literal
+from pydantic import BaseModel, Field
+
+
+class StitchRequest(BaseModel):
+    """Schema for combining project photos into one image"""
+    layout: Literal["grid", "horizontal", "vertical", "panorama"] = Field(
+        "grid",
+        description="panorama aligns overlapping photos by their content; "
+        "cell_size, spacing and columns do not apply to it",
+    )
+    photo_ids: list[str] | None = Field(
+        None,
+        description="Photos to combine, in order. Defaults to all uploaded project "
+        "photos (earlier stitch outputs are left out).",
+    )
+    cell_size: int = Field(1024, ge=64, le=8192)
+    spacing: int = Field(0, ge=0, le=256)
+    columns: int | None = Field(None, ge=1, le=100)
+    background: str = Field("#ffffff", pattern=r"^#[0-9a-fA-F]{6}$")
+    output_format: Literal["jpeg", "png", "webp"] = "jpeg"
+    quality: int = Field(90, ge=1, le=100)
@@ -25,3 +25,5 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     email: str | None = None
+    # Absent in tokens issued before the "uid" claim was added
+    user_id: str | None = None
@@ -0,0 +1,198 @@
+"""Content-addressed storage for uploaded photos.
+
+Every upload is hashed (SHA-256) before anything is sent to S3. If a blob
+with the same digest already exists the new Photo just takes another
+reference on it and the S3 PUT is skipped; otherwise the bytes are
+uploaded once under ``blobs/{sha[:2]}/{sha}/{blob_id}``.
+
+The blob id in the key means a blob that is being deleted (last reference
+released, S3 delete pending) and a fresh upload of the same bytes never
+share an object key.
+"""
+
+import asyncio
+import hashlib
+import logging
+import uuid
+from typing import AsyncIterator, BinaryIO, NamedTuple
+
+from fastapi import UploadFile
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..models.blob import Blob
+from ..repositories import blobs_repository as blob_repo
+from .s3_service import s3_service
+
+logger = logging.getLogger(__name__)
+
+
+class EmptyUpload(Exception):
+    """Raised for a zero-byte upload."""
+
+
+class StoredUpload(NamedTuple):
+    blob: Blob | None
+    size: int
+    content_type: str
+    # True if this call uploaded a new S3 object (delete it if the
+    # surrounding transaction is rolled back)
+    created: bool = False
+    error: Exception | None = None
+
+
+def blob_key(digest: str, blob_id: str) -> str:
+    return f"blobs/{digest[:2]}/{digest}/{blob_id}"
+
+
+def _sha256_fileobj(fileobj: BinaryIO, chunk_size: int) -> tuple[str, int]:
+    fileobj.seek(0)
+    h = hashlib.sha256()
+    size = 0
+    while chunk := fileobj.read(chunk_size):
+        h.update(chunk)
+        size += len(chunk)
+    fileobj.seek(0)
+    return h.hexdigest(), size
+
+
+async def _iter_file(file: UploadFile) -> AsyncIterator[bytes]:
+    await file.seek(0)
+    while chunk := await file.read(settings.upload_read_chunk_size):
+        yield chunk
+
+
+class BlobService:
+    """Deduplicates uploads by content hash."""
+
+    async def digest(self, file: UploadFile) -> tuple[str, int]:
+        """
+        SHA-256 and size of an upload.
+
+        Starlette spools request files to a temporary file, so hashing is a
+        local read; it runs in a worker thread to keep the event loop free.
+        """
+        return await asyncio.to_thread(
+            _sha256_fileobj, file.file, settings.upload_read_chunk_size
+        )
+
+    async def store_uploads(
+        self,
+        session: AsyncSession,
+        files: list[UploadFile],
+        *,
+        concurrency: int = 1,
+    ) -> list[StoredUpload]:
+        """
+        Store uploads content-addressed and take one blob reference per file.
+
+        Hashing and uploads of new content run concurrently (bounded by
+        ``concurrency``); references are taken in ``session`` without
+        committing, so they land atomically with the caller's Photo rows.
+        Identical files within the same call are uploaded once.
+
+        Returns:
+            One StoredUpload per file, in input order. Failures are reported
+            in ``error`` (EmptyUpload, or the S3/database exception).
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        types = [file.content_type or "application/octet-stream" for file in files]
+
+        async def digest(file: UploadFile):
+            async with semaphore:
+                return await self.digest(file)
+
+        digests = await asyncio.gather(*(digest(f) for f in files), return_exceptions=True)
+        for i, d in enumerate(digests):
+            if not isinstance(d, BaseException) and d[1] == 0:
+                digests[i] = EmptyUpload()
+
+        valid = [i for i, d in enumerate(digests) if not isinstance(d, BaseException)]
+        existing = await blob_repo.get_blobs_by_sha(session, [digests[i][0] for i in valid])
+
+        # Upload each new digest once, from the first file that has it
+        first_by_sha: dict[str, int] = {}
+        for i in valid:
+            sha = digests[i][0]
+            if sha not in existing:
+                first_by_sha.setdefault(sha, i)
+
+        async def upload(i: int) -> tuple[str, str]:
+            async with semaphore:
+                return await self._upload(files[i], digests[i][0], types[i])
+
+        uploads = dict(zip(
+            first_by_sha,
+            await asyncio.gather(
+                *(upload(i) for i in first_by_sha.values()), return_exceptions=True
+            ),
+        ))
+
+        results: list[StoredUpload] = []
+        acquired: dict[str, Blob] = {}
+        for i, (file, content_type) in enumerate(zip(files, types)):
+            if isinstance(digests[i], BaseException):
+                results.append(StoredUpload(None, 0, content_type, error=digests[i]))
+                continue
+            sha, size = digests[i]
+            try:
+                blob = acquired.get(sha) or existing.get(sha)
+                if blob is not None and await blob_repo.add_blob_ref(session, blob.id):
+                    acquired[sha] = blob
+                    results.append(StoredUpload(blob, size, content_type))
+                    continue
+
+                # No live blob for this digest: register the object uploaded
+                # for it above, or upload now if that failed or the blob we
+                # meant to share was released in the meantime
+                uploaded = uploads.pop(sha, None)
+                if uploaded is None or isinstance(uploaded, BaseException):
+                    uploaded = await self._upload(file, sha, content_type)
+                blob, created = await self._create_or_join(
+                    session, sha=sha, size=size, mime=content_type, uploaded=uploaded
+                )
+                acquired[sha] = blob
+                results.append(StoredUpload(blob, size, content_type, created=created))
+            except Exception as e:
+                results.append(StoredUpload(None, size, content_type, error=e))
+        return results
+
+    async def _upload(self, file: UploadFile, digest: str, content_type: str) -> tuple[str, str]:
+        blob_id = str(uuid.uuid4())
+        s3_key = blob_key(digest, blob_id)
+        await s3_service.upload_stream(_iter_file(file), s3_key=s3_key, content_type=content_type)
+        return blob_id, s3_key
+
+    async def _create_or_join(
+        self,
+        session: AsyncSession,
+        *,
+        sha: str,
+        size: int,
+        mime: str,
+        uploaded: tuple[str, str],
+    ) -> tuple[Blob, bool]:
+        """Register a freshly uploaded object, or join a blob another request created first."""
+        blob_id, s3_key = uploaded
+        try:
+            async with session.begin_nested():
+                blob = await blob_repo.create_blob(
+                    session, id=blob_id, sha256=sha, size=size, s3_key=s3_key, mime=mime
+                )
+            return blob, True
+        except IntegrityError:
+            pass
+
+        # Lost the race on the unique digest: use the winner, drop our copy
+        winner = (await blob_repo.get_blobs_by_sha(session, [sha])).get(sha)
+        if winner is None or not await blob_repo.add_blob_ref(session, winner.id):
+            raise RuntimeError(f"Blob {sha} changed concurrently, retry the upload")
+        try:
+            await s3_service.delete_file(s3_key)
+        except Exception as e:
+            logger.warning(f"Failed to delete duplicate blob object {s3_key}: {e}")
+        return winner, False
+
+
+blob_service = BlobService()
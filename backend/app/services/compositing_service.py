@@ -0,0 +1,977 @@
+"""Service for combining a project's photos into a single composite image.
+
+Runs as a background job (see job_queue). Pipeline:
+1. Stream the selected originals from S3 to a scratch directory
+2. Plan the layout from image headers only (no pixel decoding)
+3. Decode inputs one at a time at (roughly) their target size, paste them
+   into a NumPy canvas and encode the result
+4. Upload the composite to S3 and register it as a new Photo
+
+Only one decoded input is held in memory at a time, and JPEGs are decoded
+at a reduced DCT scale, so memory is bounded by the output canvas rather
+than by the number or resolution of the inputs.
+
+PNG output goes further and never materializes the canvas: it is rendered
+in horizontal strips of about ``stitch_strip_pixels`` pixels that are
+encoded as they are produced (see compose_strips), so even mosaics of
+several hundred megapixels run in memory set by the strip size.
+
+The ``panorama`` layout aligns overlapping photos by their content instead
+of placing them on a grid; see the panorama module.
+
+While the originals download, a low-resolution preview is composed from
+the inputs' cached renditions and published on the job (see
+_render_preview); it becomes the composite's preview rendition, so the
+full-resolution output is only ever rendered once.
+
+Finished stitches are cached by request fingerprint (see
+stitch_fingerprint): repeating a request returns the stored composite, and
+the cache entry goes away when any input photo, or the composite, is
+deleted.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+import shutil
+import tempfile
+import uuid
+from datetime import datetime, timezone
+from typing import NamedTuple
+
+import numpy as np
+from PIL import ExifTags, Image, ImageOps
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..database import async_session_maker
+from ..models.job import Job
+from ..models.photo import Photo, PHOTO_SOURCE_STITCH, PHOTO_SOURCE_UPLOAD
+from ..repositories import derivatives_repository as derivative_repo
+from ..repositories import matches_repository as match_repo
+from ..repositories import photos_repository as photo_repo
+from ..repositories import deletions_repository as deletion_repo
+from ..repositories import stitch_results_repository as stitch_result_repo
+from ..utils.png_writer import StreamingPngWriter
+# panorama imports this module too: a pool worker may load it first, so
+# annotations using its types are quoted
+from . import panorama
+from .derivative_service import DERIVATIVE_FORMATS, derivative_service
+from .job_queue import job_queue, ProgressCallback
+from .metadata_service import metadata_service
+from .s3_service import s3_service
+
+logger = logging.getLogger(__name__)
+
+LAYOUTS = ("grid", "horizontal", "vertical")
+
+OUTPUT_FORMATS = {
+    # format name: (Pillow format, file extension, MIME type)
+    "jpeg": ("JPEG", ".jpg", "image/jpeg"),
+    "png": ("PNG", ".png", "image/png"),
+    "webp": ("WEBP", ".webp", "image/webp"),
+}
+
+# EXIF orientations that rotate the image by 90/270 degrees
+_TRANSPOSED_ORIENTATIONS = (5, 6, 7, 8)
+
+
+class StitchError(Exception):
+    """Raised when a stitch request cannot be fulfilled with the given input."""
+
+
+class Placement(NamedTuple):
+    x: int
+    y: int
+    width: int
+    height: int
+
+
+def parse_color(value: str) -> tuple[int, int, int]:
+    """Parse a ``#rrggbb`` color into an RGB tuple."""
+    value = value.lstrip("#")
+    return int(value[0:2], 16), int(value[2:4], 16), int(value[4:6], 16)
+
+
+def read_oriented_size(path: str) -> tuple[int, int]:
+    """Read (width, height) as displayed, honouring EXIF orientation, from the header only."""
+    with Image.open(path) as img:
+        width, height = img.size
+        orientation = img.getexif().get(ExifTags.Base.Orientation, 1)
+    if orientation in _TRANSPOSED_ORIENTATIONS:
+        return height, width
+    return width, height
+
+
+def _fit(width: int, height: int, box_w: int, box_h: int) -> tuple[int, int]:
+    scale = min(box_w / width, box_h / height)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def plan_layout(
+    sizes: list[tuple[int, int]],
+    layout: str,
+    *,
+    cell_size: int,
+    spacing: int = 0,
+    columns: int | None = None,
+) -> tuple[tuple[int, int], list[Placement]]:
+    """
+    Compute the output canvas size and where each input goes.
+
+    - grid: images are fitted (aspect preserved) and centred in square cells
+    - horizontal: images are scaled to a common height and placed in a row
+    - vertical: images are scaled to a common width and stacked
+
+    Returns:
+        ((canvas_width, canvas_height), placements in input order)
+    """
+    if layout not in LAYOUTS:
+        raise StitchError(f"Unknown layout: {layout}")
+    if not sizes:
+        raise StitchError("No images to combine")
+
+    placements: list[Placement] = []
+
+    if layout == "grid":
+        cols = min(columns or math.ceil(math.sqrt(len(sizes))), len(sizes))
+        rows = math.ceil(len(sizes) / cols)
+        for i, (w, h) in enumerate(sizes):
+            row, col = divmod(i, cols)
+            fw, fh = _fit(w, h, cell_size, cell_size)
+            x = spacing + col * (cell_size + spacing) + (cell_size - fw) // 2
+            y = spacing + row * (cell_size + spacing) + (cell_size - fh) // 2
+            placements.append(Placement(x, y, fw, fh))
+        canvas = (
+            cols * cell_size + (cols + 1) * spacing,
+            rows * cell_size + (rows + 1) * spacing,
+        )
+        return canvas, placements
+
+    if layout == "horizontal":
+        x = spacing
+        for w, h in sizes:
+            fw = max(1, round(w * cell_size / h))
+            placements.append(Placement(x, spacing, fw, cell_size))
+            x += fw + spacing
+        return (x, cell_size + 2 * spacing), placements
+
+    y = spacing
+    for w, h in sizes:
+        fh = max(1, round(h * cell_size / w))
+        placements.append(Placement(spacing, y, cell_size, fh))
+        y += fh + spacing
+    return (cell_size + 2 * spacing, y), placements
+
+
+def _to_rgb_array(img: Image.Image, background: tuple[int, int, int]) -> np.ndarray:
+    """Convert to an RGB uint8 array, alpha-blending transparent pixels onto the background."""
+    has_alpha = img.mode in ("RGBA", "LA", "PA") or (
+        img.mode == "P" and "transparency" in img.info
+    )
+    if not has_alpha:
+        return np.asarray(img.convert("RGB"))
+
+    rgba = np.asarray(img.convert("RGBA"), dtype=np.float32)
+    alpha = rgba[..., 3:4] / 255.0
+    rgb = rgba[..., :3] * alpha + np.asarray(background, dtype=np.float32) * (1.0 - alpha)
+    return np.rint(rgb).astype(np.uint8)
+
+
+def load_fitted(
+    path: str,
+    size: tuple[int, int],
+    background: tuple[int, int, int] = (255, 255, 255),
+) -> np.ndarray:
+    """
+    Decode an image straight to ``size`` (width, height) as an RGB array.
+
+    JPEGs are decoded at the smallest DCT scale that is still >= the target
+    size, so a 40 MP original destined for a 1024 px cell never exists in
+    memory at full resolution.
+    """
+    with Image.open(path) as img:
+        orientation = img.getexif().get(ExifTags.Base.Orientation, 1)
+        raw_size = (size[1], size[0]) if orientation in _TRANSPOSED_ORIENTATIONS else size
+        img.draft("RGB", raw_size)
+        img = ImageOps.exif_transpose(img)
+        img = img.resize(size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+        return _to_rgb_array(img, background)
+
+
+def compose_strips(
+    paths: list[str],
+    placements: list[Placement],
+    size: tuple[int, int],
+    out_path: str,
+    *,
+    background: tuple[int, int, int] = (255, 255, 255),
+    strip_pixels: int = settings.stitch_strip_pixels,
+    compress_level: int = settings.stitch_png_compress_level,
+) -> None:
+    """
+    Render a planned layout to a PNG strip by strip.
+
+    Each input is decoded (at reduced scale, see load_fitted) when the first
+    strip that overlaps it is rendered. Inputs that extend past that strip
+    are parked as raw pixels in a scratch file next to ``out_path``, read
+    back one row range per strip, and deleted once the strips have moved
+    past them. Peak memory is one strip plus one decoded input.
+    """
+    width, height = size
+    rows_per_strip = max(1, strip_pixels // width)
+    scratch_dir = os.path.dirname(out_path) or "."
+
+    pending = sorted(range(len(placements)), key=lambda i: placements[i].y)
+    # input index -> fitted pixels (for inputs within one strip) or scratch file
+    active: dict[int, np.ndarray | str] = {}
+    strip = np.empty((min(rows_per_strip, height), width, 3), dtype=np.uint8)
+
+    try:
+        with open(out_path, "wb") as f:
+            writer = StreamingPngWriter(f, width, height, compress_level=compress_level)
+            for y0 in range(0, height, rows_per_strip):
+                y1 = min(y0 + rows_per_strip, height)
+                view = strip[:y1 - y0]
+                view[...] = background
+
+                while pending and placements[pending[0]].y < y1:
+                    i = pending.pop(0)
+                    p = placements[i]
+                    pixels = load_fitted(paths[i], (p.width, p.height), background)
+                    if p.y + p.height > y1:
+                        # Needed by later strips: keep it on disk, not in RAM
+                        scratch = os.path.join(scratch_dir, f"strip-input-{i:05d}.raw")
+                        pixels.tofile(scratch)
+                        active[i] = scratch
+                    else:
+                        active[i] = pixels
+                    del pixels
+
+                for i in list(active):
+                    p = placements[i]
+                    top, bottom = max(p.y, y0), min(p.y + p.height, y1)
+                    if top < bottom:
+                        view[top - y0:bottom - y0, p.x:p.x + p.width] = _read_rows(
+                            active[i], p.width, top - p.y, bottom - p.y
+                        )
+                    if p.y + p.height <= y1:
+                        source = active.pop(i)
+                        if isinstance(source, str):
+                            os.remove(source)
+
+                writer.write(view)
+            writer.close()
+    finally:
+        for source in active.values():
+            if isinstance(source, str) and os.path.exists(source):
+                os.remove(source)
+
+
+def _read_rows(source: np.ndarray | str, width: int, start: int, stop: int) -> np.ndarray:
+    """Rows [start, stop) of a fitted input, from memory or its raw scratch file."""
+    if not isinstance(source, str):
+        return source[start:stop]
+    row_bytes = width * 3
+    return np.fromfile(
+        source, dtype=np.uint8, count=(stop - start) * row_bytes, offset=start * row_bytes
+    ).reshape(stop - start, width, 3)
+
+
+def compose(
+    paths: list[str],
+    out_path: str,
+    *,
+    layout: str,
+    cell_size: int,
+    spacing: int = 0,
+    columns: int | None = None,
+    background: str = "#ffffff",
+    output_format: str = "jpeg",
+    quality: int = 90,
+    max_output_pixels: int = settings.stitch_max_output_pixels,
+    max_tiled_output_pixels: int = settings.stitch_max_tiled_output_pixels,
+) -> dict:
+    """
+    Combine local image files into one composite written to ``out_path``.
+
+    PNG is rendered strip by strip (compose_strips) and may be as large as
+    ``max_tiled_output_pixels``; JPEG and WebP need the whole canvas in
+    memory and are limited to ``max_output_pixels``.
+
+    CPU-bound and free of I/O other than local files, so it can run in a
+    worker thread or process.
+
+    Returns:
+        dict with the output ``width`` and ``height``
+    """
+    bg = parse_color(background)
+    try:
+        sizes = [read_oriented_size(path) for path in paths]
+    except OSError as e:
+        raise StitchError(f"Could not read image: {e}")
+    (width, height), placements = plan_layout(
+        sizes, layout, cell_size=cell_size, spacing=spacing, columns=columns
+    )
+
+    pil_format = OUTPUT_FORMATS[output_format][0]
+    if pil_format == "PNG":
+        if width * height > max_tiled_output_pixels:
+            raise StitchError(
+                f"Output of {width}x{height} exceeds the {max_tiled_output_pixels} pixel "
+                f"limit; use a smaller cell_size"
+            )
+        compose_strips(paths, placements, (width, height), out_path, background=bg)
+        return {"width": width, "height": height}
+
+    if width * height > max_output_pixels:
+        raise StitchError(
+            f"Output of {width}x{height} exceeds the {max_output_pixels} pixel limit "
+            f"for {output_format}; use output_format=png or a smaller cell_size"
+        )
+
+    canvas = np.empty((height, width, 3), dtype=np.uint8)
+    canvas[...] = bg
+    for path, p in zip(paths, placements):
+        canvas[p.y:p.y + p.height, p.x:p.x + p.width] = load_fitted(
+            path, (p.width, p.height), bg
+        )
+
+    save_kwargs = {"quality": quality} if pil_format in ("JPEG", "WEBP") else {}
+    Image.fromarray(canvas).save(out_path, format=pil_format, **save_kwargs)
+    return {"width": width, "height": height}
+
+
+def compose_preview(
+    paths: list[str],
+    out_path: str,
+    *,
+    layout: str,
+    max_size: int,
+    cell_size: int = 1024,
+    spacing: int = 0,
+    columns: int | None = None,
+    background: str = "#ffffff",
+    output_format: str = "jpeg",
+    quality: int = 90,
+    features: list["panorama.Features"] | None = None,
+    matches: list["panorama.PairMatch"] | None = None,
+) -> dict:
+    """
+    Render the composite at a longest edge of about ``max_size`` (pool task).
+
+    ``paths`` are downscaled renditions of the inputs: the layout is planned
+    from their aspect ratios exactly as for the originals, then rendered
+    with cell size and spacing scaled down to fit. Panoramas are warped with
+    the same alignment (``features``/``matches``) as the full render.
+
+    Returns:
+        dict with the preview ``width`` and ``height``
+    """
+    if layout == "panorama":
+        info = panorama.compose_panorama(
+            paths,
+            out_path,
+            features,
+            matches,
+            background=background,
+            output_format=output_format,
+            quality=quality,
+            max_output_pixels=max_size * max_size,
+        )
+    else:
+        try:
+            sizes = [read_oriented_size(path) for path in paths]
+        except OSError as e:
+            raise StitchError(f"Could not read image: {e}")
+        (width, height), _ = plan_layout(
+            sizes, layout, cell_size=cell_size, spacing=spacing, columns=columns
+        )
+        scale = min(1.0, max_size / max(width, height))
+        info = compose(
+            paths,
+            out_path,
+            layout=layout,
+            cell_size=max(1, int(cell_size * scale)),
+            spacing=int(spacing * scale),
+            columns=columns,
+            background=background,
+            output_format=output_format,
+            quality=quality,
+        )
+    if max(info["width"], info["height"]) <= max_size:
+        return {"width": info["width"], "height": info["height"]}
+
+    # Panorama bounds are capped by area, and per-image rounding can push
+    # strip layouts a few pixels over
+    pil_format = OUTPUT_FORMATS[output_format][0]
+    with Image.open(out_path) as img:
+        img.load()
+    img.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+    img.save(out_path, format=pil_format, quality=quality)
+    return {"width": img.width, "height": img.height}
+
+
+def panorama_features_kind() -> str:
+    """Derivative kind of cached panorama features; changes with their parameters."""
+    return (
+        f"pano{panorama.FEATURES_VERSION}-{settings.stitch_panorama_proxy_size}"
+        f"-{settings.stitch_panorama_max_features}"
+    )
+
+
+def stitch_fingerprint(project_id: str, params: dict) -> str:
+    """
+    Identify a stitch request, for result caching and job coalescing.
+
+    Covers the project, the ordered input photo ids (photos are immutable,
+    so their ids stand for their content) and every output parameter, plus
+    the feature kind for panoramas so changing the matcher settings renders
+    anew.
+
+    Args:
+        project_id: The project being stitched
+        params: Job params with ``photo_ids`` resolved (see select_photos)
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    key = {"project_id": project_id, "params": params}
+    if params.get("layout") == "panorama":
+        key["features"] = panorama_features_kind()
+    data = json.dumps(key, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+class CompositingService:
+    """Combines project photos into a composite stored back in S3."""
+
+    async def cached_result(
+        self,
+        session: AsyncSession,
+        project_id: str,
+        fingerprint: str,
+    ) -> dict | None:
+        """The job result of an identical earlier stitch, or None."""
+        cached = await stitch_result_repo.get_result(session, project_id, fingerprint)
+        if cached is None:
+            return None
+        return {**cached.result, "cached": True}
+
+    async def run_stitch_job(
+        self,
+        session: AsyncSession,
+        job: Job,
+        progress: ProgressCallback,
+    ) -> dict:
+        """
+        Job handler: combine photos of a project and save the result as a new Photo.
+
+        Downloads and uploads run on the event loop; decoding, feature
+        matching and encoding run in the job queue's process pool.
+
+        Args:
+            session: Database session
+            job: The running stitch job (params: see schemas.stitch.StitchRequest)
+            progress: Callback reporting completion in [0, 1]
+
+        A preview is published on the job before the full render starts
+        (unless ``stitch_preview`` is off); see _render_preview.
+
+        Returns:
+            dict with the new ``photo_id`` and the output ``width``/``height``;
+            panoramas also list the ``skipped_photo_ids`` that did not overlap.
+            ``cached`` is set when an identical stitch had already finished
+            and its composite is returned instead
+
+        Raises:
+            StitchError: If the input selection or parameters are invalid
+        """
+        params = job.params
+        photos = await self.select_photos(
+            session, user_id=job.user_id, project_id=job.project_id,
+            photo_ids=params.get("photo_ids"),
+        )
+        fingerprint = job.fingerprint or stitch_fingerprint(job.project_id, params)
+        cached = await self.cached_result(session, job.project_id, fingerprint)
+        # End the read transaction: downloads and rendering can take minutes
+        await session.commit()
+        if cached is not None:
+            return cached
+
+        fid = str(uuid.uuid4())
+        job_id, project_id = job.id, job.project_id
+        layout = params.get("layout", "grid")
+        preview_task: asyncio.Task | None = None
+        preview = None
+        s3_key: str | None = None
+        work_dir = tempfile.mkdtemp(prefix="stitch-", dir=settings.stitch_work_dir)
+        try:
+            if settings.stitch_preview and layout != "panorama":
+                # Composed from renditions while the originals download
+                preview_task = asyncio.create_task(
+                    self._render_preview(job, fid, photos, work_dir, params)
+                )
+            paths = await self._download_inputs(photos, work_dir, progress)
+
+            output_format = params.get("output_format", "jpeg")
+            _, ext, mime = OUTPUT_FORMATS[output_format]
+            out_path = os.path.join(work_dir, f"output{ext}")
+
+            if layout == "panorama":
+                features, matches = await self._match_panorama(
+                    session, photos, paths, out_path, progress
+                )
+                if settings.stitch_preview:
+                    preview = await self._render_preview(
+                        job, fid, photos, work_dir, params, features, matches
+                    )
+                info = await job_queue.run_in_pool(
+                    panorama.compose_panorama,
+                    paths,
+                    out_path,
+                    features,
+                    matches,
+                    background=params.get("background", "#ffffff"),
+                    output_format=output_format,
+                    quality=params.get("quality", 90),
+                )
+            else:
+                if preview_task is not None:
+                    preview = await preview_task
+                info = await job_queue.run_in_pool(
+                    compose,
+                    paths,
+                    out_path,
+                    layout=layout,
+                    cell_size=params.get("cell_size", 1024),
+                    spacing=params.get("spacing", 0),
+                    columns=params.get("columns"),
+                    background=params.get("background", "#ffffff"),
+                    output_format=output_format,
+                    quality=params.get("quality", 90),
+                )
+            await progress(0.9)
+
+            s3_key = f"photos/{fid}{ext}"
+            size = await s3_service.upload_path(out_path, s3_key, mime)
+            metadata = await metadata_service.read_path(out_path, mime)
+        except BaseException:
+            # Also when cancelled (shutdown re-queues the job): the rerun
+            # renders and uploads everything again under a new id
+            if preview_task is not None:
+                preview_task.cancel()
+                preview = (await asyncio.gather(preview_task, return_exceptions=True))[0]
+            keys = [s3_key] if s3_key is not None else []
+            if isinstance(preview, dict):
+                keys.append(preview["s3_key"])
+            if keys:
+                await self._discard_outputs(job_id, keys)
+            raise
+        finally:
+            if preview_task is not None and not preview_task.done():
+                preview_task.cancel()
+            await asyncio.to_thread(shutil.rmtree, work_dir, True)
+
+        # Rows are recorded only once both objects are in S3; if that fails
+        # (e.g. the project was deleted meanwhile) nothing would point at them
+        try:
+            stamp = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
+            await photo_repo.create_photo_meta(
+                session,
+                id=fid,
+                s3_key=s3_key,
+                original_name=f"stitched-{params.get('layout', 'grid')}-{stamp}{ext}",
+                mime=mime,
+                size=size,
+                user_id=job.user_id,
+                project_id=job.project_id,
+                source=PHOTO_SOURCE_STITCH,
+                **metadata,
+            )
+            if preview is not None:
+                # Adopted as the composite's preview rendition, which is never
+                # rendered from the full-resolution output then
+                await derivative_repo.create_derivative(
+                    session,
+                    photo_id=fid,
+                    kind="preview",
+                    s3_key=preview["s3_key"],
+                    mime=preview["mime"],
+                    width=preview["width"],
+                    height=preview["height"],
+                    size=preview["size"],
+                )
+            result = {"photo_id": fid, "width": info["width"], "height": info["height"]}
+            if "aligned" in info:
+                aligned = set(info["aligned"])
+                result["skipped_photo_ids"] = [
+                    p.id for i, p in enumerate(photos) if i not in aligned
+                ]
+            try:
+                async with session.begin_nested():
+                    await stitch_result_repo.create_result(
+                        session,
+                        project_id=job.project_id,
+                        fingerprint=fingerprint,
+                        photo_id=fid,
+                        s3_key=s3_key,
+                        result=result,
+                        input_photo_ids=[p.id for p in photos],
+                    )
+            except IntegrityError:
+                # An input was deleted meanwhile, or an identical stitch was
+                # recorded first; the composite is still saved, just not cached
+                pass
+            await session.commit()
+        except BaseException:
+            await session.rollback()
+            keys = [s3_key] + ([preview["s3_key"]] if preview is not None else [])
+            await self._discard_outputs(job_id, keys)
+            raise
+        logger.info(
+            f"Project {project_id}: stitched {len(photos)} photos into "
+            f"{info['width']}x{info['height']} {s3_key}"
+        )
+        return result
+
+    async def select_photos(
+        self,
+        session: AsyncSession,
+        *,
+        user_id: str,
+        project_id: str,
+        photo_ids: list[str] | None,
+    ) -> list[Photo]:
+        """
+        Resolve the photos to combine, in order.
+
+        Without ``photo_ids`` these are the project's uploads, not the
+        outputs of earlier stitches.
+
+        Raises:
+            StitchError: If any requested photo is missing or fewer than 2 images remain
+        """
+        if photo_ids:
+            found = await photo_repo.get_photos_by_ids(
+                session, user_id=user_id, project_id=project_id, photo_ids=photo_ids
+            )
+            by_id = {p.id: p for p in found}
+            missing = [pid for pid in photo_ids if pid not in by_id]
+            if missing:
+                raise StitchError(f"Photos not found in project: {', '.join(missing)}")
+            photos = [by_id[pid] for pid in photo_ids]
+        else:
+            # Earlier composites would change the selection (and the cache
+            # key) on every run; they are only combined when listed explicitly
+            photos = await photo_repo.list_all_photos(
+                session, user_id=user_id, project_id=project_id, source=PHOTO_SOURCE_UPLOAD
+            )
+
+        photos = [p for p in photos if p.mime.startswith("image/")]
+        if len(photos) < 2:
+            raise StitchError("At least 2 images are required to stitch")
+        return photos
+
+    async def _match_panorama(
+        self,
+        session: AsyncSession,
+        photos: list[Photo],
+        paths: list[str],
+        out_path: str,
+        progress: ProgressCallback,
+    ) -> tuple[list["panorama.Features"], list["panorama.PairMatch"]]:
+        """
+        Feature-match the downloaded photos for compose_panorama.
+
+        Feature extraction (one task per photo) and pairwise matching (one
+        task per pair) fan out over the process pool; only the small proxy
+        features travel between processes, never decoded images.
+
+        Both steps are cached: features as a per-photo derivative and match
+        results in ``photo_matches``, so adding k photos to a project of n
+        and stitching again extracts k photos and matches ~k*n pairs.
+
+        Returns:
+            (features, matches), in input order
+
+        Raises:
+            StitchError: If too many photos are selected
+        """
+        if len(paths) > settings.stitch_panorama_max_images:
+            raise StitchError(
+                f"A panorama can combine at most {settings.stitch_panorama_max_images} photos"
+            )
+
+        features = await self._load_features(session, photos, paths, out_path, progress)
+        matches = await self._load_matches(session, photos, features, progress)
+        return features, matches
+
+    async def _load_features(
+        self,
+        session: AsyncSession,
+        photos: list[Photo],
+        paths: list[str],
+        out_path: str,
+        progress: ProgressCallback,
+    ) -> list["panorama.Features"]:
+        """Fetch cached feature artifacts; extract (and cache) the missing ones."""
+        kind = panorama_features_kind()
+        cached = await derivative_repo.get_derivatives(
+            session, [p.id for p in photos], kind
+        )
+        await session.commit()
+        work_dir = os.path.dirname(out_path)
+        # photo id -> (S3 key, object size, features) of newly extracted artifacts
+        created: dict[str, tuple[str, int, panorama.Features]] = {}
+        done = 0
+
+        async def load(i: int, photo: Photo) -> panorama.Features:
+            nonlocal done
+            artifact_path = os.path.join(work_dir, f"features-{i:05d}.npz")
+            if photo.id in cached:
+                await s3_service.download_to_path(cached[photo.id].s3_key, artifact_path)
+                features = await asyncio.to_thread(panorama.load_features, artifact_path)
+            else:
+                features = await job_queue.run_in_pool(
+                    panorama.extract_features,
+                    paths[i],
+                    artifact_path,
+                    settings.stitch_panorama_proxy_size,
+                    settings.stitch_panorama_max_features,
+                )
+                if photo.id not in created:
+                    s3_key = f"derived/{photo.id}/{kind}.npz"
+                    size = await s3_service.upload_path(
+                        artifact_path, s3_key, "application/octet-stream"
+                    )
+                    created[photo.id] = (s3_key, size, features)
+            done += 1
+            # Features account for 40-55% of the job
+            await progress(0.4 + 0.15 * done / len(photos))
+            return features
+
+        features = await asyncio.gather(*(load(i, p) for i, p in enumerate(photos)))
+
+        for photo_id, (s3_key, size, f) in created.items():
+            try:
+                async with session.begin_nested():
+                    await derivative_repo.create_derivative(
+                        session,
+                        photo_id=photo_id,
+                        kind=kind,
+                        s3_key=s3_key,
+                        mime="application/octet-stream",
+                        width=round(f.size[0] / f.scale),
+                        height=round(f.size[1] / f.scale),
+                        size=size,
+                    )
+            except IntegrityError:
+                # Another job cached the same photo first; the object is identical
+                pass
+        await session.commit()
+        logger.info(
+            f"Panorama features: {len(photos) - len(created)} cached, {len(created)} extracted"
+        )
+        return list(features)
+
+    async def _load_matches(
+        self,
+        session: AsyncSession,
+        photos: list[Photo],
+        features: list["panorama.Features"],
+        progress: ProgressCallback,
+    ) -> list["panorama.PairMatch"]:
+        """Fetch cached pairwise matches; match (and cache) the missing pairs."""
+        kind = panorama_features_kind()
+        ids = [p.id for p in photos]
+        cached = await match_repo.get_matches(session, ids, kind)
+        await session.commit()
+
+        # Rows are stored once per unordered pair with the smaller id first
+        matches: list[panorama.PairMatch] = []
+        missing: list[tuple[int, int]] = []
+        for i in range(len(photos)):
+            for j in range(i + 1, len(photos)):
+                a, b = ids[i], ids[j]
+                row = cached.get((min(a, b), max(a, b)))
+                if row is None:
+                    missing.append((i, j))
+                    continue
+                h = None if row.homography is None else np.array(row.homography).reshape(3, 3)
+                if h is not None and a > b:
+                    h = np.linalg.inv(h)
+                matches.append(panorama.PairMatch(i, j, h, row.inliers))
+
+        done = 0
+
+        async def match(i: int, j: int) -> panorama.PairMatch:
+            nonlocal done
+            result = await job_queue.run_in_pool(
+                panorama.match_pair, i, j, features[i], features[j]
+            )
+            done += 1
+            # Matching accounts for 55-70% of the job
+            await progress(0.55 + 0.15 * done / len(missing))
+            return result
+
+        computed = await asyncio.gather(*(match(i, j) for i, j in missing))
+        matches += computed
+
+        rows: dict[tuple[str, str], dict] = {}
+        for m in computed:
+            a, b = ids[m.i], ids[m.j]
+            if a == b:
+                continue
+            h = m.homography
+            if h is not None and a > b:
+                h = np.linalg.inv(h)
+            rows[(min(a, b), max(a, b))] = {
+                "photo_id": min(a, b),
+                "other_photo_id": max(a, b),
+                "inliers": m.inliers,
+                "homography": None if h is None else [float(v) for v in h.ravel()],
+            }
+        try:
+            async with session.begin_nested():
+                await match_repo.save_matches(session, kind, list(rows.values()))
+        except IntegrityError:
+            # A photo was deleted meanwhile (pairs stored concurrently by
+            # another job are skipped by save_matches itself)
+            pass
+        await session.commit()
+        logger.info(
+            f"Panorama matches: {len(matches) - len(computed)} cached, {len(computed)} matched"
+        )
+        return matches
+
+    async def _render_preview(
+        self,
+        job: Job,
+        photo_id: str,
+        photos: list[Photo],
+        work_dir: str,
+        params: dict,
+        features: list["panorama.Features"] | None = None,
+        matches: list["panorama.PairMatch"] | None = None,
+    ) -> dict | None:
+        """
+        Render a low-resolution preview of the composite and publish it on the job.
+
+        The preview is composed from the inputs' thumb or preview renditions
+        (normally cached since upload) in the derivative format and size, and
+        stored where the composite's ``preview`` rendition goes. Failures are
+        logged and never fail the job.
+
+        Returns:
+            The preview set on the job (s3_key, mime, width, height, size), or None
+        """
+        output_format = settings.derivative_format
+        _, ext, mime = DERIVATIVE_FORMATS[output_format]
+        max_size = settings.derivative_preview_size
+        # Each input covers about 1/n of the preview's area
+        if settings.derivative_thumb_size * math.sqrt(len(photos)) >= max_size:
+            kind = "thumb"
+        else:
+            kind = "preview"
+        preview_dir = os.path.join(work_dir, "preview")
+        out_path = os.path.join(preview_dir, f"preview{ext}")
+        s3_key = f"derived/{photo_id}/preview{ext}"
+        try:
+            os.makedirs(preview_dir, exist_ok=True)
+            paths = await self._download_renditions(photos, kind, preview_dir)
+            info = await job_queue.run_in_pool(
+                compose_preview,
+                paths,
+                out_path,
+                layout=params.get("layout", "grid"),
+                max_size=max_size,
+                cell_size=params.get("cell_size", 1024),
+                spacing=params.get("spacing", 0),
+                columns=params.get("columns"),
+                background=params.get("background", "#ffffff"),
+                output_format=output_format,
+                quality=settings.derivative_quality,
+                features=features,
+                matches=matches,
+            )
+            size = await s3_service.upload_path(out_path, s3_key, mime)
+            preview = {
+                "s3_key": s3_key,
+                "mime": mime,
+                "width": info["width"],
+                "height": info["height"],
+                "size": size,
+            }
+            await job_queue.set_preview(job.id, preview)
+        except Exception as e:
+            logger.warning(f"Job {job.id}: could not render a preview: {e}")
+            return None
+        logger.info(f"Job {job.id}: preview {info['width']}x{info['height']} {s3_key}")
+        return preview
+
+    async def _download_renditions(
+        self,
+        photos: list[Photo],
+        kind: str,
+        work_dir: str,
+    ) -> list[str]:
+        """Fetch the ``kind`` rendition of each photo (built if missing); returns paths in input order."""
+        async with async_session_maker() as session:
+            derivatives = await derivative_repo.get_derivatives(
+                session, [p.id for p in photos], kind
+            )
+            for photo in photos:
+                if photo.id not in derivatives:
+                    derivatives[photo.id] = await derivative_service.get_or_create(
+                        session, photo, kind
+                    )
+
+        semaphore = asyncio.Semaphore(settings.stitch_download_concurrency)
+        paths = [os.path.join(work_dir, f"{kind}-{i:05d}") for i in range(len(photos))]
+
+        async def fetch(photo: Photo, path: str) -> None:
+            async with semaphore:
+                await s3_service.download_to_path(derivatives[photo.id].s3_key, path)
+
+        await asyncio.gather(*(fetch(p, path) for p, path in zip(photos, paths)))
+        return paths
+
+    async def _discard_outputs(self, job_id: str, s3_keys: list[str]) -> None:
+        """Withdraw the preview of a failed job and queue the objects it uploaded for deletion."""
+        try:
+            await job_queue.set_preview(job_id, None)
+            async with async_session_maker() as session:
+                await deletion_repo.enqueue_deletions(session, s3_keys)
+                await session.commit()
+        except Exception as e:
+            logger.warning(f"Job {job_id}: could not discard {', '.join(s3_keys)}: {e}")
+
+    async def _download_inputs(
+        self,
+        photos: list[Photo],
+        work_dir: str,
+        progress: ProgressCallback,
+    ) -> list[str]:
+        """Stream originals to disk with bounded concurrency; returns paths in input order."""
+        semaphore = asyncio.Semaphore(settings.stitch_download_concurrency)
+        paths = [os.path.join(work_dir, f"input-{i:05d}") for i in range(len(photos))]
+        done = 0
+
+        async def fetch(photo: Photo, path: str) -> None:
+            nonlocal done
+            async with semaphore:
+                await s3_service.download_to_path(photo.s3_key, path)
+            done += 1
+            # Downloads account for the first 40% of the job
+            await progress(0.4 * done / len(photos))
+
+        await asyncio.gather(*(fetch(p, path) for p, path in zip(photos, paths)))
+        return paths
+
+
+compositing_service = CompositingService()
@@ -1,13 +1,21 @@
 """Service for handling cascading deletes with S3 cleanup.
 
 Strategy:
-1. Collect all S3 keys BEFORE deletion
-2. Delete from database (with commit)
-3. Delete from S3 AFTER commit succeeds
+1. Collect all S3 keys (originals and derived renditions) BEFORE deletion
+2. Delete from database and release blob references; a shared blob's
+   object is only deleted once its last reference is gone. Cached
+   panorama matches of the photos go with them (their feature artifacts
+   are derivatives and are collected in step 1), and so do cached stitch
+   results the photos were an input (or the output) of
+3. Queue the orphaned keys in the ``s3_deletions`` outbox in the SAME
+   transaction, then commit
+4. The deletion sweeper removes the objects in the background
 
 This ensures:
 - No orphaned DB records (worst case scenario avoided)
-- S3 orphans are acceptable (can be cleaned up with periodic job)
+- No leaked S3 objects either: the keys to delete commit atomically with
+  the rows that referenced them, and failed deletes are retried
+- Delete requests return without waiting for S3
 """
 
 import logging
@@ -17,7 +25,13 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from ..models.user import User
 from ..models.project import Project
 from ..models.photo import Photo
-from .s3_service import s3_service
+from ..repositories import blobs_repository as blob_repo
+from ..repositories import deletions_repository as deletion_repo
+from ..repositories import derivatives_repository as derivative_repo
+from ..repositories import matches_repository as match_repo
+from ..repositories import projects_repository as project_repo
+from ..repositories import stitch_results_repository as stitch_result_repo
+from .deletion_sweeper import deletion_sweeper
 
 logger = logging.getLogger(__name__)
 
@@ -33,7 +47,7 @@ class DeletionService:
         commit: bool = True,
     ) -> str:
         """
-        Delete a single photo from DB and S3.
+        Delete a single photo and queue its S3 objects for deletion.
 
         Args:
             session: Database session
@@ -41,21 +55,28 @@ class DeletionService:
             commit: Whether to commit the transaction
 
         Returns:
-            The S3 key that was deleted
+            The S3 key of the photo
         """
         s3_key = photo.s3_key
+        s3_keys = await derivative_repo.list_derivative_keys_for_photo(
+            session, photo.id
+        )
+        await match_repo.delete_matches_for_photo(session, photo.id)
+        await stitch_result_repo.delete_results_for_photo(session, photo.id)
 
         await session.delete(photo)
-
-        if commit:
-            await session.commit()
-
-            try:
-                await s3_service.delete_file(s3_key)
-                logger.info(f"Deleted S3 object: {s3_key}")
-            except Exception as e:
-                logger.warning(f"Failed to delete S3 object {s3_key}: {e}")
-
+        await session.flush()
+        await project_repo.add_photo_stats(
+            session, photo.project_id, photos=-1, total_bytes=-photo.size
+        )
+        if photo.blob_id is None:
+            s3_keys.append(s3_key)
+        else:
+            released = await blob_repo.release_blob_ref(session, photo.blob_id)
+            if released is not None:
+                s3_keys.append(released)
+
+        await self._queue(session, s3_keys, commit=commit)
         return s3_key
 
     async def delete_project(
@@ -66,7 +87,7 @@ class DeletionService:
         commit: bool = True,
     ) -> list[str]:
         """
-        Delete a project and all its photos from DB and S3.
+        Delete a project and all its photos; their S3 objects are queued for deletion.
 
         Args:
             session: Database session
@@ -74,24 +95,26 @@ class DeletionService:
             commit: Whether to commit the transaction
 
         Returns:
-            List of S3 keys that were (attempted to be) deleted
+            List of S3 keys queued for deletion
         """
-        stmt = select(Photo.s3_key).where(Photo.project_id == project.id)
+        stmt = select(Photo.s3_key).where(
+            Photo.project_id == project.id, Photo.blob_id.is_(None)
+        )
         result = await session.execute(stmt)
         s3_keys = list(result.scalars().all())
+        s3_keys += await derivative_repo.list_derivative_keys_for_project(
+            session, project.id
+        )
+        blob_refs = await blob_repo.count_blob_refs_for_project(session, project.id)
+        await match_repo.delete_matches_for_project(session, project.id)
+        await stitch_result_repo.delete_results_for_project(session, project.id)
 
         await session.delete(project)
+        await session.flush()
+        s3_keys += await self._release_blobs(session, blob_refs)
 
-        if commit:
-            await session.commit()
-
-            if s3_keys:
-                result = await s3_service.delete_files(s3_keys)
-                logger.info(
-                    f"Project {project.id}: deleted {len(result['deleted'])} S3 objects, "
-                    f"{len(result['errors'])} errors"
-                )
-
+        await self._queue(session, s3_keys, commit=commit)
+        logger.info(f"Project {project.id}: queued {len(s3_keys)} S3 objects for deletion")
         return s3_keys
 
     async def delete_user(
@@ -102,7 +125,7 @@ class DeletionService:
         commit: bool = True,
     ) -> list[str]:
         """
-        Delete a user and all their projects/photos from DB and S3.
+        Delete a user and all their projects/photos; their S3 objects are queued for deletion.
 
         Args:
             session: Database session
@@ -110,24 +133,51 @@ class DeletionService:
             commit: Whether to commit the transaction
 
         Returns:
-            List of S3 keys that were (attempted to be) deleted
+            List of S3 keys queued for deletion
         """
-        stmt = select(Photo.s3_key).where(Photo.user_id == user.id)
+        stmt = select(Photo.s3_key).where(
+            Photo.user_id == user.id, Photo.blob_id.is_(None)
+        )
         result = await session.execute(stmt)
         s3_keys = list(result.scalars().all())
+        s3_keys += await derivative_repo.list_derivative_keys_for_user(session, user.id)
+        blob_refs = await blob_repo.count_blob_refs_for_user(session, user.id)
+        await match_repo.delete_matches_for_user(session, user.id)
+        await stitch_result_repo.delete_results_for_user(session, user.id)
 
         await session.delete(user)
+        await session.flush()
+        s3_keys += await self._release_blobs(session, blob_refs)
 
+        await self._queue(session, s3_keys, commit=commit)
+        logger.info(f"User {user.id}: queued {len(s3_keys)} S3 objects for deletion")
+        return s3_keys
+
+    async def _queue(
+        self,
+        session: AsyncSession,
+        s3_keys: list[str],
+        *,
+        commit: bool,
+    ) -> None:
+        """Write keys to the outbox; with ``commit``, commit and wake the sweeper."""
+        await deletion_repo.enqueue_deletions(session, s3_keys)
         if commit:
             await session.commit()
-
             if s3_keys:
-                result = await s3_service.delete_files(s3_keys)
-                logger.info(
-                    f"User {user.id}: deleted {len(result['deleted'])} S3 objects, "
-                    f"{len(result['errors'])} errors"
-                )
+                deletion_sweeper.notify()
 
+    async def _release_blobs(
+        self,
+        session: AsyncSession,
+        blob_refs: dict[str, int],
+    ) -> list[str]:
+        """Release references of deleted photos; returns keys of blobs nobody uses anymore."""
+        s3_keys = []
+        for blob_id, count in blob_refs.items():
+            released = await blob_repo.release_blob_ref(session, blob_id, count)
+            if released is not None:
+                s3_keys.append(released)
         return s3_keys
 
 
@@ -0,0 +1,152 @@
+"""Background sweeper that drains the S3 deletion outbox.
+
+Deletes never call S3 inline: DeletionService writes the orphaned keys to
+the ``s3_deletions`` table in the same transaction as the DB delete, and
+this sweeper removes the objects afterwards:
+1. Lease a batch of due rows (safe with several API processes)
+2. Delete them with concurrent ``DeleteObjects`` requests of up to 1000 keys
+3. Drop the rows of each batch as soon as it succeeds; reschedule the rest
+   with exponential backoff (S3 deletes are idempotent, so retrying is
+   always safe)
+
+A crashed sweeper's lease simply expires and the rows become due again.
+"""
+
+import asyncio
+import logging
+from datetime import timedelta
+
+from ..config import settings
+from ..database import async_session_maker
+from ..models.s3_deletion import S3Deletion
+from ..repositories import deletions_repository as deletion_repo
+from .s3_service import s3_service
+
+logger = logging.getLogger(__name__)
+
+
+class DeletionSweeper:
+    """Deletes S3 objects queued in the outbox, with retries."""
+
+    def __init__(self):
+        self._task: asyncio.Task | None = None
+        self._wakeup: asyncio.Event | None = None
+
+        # Statistics
+        self._deleted_total = 0
+        self._failed_total = 0
+        self._sweeps_total = 0
+
+    async def start(self) -> None:
+        """Start the sweeper loop. Called on application startup."""
+        if self._task is not None:
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._loop())
+        logger.info(
+            f"Deletion sweeper started (batch_size={settings.deletion_sweep_batch_size}, "
+            f"concurrency={settings.deletion_sweep_concurrency})"
+        )
+
+    async def stop(self) -> None:
+        """Stop the sweeper; leased rows are picked up again after their lease."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+            logger.info("Deletion sweeper stopped")
+
+    def notify(self) -> None:
+        """Wake the sweeper after committing new outbox rows."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def stats(self) -> dict:
+        return {
+            "running": self._task is not None,
+            "deleted_total": self._deleted_total,
+            "failed_total": self._failed_total,
+            "sweeps_total": self._sweeps_total,
+        }
+
+    async def sweep_once(self) -> int:
+        """
+        Lease one batch of due rows and try to delete their objects.
+
+        Returns:
+            Number of rows processed (0 when nothing is due)
+        """
+        async with async_session_maker() as session:
+            rows = await deletion_repo.claim_due_deletions(
+                session,
+                limit=settings.deletion_sweep_batch_size,
+                lease=timedelta(seconds=settings.deletion_lease_seconds),
+            )
+        if not rows:
+            return 0
+        self._sweeps_total += 1
+
+        rows_by_key: dict[str, list[S3Deletion]] = {}
+        for row in rows:
+            rows_by_key.setdefault(row.s3_key, []).append(row)
+
+        done = 0
+        failed: list[S3Deletion] = []
+        async with async_session_maker() as session:
+            # Completed batches are dropped from the outbox right away, so a
+            # crash mid-sweep only repeats the batches still in flight
+            async for batch in s3_service.iter_delete_batches(
+                list(rows_by_key), concurrency=settings.deletion_sweep_concurrency
+            ):
+                ids = [row.id for key in batch["deleted"] for row in rows_by_key[key]]
+                await deletion_repo.complete_deletions(session, ids)
+                done += len(ids)
+                failed += [row for key in batch["errors"] for row in rows_by_key[key]]
+
+            if failed:
+                await deletion_repo.reschedule_deletions(
+                    session,
+                    failed,
+                    error="S3 delete failed",
+                    backoff=timedelta(seconds=settings.deletion_retry_base_seconds),
+                    max_backoff=timedelta(seconds=settings.deletion_retry_max_seconds),
+                )
+
+        self._deleted_total += done
+        self._failed_total += len(failed)
+        if failed:
+            logger.warning(f"Deletion sweep: {done} deleted, {len(failed)} rescheduled")
+        else:
+            logger.info(f"Deletion sweep: {done} deleted")
+        return len(rows)
+
+    async def drain(self) -> int:
+        """Sweep until nothing is due (used by commands). Returns rows processed."""
+        total = 0
+        while processed := await self.sweep_once():
+            total += processed
+        return total
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                # Clear first so a notify() during the sweep is not lost
+                self._wakeup.clear()
+                processed = await self.sweep_once()
+                if processed >= settings.deletion_sweep_batch_size:
+                    # More may be due right away
+                    continue
+                try:
+                    await asyncio.wait_for(
+                        self._wakeup.wait(), timeout=settings.deletion_poll_interval_seconds
+                    )
+                except asyncio.TimeoutError:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Deletion sweeper error")
+                await asyncio.sleep(settings.deletion_poll_interval_seconds)
+
+
+deletion_sweeper = DeletionSweeper()
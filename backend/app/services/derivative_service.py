@@ -0,0 +1,183 @@
+"""Service for thumbnail/preview renditions of photos.
+
+Derivatives are stored under ``derived/{photo_id}/`` in S3 and tracked in
+the ``photo_derivatives`` table. They are generated in the background right
+after upload and lazily on first request if missing (older photos, failed
+background run), so galleries never have to download full-size originals.
+"""
+
+import asyncio
+import logging
+import os
+import shutil
+import tempfile
+
+from PIL import Image, ImageOps
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..database import async_session_maker
+from ..models.photo import Photo
+from ..models.photo_derivative import PhotoDerivative
+from ..repositories import deletions_repository as deletion_repo
+from ..repositories import derivatives_repository as derivative_repo
+from ..repositories import photos_repository as photo_repo
+from .deletion_sweeper import deletion_sweeper
+from .s3_service import s3_service
+
+logger = logging.getLogger(__name__)
+
+DERIVATIVE_FORMATS = {
+    # format name: (Pillow format, file extension, MIME type)
+    "webp": ("WEBP", ".webp", "image/webp"),
+    "jpeg": ("JPEG", ".jpg", "image/jpeg"),
+}
+
+
+def derivative_sizes() -> dict[str, int]:
+    """Longest edge in pixels for each derivative kind."""
+    return {
+        "thumb": settings.derivative_thumb_size,
+        "preview": settings.derivative_preview_size,
+    }
+
+
+def render_derivative(
+    src_path: str,
+    out_path: str,
+    *,
+    max_size: int,
+    output_format: str,
+    quality: int,
+) -> tuple[int, int]:
+    """
+    Downscale an image so its longest edge is at most ``max_size``.
+
+    JPEGs are decoded at a reduced DCT scale, so memory and CPU scale with
+    the derivative size rather than the original resolution.
+
+    Returns:
+        (width, height) of the rendition
+    """
+    pil_format = DERIVATIVE_FORMATS[output_format][0]
+    with Image.open(src_path) as img:
+        img.draft("RGB", (max_size, max_size))
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail((max_size, max_size), Image.Resampling.LANCZOS, reducing_gap=3.0)
+        keep_alpha = pil_format == "WEBP" and img.mode in ("RGBA", "LA", "PA", "P")
+        img = img.convert("RGBA" if keep_alpha else "RGB")
+        img.save(out_path, format=pil_format, quality=quality)
+        return img.size
+
+
+class DerivativeService:
+    """Creates and looks up photo renditions."""
+
+    def __init__(self):
+        # Coalesces concurrent requests for the same missing rendition
+        self._locks: dict[tuple[str, str], asyncio.Lock] = {}
+
+    @staticmethod
+    def supports(photo: Photo) -> bool:
+        return photo.mime.startswith("image/")
+
+    async def get_or_create(
+        self,
+        session: AsyncSession,
+        photo: Photo,
+        kind: str,
+    ) -> PhotoDerivative:
+        """
+        Return the ``kind`` rendition of a photo, generating it on first use.
+
+        Raises:
+            ValueError: If ``kind`` is unknown or the photo was deleted meanwhile
+            Exception: If the original cannot be fetched or decoded
+        """
+        if kind not in derivative_sizes():
+            raise ValueError(f"Unknown derivative kind: {kind}")
+
+        existing = await derivative_repo.get_derivative(session, photo.id, kind)
+        if existing is not None:
+            return existing
+
+        lock = self._locks.setdefault((photo.id, kind), asyncio.Lock())
+        try:
+            async with lock:
+                existing = await derivative_repo.get_derivative(session, photo.id, kind)
+                if existing is not None:
+                    return existing
+                return await self._create(session, photo, kind)
+        finally:
+            if not lock.locked():
+                self._locks.pop((photo.id, kind), None)
+
+    async def generate_all(self, photo_id: str) -> None:
+        """Background task: build every rendition for a freshly uploaded photo."""
+        async with async_session_maker() as session:
+            photo = await photo_repo.get_photo(session, photo_id)
+            if photo is None or not self.supports(photo):
+                return
+            for kind in derivative_sizes():
+                try:
+                    await self.get_or_create(session, photo, kind)
+                except Exception as e:
+                    logger.warning(f"Failed to build {kind} for photo {photo_id}: {e}")
+
+    async def _create(
+        self,
+        session: AsyncSession,
+        photo: Photo,
+        kind: str,
+    ) -> PhotoDerivative:
+        output_format = settings.derivative_format
+        _, ext, mime = DERIVATIVE_FORMATS[output_format]
+        s3_key = f"derived/{photo.id}/{kind}{ext}"
+
+        work_dir = tempfile.mkdtemp(prefix="derivative-", dir=settings.stitch_work_dir)
+        try:
+            src_path = os.path.join(work_dir, "original")
+            out_path = os.path.join(work_dir, f"{kind}{ext}")
+            await s3_service.download_to_path(photo.s3_key, src_path)
+            width, height = await asyncio.to_thread(
+                render_derivative,
+                src_path,
+                out_path,
+                max_size=derivative_sizes()[kind],
+                output_format=output_format,
+                quality=settings.derivative_quality,
+            )
+            size = await s3_service.upload_path(out_path, s3_key, mime)
+        finally:
+            await asyncio.to_thread(shutil.rmtree, work_dir, True)
+
+        try:
+            async with session.begin_nested():
+                derivative = await derivative_repo.create_derivative(
+                    session,
+                    photo_id=photo.id,
+                    kind=kind,
+                    s3_key=s3_key,
+                    mime=mime,
+                    width=width,
+                    height=height,
+                    size=size,
+                )
+            await session.commit()
+        except IntegrityError:
+            # Either another process created it first (the S3 object is
+            # identical) or the photo was deleted while we rendered it
+            derivative = await derivative_repo.get_derivative(session, photo.id, kind)
+            if derivative is None:
+                if not await photo_repo.photo_exists(session, photo.id):
+                    await deletion_repo.enqueue_deletions(session, [s3_key])
+                    await session.commit()
+                    deletion_sweeper.notify()
+                    raise ValueError(f"Photo {photo.id} was deleted")
+                raise
+        logger.info(f"Created {kind} derivative for photo {photo.id}: {s3_key}")
+        return derivative
+
+
+derivative_service = DerivativeService()
@@ -0,0 +1,249 @@
+"""Bounded local-disk cache of S3 objects.
+
+S3 objects in this app never change under a given key (new content always
+gets a new key), so a cached copy stays valid until the object is deleted.
+The cache:
+- stores each object as one file named after the SHA-256 of its key
+- writes to a temporary file and renames it into place, so readers never
+  see a partial object (also across processes sharing the directory)
+- evicts least recently used files once the total size exceeds the limit;
+  files handed out by ``acquire``/``fill`` are pinned until ``release``, so
+  a response still sending a file never has it deleted underneath
+- coalesces concurrent misses for the same key into one download
+
+The LRU index is per process and rebuilt from the directory on start, so
+``max_bytes`` bounds what one process tracks: several workers sharing the
+directory can together use up to workers x ``max_bytes``.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+_TMP_PREFIX = ".tmp-"
+# Temp files older than this are leftovers of a crashed writer
+_STALE_TMP_SECONDS = 3600
+
+
+def _digest(s3_key: str) -> str:
+    return hashlib.sha256(s3_key.encode()).hexdigest()
+
+
+def _unlink_quietly(path: str) -> None:
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+class DiskCache:
+    """LRU cache of S3 objects on local disk, bounded by total bytes."""
+
+    def __init__(self, directory: str | None, max_bytes: int, max_object_bytes: int):
+        self.directory = directory or os.path.join(tempfile.gettempdir(), "photo-cache")
+        self.max_bytes = max_bytes
+        self.max_object_bytes = max_object_bytes
+
+        # digest of the S3 key -> file size, least recently used first
+        self._entries: OrderedDict[str, int] = OrderedDict()
+        self._pins: dict[str, int] = {}
+        # digest -> fill lock and the number of callers holding or awaiting it
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._lock_users: dict[str, int] = {}
+        self._total_bytes = 0
+        self._started = False
+
+        # Statistics
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    async def start(self) -> None:
+        """Create the directory and index files left by earlier runs (oldest first)."""
+        if self._started or not self.enabled:
+            return
+        self._started = True
+        for digest, size in await asyncio.to_thread(self._scan):
+            self._entries[digest] = size
+            self._total_bytes += size
+        await self._evict()
+        logger.info(
+            f"Disk cache at {self.directory}: {len(self._entries)} files, "
+            f"{self._total_bytes} bytes (limit {self.max_bytes})"
+        )
+
+    def acquire(self, s3_key: str) -> str | None:
+        """
+        Return the cached file for ``s3_key``, pinned against eviction, or None.
+
+        Every non-None result must be paired with ``release``.
+        """
+        if not self.enabled:
+            return None
+        path = self._lookup(_digest(s3_key))
+        if path is None:
+            self._misses += 1
+        else:
+            self._hits += 1
+        return path
+
+    def release(self, s3_key: str) -> None:
+        digest = _digest(s3_key)
+        pins = self._pins.get(digest, 0) - 1
+        if pins > 0:
+            self._pins[digest] = pins
+        else:
+            self._pins.pop(digest, None)
+
+    async def fill(
+        self,
+        s3_key: str,
+        size: int,
+        download: Callable[[str], Awaitable[int]],
+    ) -> str | None:
+        """
+        Cache ``s3_key`` after a miss and return its pinned path (see ``acquire``).
+
+        ``download(tmp_path)`` writes the object to ``tmp_path`` and returns
+        the number of bytes written. Objects larger than ``max_object_bytes``
+        are not cached (returns None).
+        """
+        if not self.enabled or size > self.max_object_bytes:
+            return None
+
+        digest = _digest(s3_key)
+        lock = self._locks.setdefault(digest, asyncio.Lock())
+        self._lock_users[digest] = self._lock_users.get(digest, 0) + 1
+        try:
+            async with lock:
+                # Another request may have filled it while we waited
+                path = self._lookup(digest)
+                if path is not None:
+                    return path
+
+                path = self._path(digest)
+                await asyncio.to_thread(os.makedirs, os.path.dirname(path), exist_ok=True)
+                tmp_path = os.path.join(
+                    os.path.dirname(path), f"{_TMP_PREFIX}{digest}-{os.getpid()}-{id(lock)}"
+                )
+                try:
+                    written = await download(tmp_path)
+                    await asyncio.to_thread(os.replace, tmp_path, path)
+                except BaseException:
+                    await asyncio.to_thread(_unlink_quietly, tmp_path)
+                    raise
+
+                self._forget(digest)
+                self._entries[digest] = written
+                self._total_bytes += written
+                self._pins[digest] = self._pins.get(digest, 0) + 1
+                await self._evict()
+                return path
+        finally:
+            # Kept while anyone still waits on it, so a new caller queues
+            # behind them instead of starting a second download
+            users = self._lock_users[digest] - 1
+            if users > 0:
+                self._lock_users[digest] = users
+            else:
+                del self._lock_users[digest]
+                del self._locks[digest]
+
+    async def discard(self, s3_keys: list[str]) -> None:
+        """Drop deleted objects from the cache."""
+        if not self.enabled:
+            return
+        paths = []
+        for s3_key in s3_keys:
+            digest = _digest(s3_key)
+            if digest in self._entries:
+                self._forget(digest)
+                paths.append(self._path(digest))
+        if paths:
+            await asyncio.to_thread(lambda: [_unlink_quietly(p) for p in paths])
+
+    def stats(self) -> dict:
+        lookups = self._hits + self._misses
+        return {
+            "enabled": self.enabled,
+            "directory": self.directory if self.enabled else None,
+            "entries": len(self._entries),
+            "bytes": self._total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_ratio": round(self._hits / lookups, 4) if lookups else None,
+            "evictions": self._evictions,
+        }
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def _lookup(self, digest: str) -> str | None:
+        if digest not in self._entries:
+            return None
+        path = self._path(digest)
+        if not os.path.exists(path):
+            # Removed behind our back (another process, manual cleanup)
+            self._forget(digest)
+            return None
+        self._entries.move_to_end(digest)
+        self._pins[digest] = self._pins.get(digest, 0) + 1
+        return path
+
+    def _forget(self, digest: str) -> None:
+        self._total_bytes -= self._entries.pop(digest, 0)
+
+    async def _evict(self) -> None:
+        """Delete least recently used, unpinned files until under the limit."""
+        victims = []
+        for digest in list(self._entries):
+            if self._total_bytes <= self.max_bytes:
+                break
+            if digest in self._pins:
+                continue
+            self._forget(digest)
+            victims.append(self._path(digest))
+        if victims:
+            self._evictions += len(victims)
+            await asyncio.to_thread(lambda: [_unlink_quietly(p) for p in victims])
+
+    def _scan(self) -> list[tuple[str, int]]:
+        os.makedirs(self.directory, exist_ok=True)
+        now = time.time()
+        found = []
+        for root, _dirs, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                if name.startswith(_TMP_PREFIX):
+                    # Another process may still be writing recent ones
+                    if now - st.st_mtime > _STALE_TMP_SECONDS:
+                        _unlink_quietly(path)
+                    continue
+                found.append((st.st_mtime, name, st.st_size))
+        found.sort()
+        return [(name, size) for _, name, size in found]
+
+
+disk_cache = DiskCache(
+    settings.disk_cache_dir,
+    settings.disk_cache_max_bytes,
+    settings.disk_cache_max_object_bytes,
+)
@@ -0,0 +1,293 @@
+"""Persistent background job queue with a process pool for CPU-heavy work.
+
+Jobs live in the ``jobs`` table, so they survive restarts:
+1. ``submit`` inserts a queued row and wakes the dispatcher
+2. The dispatcher claims queued rows with a conditional UPDATE (safe with
+   several API processes) and runs up to ``job_max_concurrency`` at once
+3. Handlers run on the event loop for I/O and push CPU-bound steps to a
+   shared ``ProcessPoolExecutor`` via ``run_in_pool``
+4. Running jobs heartbeat; rows whose heartbeat goes stale (crashed or
+   killed worker) are re-queued, or failed after ``job_max_attempts``
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from functools import partial
+from typing import Awaitable, Callable
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..database import async_session_maker
+from ..models.job import Job
+from ..repositories import jobs_repository as job_repo
+
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Callable[[float], Awaitable[None]]
+JobHandler = Callable[[AsyncSession, Job, ProgressCallback], Awaitable[dict]]
+
+
+class JobQueue:
+    """Dispatches queued jobs to registered handlers."""
+
+    def __init__(self):
+        self._handlers: dict[str, JobHandler] = {}
+        self._executor: ProcessPoolExecutor | None = None
+        self._dispatcher: asyncio.Task | None = None
+        self._running: dict[str, asyncio.Task] = {}
+        self._wakeup: asyncio.Event | None = None
+        self._slots: asyncio.Semaphore | None = None
+        self.worker_processes = settings.job_worker_processes or os.cpu_count() or 1
+
+    def register(self, kind: str, handler: JobHandler) -> None:
+        """Register the coroutine that executes jobs of ``kind``."""
+        self._handlers[kind] = handler
+
+    async def start(self) -> None:
+        """Start the worker pool and dispatcher. Called on application startup."""
+        if self._dispatcher is not None:
+            return
+        # Spawned (not forked) workers: forking a process that runs an event
+        # loop and open connection pools is unsafe
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.worker_processes,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        self._wakeup = asyncio.Event()
+        self._slots = asyncio.Semaphore(settings.job_max_concurrency)
+        await self._requeue_stale()
+        self._dispatcher = asyncio.create_task(self._dispatch_loop())
+        logger.info(
+            f"Job queue started (max_concurrency={settings.job_max_concurrency}, "
+            f"worker_processes={self.worker_processes})"
+        )
+
+    async def stop(self) -> None:
+        """Stop dispatching, re-queue in-flight jobs and shut the pool down."""
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            await asyncio.gather(self._dispatcher, return_exceptions=True)
+            self._dispatcher = None
+
+        running = dict(self._running)
+        for task in running.values():
+            task.cancel()
+        await asyncio.gather(*running.values(), return_exceptions=True)
+        for job_id in running:
+            async with async_session_maker() as session:
+                await job_repo.requeue(session, job_id)
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        logger.info("Job queue stopped")
+
+    async def submit(
+        self,
+        session: AsyncSession,
+        *,
+        user_id: str,
+        kind: str,
+        params: dict,
+        project_id: str | None = None,
+        fingerprint: str | None = None,
+    ) -> Job:
+        """
+        Persist a new job and wake the dispatcher.
+
+        Jobs with a ``fingerprint`` are single-flight: while a job with the
+        same fingerprint is queued or running, it is returned instead of
+        creating a duplicate. A unique partial index on active fingerprints
+        settles concurrent submissions (also across API processes).
+
+        Returns:
+            The queued Job (committed), or the active one it was coalesced with
+        """
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        if fingerprint is not None:
+            active = await job_repo.get_active_job_by_fingerprint(session, fingerprint)
+            if active is not None:
+                return active
+        try:
+            async with session.begin_nested():
+                job = await job_repo.create_job(
+                    session,
+                    user_id=user_id,
+                    kind=kind,
+                    params=params,
+                    project_id=project_id,
+                    fingerprint=fingerprint,
+                )
+        except IntegrityError:
+            # An identical job was submitted concurrently
+            active = await job_repo.get_active_job_by_fingerprint(session, fingerprint)
+            if active is not None:
+                return active
+            # ...and has already finished; run ours
+            job = await job_repo.create_job(
+                session,
+                user_id=user_id,
+                kind=kind,
+                params=params,
+                project_id=project_id,
+                fingerprint=fingerprint,
+            )
+        await session.commit()
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job
+
+    async def record_finished(
+        self,
+        session: AsyncSession,
+        *,
+        user_id: str,
+        kind: str,
+        params: dict,
+        result: dict,
+        project_id: str | None = None,
+    ) -> Job:
+        """
+        Persist a job that is already done (e.g. answered from a cache).
+
+        Clients poll it like any other job and see it succeeded right away.
+
+        Returns:
+            The succeeded Job (committed)
+        """
+        job = await job_repo.create_finished_job(
+            session,
+            user_id=user_id,
+            kind=kind,
+            params=params,
+            result=result,
+            project_id=project_id,
+        )
+        await session.commit()
+        return job
+
+    async def set_preview(self, job_id: str, preview: dict | None) -> None:
+        """Publish (or withdraw) a preview of a running job's result."""
+        async with async_session_maker() as session:
+            await job_repo.set_preview(session, job_id, preview)
+
+    async def run_in_pool(self, fn: Callable, *args, **kwargs):
+        """Run a picklable CPU-bound function in the worker process pool."""
+        if self._executor is None:
+            raise RuntimeError("Job queue is not started")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(fn, *args, **kwargs))
+
+    def stats(self) -> dict:
+        return {
+            "running": len(self._running),
+            "max_concurrency": settings.job_max_concurrency,
+            "worker_processes": self.worker_processes if self._executor else 0,
+        }
+
+    async def _dispatch_loop(self) -> None:
+        last_sweep = asyncio.get_running_loop().time()
+        while True:
+            try:
+                await self._slots.acquire()
+                try:
+                    job_id = await self._claim()
+                except BaseException:
+                    self._slots.release()
+                    raise
+                if job_id is None:
+                    self._slots.release()
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(
+                            self._wakeup.wait(), timeout=settings.job_poll_interval_seconds
+                        )
+                    except asyncio.TimeoutError:
+                        pass
+                else:
+                    task = asyncio.create_task(self._run(job_id))
+                    self._running[job_id] = task
+                    task.add_done_callback(partial(self._on_done, job_id))
+
+                now = asyncio.get_running_loop().time()
+                if now - last_sweep >= settings.job_heartbeat_interval_seconds:
+                    last_sweep = now
+                    await self._requeue_stale()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Job dispatcher error")
+                await asyncio.sleep(settings.job_poll_interval_seconds)
+
+    def _on_done(self, job_id: str, _task: asyncio.Task) -> None:
+        self._running.pop(job_id, None)
+        self._slots.release()
+
+    async def _claim(self) -> str | None:
+        async with async_session_maker() as session:
+            return await job_repo.claim_next_job(session, list(self._handlers))
+
+    async def _requeue_stale(self) -> None:
+        async with async_session_maker() as session:
+            requeued, failed = await job_repo.requeue_stale_jobs(
+                session,
+                stale_after=timedelta(seconds=settings.job_stale_after_seconds),
+                max_attempts=settings.job_max_attempts,
+            )
+        if requeued or failed:
+            logger.warning(f"Recovered stale jobs: {requeued} re-queued, {failed} failed")
+
+    async def _run(self, job_id: str) -> None:
+        heartbeat = asyncio.create_task(self._heartbeat_loop(job_id))
+        attempt = None
+        try:
+            async with async_session_maker() as session:
+                job = await job_repo.get_job(session, job_id)
+                handler = self._handlers[job.kind]
+                attempt = job.attempts
+                # Handlers do long I/O and pool work with this session; they
+                # commit after reading so no transaction (and pooled
+                # connection) stays open across it
+                await session.commit()
+
+                async def progress(value: float) -> None:
+                    async with async_session_maker() as progress_session:
+                        await job_repo.update_progress(
+                            progress_session, job_id, min(max(value, 0.0), 1.0)
+                        )
+
+                result = await handler(session, job, progress)
+
+            async with async_session_maker() as session:
+                recorded = await job_repo.mark_succeeded(session, job_id, attempt, result or {})
+            if recorded:
+                logger.info(f"Job {job_id} succeeded")
+            else:
+                logger.warning(f"Job {job_id} succeeded after it was re-queued; result dropped")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.exception(f"Job {job_id} failed")
+            async with async_session_maker() as session:
+                await job_repo.mark_failed(session, job_id, attempt, str(e))
+        finally:
+            heartbeat.cancel()
+
+    async def _heartbeat_loop(self, job_id: str) -> None:
+        while True:
+            await asyncio.sleep(settings.job_heartbeat_interval_seconds)
+            try:
+                async with async_session_maker() as session:
+                    await job_repo.heartbeat(session, job_id)
+            except Exception as e:
+                logger.warning(f"Heartbeat for job {job_id} failed: {e}")
+
+
+job_queue = JobQueue()
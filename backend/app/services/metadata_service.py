@@ -0,0 +1,75 @@
+"""Service reading image metadata (dimensions, EXIF, ICC) for Photo rows.
+
+Only file headers are parsed, never pixel data:
+- uploads through the API are read from the spooled request file
+- objects already in S3 (direct uploads, backfill) are read with a ranged
+  GET of the first ``metadata_header_bytes``, retried once with a 16x
+  larger range for files whose header is bigger (large EXIF/ICC blocks)
+
+Failures never fail an upload; the columns are just left NULL.
+"""
+
+import asyncio
+import io
+import logging
+
+from fastapi import UploadFile
+
+from ..config import settings
+from ..utils.image_metadata import empty_metadata, read_image_metadata
+from .s3_service import s3_service
+
+logger = logging.getLogger(__name__)
+
+
+def _read_path(path: str) -> dict | None:
+    with open(path, "rb") as f:
+        return read_image_metadata(f)
+
+
+class MetadataService:
+    """Reads the Photo metadata columns from image headers."""
+
+    @staticmethod
+    def supports(mime: str) -> bool:
+        return mime.startswith("image/")
+
+    async def read_upload(self, file: UploadFile, mime: str) -> dict:
+        """Metadata of an upload (read from Starlette's spooled temporary file)."""
+        if not self.supports(mime):
+            return empty_metadata()
+        metadata = await asyncio.to_thread(read_image_metadata, file.file)
+        return metadata or empty_metadata()
+
+    async def read_path(self, path: str, mime: str) -> dict:
+        """Metadata of a local file."""
+        if not self.supports(mime):
+            return empty_metadata()
+        return await asyncio.to_thread(_read_path, path) or empty_metadata()
+
+    async def read_object(self, s3_key: str, size: int, mime: str) -> dict:
+        """
+        Metadata of an object in S3, from ranged reads of its first bytes.
+
+        Args:
+            s3_key: The S3 key of the object
+            size: Object size in bytes (avoids reading past the end)
+            mime: Content type; non-images are not read at all
+        """
+        if not self.supports(mime):
+            return empty_metadata()
+        length = settings.metadata_header_bytes
+        try:
+            while True:
+                head = await s3_service.read_head(s3_key, min(length, size))
+                metadata = await asyncio.to_thread(read_image_metadata, io.BytesIO(head))
+                if metadata is not None or length >= size or length > settings.metadata_header_bytes:
+                    break
+                length *= 16
+        except Exception as e:
+            logger.warning(f"Failed to read image metadata of {s3_key}: {e}")
+            return empty_metadata()
+        return metadata or empty_metadata()
+
+
+metadata_service = MetadataService()
@@ -0,0 +1,550 @@
+"""Feature-based panorama stitching (NumPy only).
+
+Pipeline, split so the expensive steps can run in parallel in the job
+queue's process pool:
+1. ``extract_features`` (one task per photo): decode a downscaled grayscale
+   proxy, detect Harris corners and describe them with bias/gain normalized
+   8x8 patches sampled from a 40x40 window (MOPS-style)
+2. ``match_pair`` (one task per pair): nearest-neighbour matching with the
+   ratio test and a cross-check, then a RANSAC homography
+3. ``compose_panorama`` (one task): link the photos with a maximum spanning
+   tree over the pairwise inlier counts, chain the homographies into the
+   frame of the best-connected photo, scale them from proxy to full
+   resolution and warp every photo into the output with feather blending
+
+Each photo's proxy and features are also written to an artifact file
+(``extract_features``/``load_features``) that the caller caches per photo,
+and pairwise results are plain data it can cache per pair, so a re-stitch
+only extracts and matches what involves new photos.
+
+Rendering goes strip by strip like the collage compositor: each photo is
+decoded once (no larger than the output needs) into a scratch file, and
+each strip only reads the source rows it maps to. The projection is planar,
+which suits the usual handful of overlapping shots; very wide (> ~120 deg)
+sweeps are rejected as degenerate rather than rendered hugely stretched.
+"""
+
+import math
+import os
+from typing import NamedTuple
+
+import numpy as np
+from PIL import ExifTags, Image
+
+from ..config import settings
+from ..utils.png_writer import StreamingPngWriter
+# Module import (not names): compositing_service imports this module too
+from . import compositing_service as compositing
+
+# Bump when a change to the parameters below makes cached features or
+# matches incompatible
+FEATURES_VERSION = 1
+
+# Harris / descriptor parameters (in proxy pixels)
+_HARRIS_K = 0.04
+_NMS_RADIUS = 4
+_PATCH_SPACING = 5  # 8x8 samples over a 40x40 window
+_PATCH_RADIUS = 18
+_RATIO = 0.75
+
+_RANSAC_ITERATIONS = 1000
+_RANSAC_THRESHOLD = 3.0  # reprojection error in proxy pixels
+
+# Pixels per block when sampling a warped strip (bounds float temporaries)
+_BLOCK_PIXELS = 1 << 20
+
+
+class Features(NamedTuple):
+    keypoints: np.ndarray  # (N, 2) x, y in proxy pixels
+    descriptors: np.ndarray  # (N, 64) float32
+    size: tuple[int, int]  # full-resolution (width, height) as displayed
+    scale: float  # full-resolution pixels per proxy pixel
+
+
+class PairMatch(NamedTuple):
+    i: int
+    j: int
+    homography: np.ndarray | None  # maps proxy points of j onto proxy points of i
+    inliers: int
+
+
+# ---------------------------------------------------------------------------
+# Features
+# ---------------------------------------------------------------------------
+
+def _convolve_axis(img: np.ndarray, kernel: np.ndarray, axis: int) -> np.ndarray:
+    radius = len(kernel) // 2
+    pad = [(0, 0)] * img.ndim
+    pad[axis] = (radius, radius)
+    padded = np.pad(img, pad, mode="edge")
+    out = np.zeros_like(img)
+    n = img.shape[axis]
+    for k, weight in enumerate(kernel):
+        out += weight * np.take(padded, np.arange(k, k + n), axis=axis)
+    return out
+
+
+def _gaussian_blur(img: np.ndarray, sigma: float) -> np.ndarray:
+    radius = max(1, int(math.ceil(3 * sigma)))
+    x = np.arange(-radius, radius + 1, dtype=np.float32)
+    kernel = np.exp(-(x * x) / (2 * sigma * sigma))
+    kernel /= kernel.sum()
+    return _convolve_axis(_convolve_axis(img, kernel, 0), kernel, 1)
+
+
+def _max_filter(img: np.ndarray, radius: int) -> np.ndarray:
+    out = img.copy()
+    for axis in (0, 1):
+        padded = np.pad(out, [(radius, radius) if a == axis else (0, 0) for a in (0, 1)],
+                        mode="constant", constant_values=-np.inf)
+        n = out.shape[axis]
+        out = np.max(
+            [np.take(padded, np.arange(k, k + n), axis=axis) for k in range(2 * radius + 1)],
+            axis=0,
+        )
+    return out
+
+
+def detect_features(gray: np.ndarray, max_points: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Harris corners with patch descriptors on a float32 grayscale image.
+
+    Returns:
+        (keypoints (N, 2) as x, y; descriptors (N, 64))
+    """
+    smooth = _gaussian_blur(gray, 1.0)
+    iy, ix = np.gradient(smooth)
+    sxx = _gaussian_blur(ix * ix, 2.0)
+    syy = _gaussian_blur(iy * iy, 2.0)
+    sxy = _gaussian_blur(ix * iy, 2.0)
+    response = sxx * syy - sxy * sxy - _HARRIS_K * (sxx + syy) ** 2
+
+    # Local maxima away from the border (room for the descriptor window)
+    peaks = (response == _max_filter(response, _NMS_RADIUS)) & (response > 0.001 * response.max())
+    margin = _PATCH_RADIUS + 1
+    peaks[:margin] = peaks[-margin:] = False
+    peaks[:, :margin] = peaks[:, -margin:] = False
+    ys, xs = np.nonzero(peaks)
+    if len(xs) == 0:
+        return np.zeros((0, 2), np.float32), np.zeros((0, 64), np.float32)
+    strongest = np.argsort(response[ys, xs])[::-1][:max_points]
+    ys, xs = ys[strongest], xs[strongest]
+
+    # 8x8 samples, 5 px apart, from a version blurred to match that spacing
+    coarse = _gaussian_blur(gray, _PATCH_SPACING / 2)
+    offsets = np.round((np.arange(8) - 3.5) * _PATCH_SPACING).astype(int)
+    patches = coarse[
+        ys[:, None, None] + offsets[None, :, None],
+        xs[:, None, None] + offsets[None, None, :],
+    ].reshape(len(xs), 64)
+    patches -= patches.mean(axis=1, keepdims=True)
+    patches /= patches.std(axis=1, keepdims=True) + 1e-6
+    keypoints = np.stack([xs, ys], axis=1).astype(np.float32)
+    return keypoints, patches.astype(np.float32)
+
+
+def extract_features(
+    path: str,
+    artifact_path: str,
+    proxy_size: int,
+    max_points: int,
+) -> Features:
+    """
+    Decode a proxy of one photo and detect its features (pool task).
+
+    The RGB proxy (longest side ``proxy_size``), EXIF orientation, keypoints
+    and descriptors are saved to ``artifact_path`` (see ``load_features``).
+    """
+    width, height = compositing.read_oriented_size(path)
+    with Image.open(path) as img:
+        orientation = img.getexif().get(ExifTags.Base.Orientation, 1)
+    scale = max(1.0, max(width, height) / proxy_size)
+    proxy_w, proxy_h = max(1, round(width / scale)), max(1, round(height / scale))
+    proxy = compositing.load_fitted(path, (proxy_w, proxy_h))
+    gray = proxy.astype(np.float32) @ np.array([0.299, 0.587, 0.114], dtype=np.float32) / 255.0
+    keypoints, descriptors = detect_features(gray, max_points)
+
+    with open(artifact_path, "wb") as f:
+        np.savez_compressed(
+            f,
+            version=FEATURES_VERSION,
+            proxy=proxy,
+            orientation=orientation,
+            size=np.array([width, height]),
+            scale=width / proxy_w,
+            keypoints=keypoints,
+            descriptors=descriptors,
+        )
+    return Features(keypoints, descriptors, (width, height), width / proxy_w)
+
+
+def load_features(artifact_path: str) -> Features:
+    """Read the features saved by ``extract_features`` (the proxy is not loaded)."""
+    with np.load(artifact_path) as data:
+        width, height = (int(v) for v in data["size"])
+        return Features(
+            data["keypoints"], data["descriptors"], (width, height), float(data["scale"])
+        )
+
+
+# ---------------------------------------------------------------------------
+# Matching and homographies
+# ---------------------------------------------------------------------------
+
+def match_descriptors(d1: np.ndarray, d2: np.ndarray, ratio: float = _RATIO) -> np.ndarray:
+    """
+    Ratio-test nearest neighbours that are also mutual best matches.
+
+    Returns:
+        (M, 2) index pairs into d1 and d2
+    """
+    if len(d1) < 2 or len(d2) < 2:
+        return np.zeros((0, 2), dtype=int)
+    dist = (
+        (d1 * d1).sum(1)[:, None] + (d2 * d2).sum(1)[None, :] - 2.0 * d1 @ d2.T
+    ).clip(min=0)
+    nearest = np.argpartition(dist, 1, axis=1)[:, :2]
+    rows = np.arange(len(d1))
+    first, second = dist[rows, nearest[:, 0]], dist[rows, nearest[:, 1]]
+    swap = second < first
+    best = np.where(swap, nearest[:, 1], nearest[:, 0])
+    first, second = np.minimum(first, second), np.maximum(first, second)
+
+    keep = np.sqrt(first) < ratio * np.sqrt(second)
+    keep &= dist.argmin(axis=0)[best] == rows
+    return np.stack([rows[keep], best[keep]], axis=1)
+
+
+def _normalization(points: np.ndarray) -> np.ndarray:
+    """Similarity moving points to zero mean and sqrt(2) mean distance (Hartley)."""
+    centroid = points.mean(axis=0)
+    spread = np.sqrt(((points - centroid) ** 2).sum(axis=1)).mean() or 1.0
+    s = math.sqrt(2) / spread
+    return np.array([[s, 0, -s * centroid[0]], [0, s, -s * centroid[1]], [0, 0, 1]])
+
+
+def _dlt_rows(src: np.ndarray, dst: np.ndarray) -> np.ndarray:
+    """DLT equations for src -> dst; works on (..., n, 2) batches."""
+    x, y = src[..., 0], src[..., 1]
+    u, v = dst[..., 0], dst[..., 1]
+    zeros, ones = np.zeros_like(x), np.ones_like(x)
+    a = np.stack([-x, -y, -ones, zeros, zeros, zeros, u * x, u * y, u], axis=-1)
+    b = np.stack([zeros, zeros, zeros, -x, -y, -ones, v * x, v * y, v], axis=-1)
+    return np.concatenate([a, b], axis=-2)
+
+
+def _project(h: np.ndarray, points: np.ndarray) -> np.ndarray:
+    """Apply homographies (..., 3, 3) to points (n, 2); returns (..., n, 2)."""
+    homogeneous = np.concatenate([points, np.ones((len(points), 1))], axis=1)
+    mapped = homogeneous @ np.swapaxes(h, -1, -2)
+    w = mapped[..., 2:3]
+    w = np.where(np.abs(w) < 1e-12, 1e-12, w)
+    return mapped[..., :2] / w
+
+
+def ransac_homography(
+    src: np.ndarray,
+    dst: np.ndarray,
+    *,
+    iterations: int = _RANSAC_ITERATIONS,
+    threshold: float = _RANSAC_THRESHOLD,
+    seed: int = 0,
+) -> tuple[np.ndarray | None, np.ndarray]:
+    """
+    Robustly fit H with dst ~ H @ src.
+
+    All minimal 4-point models are solved in one batched SVD on Hartley-
+    normalized coordinates; the best one is refined on its inliers.
+
+    Returns:
+        (H or None, boolean inlier mask)
+    """
+    n = len(src)
+    if n < 4:
+        return None, np.zeros(n, dtype=bool)
+    t_src, t_dst = _normalization(src), _normalization(dst)
+    src_n = _project(t_src, src)
+    dst_n = _project(t_dst, dst)
+    denormalize = np.linalg.inv(t_dst)
+
+    rng = np.random.default_rng(seed)
+    samples = np.argsort(rng.random((iterations, n)), axis=1)[:, :4]
+    _, _, vt = np.linalg.svd(_dlt_rows(src_n[samples], dst_n[samples]))
+    models = denormalize @ vt[:, -1].reshape(-1, 3, 3) @ t_src
+
+    errors = np.linalg.norm(_project(models, src) - dst, axis=-1)
+    scores = (errors < threshold).sum(axis=1)
+    inliers = errors[int(scores.argmax())] < threshold
+    if inliers.sum() < 4:
+        return None, inliers
+
+    # Refine on all inliers, then re-score with the refined model
+    for _ in range(2):
+        _, _, vt = np.linalg.svd(_dlt_rows(src_n[inliers], dst_n[inliers]))
+        h = denormalize @ vt[-1].reshape(3, 3) @ t_src
+        refined = np.linalg.norm(_project(h, src) - dst, axis=-1) < threshold
+        if refined.sum() < 4:
+            break
+        inliers = refined
+    return h / h[2, 2], inliers
+
+
+def _plausible(h: np.ndarray) -> bool:
+    """Reject flips, extreme zoom and strong perspective between neighbours."""
+    det = np.linalg.det(h[:2, :2])
+    return 0.1 < det < 10 and abs(h[2, 0]) < 0.005 and abs(h[2, 1]) < 0.005
+
+
+def match_pair(i: int, j: int, a: Features, b: Features) -> PairMatch:
+    """Match two photos' features and fit j -> i (pool task)."""
+    pairs = match_descriptors(a.descriptors, b.descriptors)
+    if len(pairs) < 8:
+        return PairMatch(i, j, None, 0)
+    h, inliers = ransac_homography(b.keypoints[pairs[:, 1]], a.keypoints[pairs[:, 0]])
+    count = int(inliers.sum())
+    # Brown & Lowe's acceptance test for a true image match
+    if h is None or count < 8 + 0.3 * len(pairs) or not _plausible(h):
+        return PairMatch(i, j, None, count)
+    return PairMatch(i, j, h, count)
+
+
+# ---------------------------------------------------------------------------
+# Alignment
+# ---------------------------------------------------------------------------
+
+def align(features: list[Features], matches: list[PairMatch]) -> tuple[int, dict[int, np.ndarray]]:
+    """
+    Chain pairwise homographies into one reference frame.
+
+    A maximum spanning tree over inlier counts picks the most reliable links;
+    the reference is the photo with the most inliers on its tree edges, and
+    photos outside its connected component are left out.
+
+    Returns:
+        (reference index, {photo index: full-resolution homography into the reference})
+    """
+    edges = sorted((m for m in matches if m.homography is not None), key=lambda m: -m.inliers)
+    parent = list(range(len(features)))
+
+    def find(k: int) -> int:
+        while parent[k] != k:
+            parent[k] = parent[parent[k]]
+            k = parent[k]
+        return k
+
+    tree: dict[int, list[tuple[int, np.ndarray]]] = {k: [] for k in range(len(features))}
+    weight = [0] * len(features)
+    for m in edges:
+        ri, rj = find(m.i), find(m.j)
+        if ri == rj:
+            continue
+        parent[ri] = rj
+        # Store both directions: h maps j -> i
+        tree[m.i].append((m.j, m.homography))
+        tree[m.j].append((m.i, np.linalg.inv(m.homography)))
+        weight[m.i] += m.inliers
+        weight[m.j] += m.inliers
+
+    reference = int(np.argmax(weight))
+    # Proxy-frame homographies into the reference, breadth first
+    to_reference = {reference: np.eye(3)}
+    queue = [reference]
+    while queue:
+        k = queue.pop(0)
+        for neighbour, h_k_from_neighbour in tree[k]:
+            if neighbour not in to_reference:
+                to_reference[neighbour] = to_reference[k] @ h_k_from_neighbour
+                queue.append(neighbour)
+
+    def scaling(f: Features) -> np.ndarray:
+        return np.diag([f.scale, f.scale, 1.0])
+
+    ref_scale = scaling(features[reference])
+    full = {
+        k: ref_scale @ h @ np.linalg.inv(scaling(features[k]))
+        for k, h in to_reference.items()
+    }
+    return reference, full
+
+
+# ---------------------------------------------------------------------------
+# Rendering
+# ---------------------------------------------------------------------------
+
+def _corners(size: tuple[int, int]) -> np.ndarray:
+    w, h = size
+    return np.array([[0, 0], [w, 0], [w, h], [0, h]], dtype=np.float64)
+
+
+def _hat(t: np.ndarray) -> np.ndarray:
+    """Feather weight: 1 in the middle of the source, falling linearly to its edges."""
+    return np.clip(1.0 - np.abs(2.0 * t - 1.0), 1e-3, None)
+
+
+def _sample_block(
+    source: np.ndarray | str,
+    source_size: tuple[int, int],
+    inverse: np.ndarray,
+    xs: np.ndarray,
+    ys: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray] | None:
+    """Bilinear-sample a warped source at output pixels; returns (weighted rgb, weights)."""
+    w, h = source_size
+    den = inverse[2, 0] * xs + inverse[2, 1] * ys + inverse[2, 2]
+    u = (inverse[0, 0] * xs + inverse[0, 1] * ys + inverse[0, 2]) / den
+    v = (inverse[1, 0] * xs + inverse[1, 1] * ys + inverse[1, 2]) / den
+    valid = (den > 0) & (u >= 0) & (u <= w - 1) & (v >= 0) & (v <= h - 1)
+    if not valid.any():
+        return None
+
+    u, v = np.where(valid, u, 0), np.where(valid, v, 0)
+    first = int(np.floor(v[valid].min()))
+    last = min(h - 1, int(np.floor(v[valid].max())) + 1)
+    rows = compositing._read_rows(source, w, first, last + 1).astype(np.float32)
+
+    u0 = np.minimum(np.floor(u).astype(np.int32), w - 2 if w > 1 else 0)
+    v0 = np.clip(np.floor(v).astype(np.int32) - first, 0, max(0, last - first - 1))
+    fu = (u - u0)[..., None].astype(np.float32)
+    fv = (v - first - v0)[..., None].astype(np.float32)
+    u1 = np.minimum(u0 + 1, w - 1)
+    v1 = np.minimum(v0 + 1, last - first)
+    top = rows[v0, u0] * (1 - fu) + rows[v0, u1] * fu
+    bottom = rows[v1, u0] * (1 - fu) + rows[v1, u1] * fu
+    rgb = top * (1 - fv) + bottom * fv
+
+    weight = (_hat(u / max(w - 1, 1)) * _hat(v / max(h - 1, 1))).astype(np.float32)
+    weight = np.where(valid, weight, 0)
+    return rgb * weight[..., None], weight
+
+
+def compose_panorama(
+    paths: list[str],
+    out_path: str,
+    features: list[Features],
+    matches: list[PairMatch],
+    *,
+    background: str = "#ffffff",
+    output_format: str = "jpeg",
+    quality: int = 90,
+    max_output_pixels: int = settings.stitch_max_output_pixels,
+    max_tiled_output_pixels: int = settings.stitch_max_tiled_output_pixels,
+    strip_pixels: int = settings.stitch_strip_pixels,
+) -> dict:
+    """
+    Align photos from their pairwise matches and render the panorama (pool task).
+
+    The output is at the reference photo's full resolution, scaled down
+    only as far as needed to respect the pixel limit of the format (PNG is
+    streamed strip by strip; JPEG/WebP need the whole canvas in memory).
+
+    Returns:
+        dict with ``width``, ``height`` and the ``aligned`` input indexes
+
+    Raises:
+        StitchError: If fewer than two photos could be aligned
+    """
+    bg = np.array(compositing.parse_color(background), dtype=np.float32)
+    reference, transforms = align(features, matches)
+    if len(transforms) < 2:
+        raise compositing.StitchError(
+            "Could not find enough overlap between the photos to build a panorama"
+        )
+
+    # Output bounds in the reference frame
+    warped = {}
+    for k, h in transforms.items():
+        homogeneous = np.c_[_corners(features[k].size), np.ones(4)] @ h.T
+        if (homogeneous[:, 2] <= 0).any():
+            raise compositing.StitchError("Photos span too wide a view for a planar panorama")
+        warped[k] = homogeneous[:, :2] / homogeneous[:, 2:3]
+    points = np.concatenate(list(warped.values()))
+    x_min, y_min = points.min(axis=0)
+    x_max, y_max = points.max(axis=0)
+    input_pixels = sum(features[k].size[0] * features[k].size[1] for k in transforms)
+    if (x_max - x_min) * (y_max - y_min) > 20 * input_pixels:
+        raise compositing.StitchError("Photos span too wide a view for a planar panorama")
+
+    pil_format = compositing.OUTPUT_FORMATS[output_format][0]
+    limit = max_tiled_output_pixels if pil_format == "PNG" else max_output_pixels
+    scale = min(1.0, math.sqrt(limit / ((x_max - x_min) * (y_max - y_min))))
+    width = max(1, int(math.ceil((x_max - x_min) * scale)))
+    height = max(1, int(math.ceil((y_max - y_min) * scale)))
+    to_output = np.array([[scale, 0, -x_min * scale], [0, scale, -y_min * scale], [0, 0, 1]])
+
+    scratch_dir = os.path.dirname(out_path) or "."
+    sources: dict[int, tuple[str, tuple[int, int], np.ndarray, tuple[int, int, int, int]]] = {}
+    try:
+        # Decode each photo once, no larger than it appears in the output
+        for k, h in transforms.items():
+            w_full, h_full = features[k].size
+            quad = (warped[k] - [x_min, y_min]) * scale
+            # Shoelace formula: the photo's footprint in output pixels
+            x, y = quad[:, 0], quad[:, 1]
+            area = 0.5 * abs(np.dot(x, np.roll(y, 1)) - np.dot(y, np.roll(x, 1)))
+            factor = min(1.0, 1.25 * math.sqrt(area / (w_full * h_full)))
+            size = (max(2, round(w_full * factor)), max(2, round(h_full * factor)))
+            pixels = compositing.load_fitted(paths[k], size, tuple(int(c) for c in bg))
+            scratch = os.path.join(scratch_dir, f"panorama-input-{k:05d}.raw")
+            pixels.tofile(scratch)
+            del pixels
+            from_source = to_output @ h @ np.diag([w_full / size[0], h_full / size[1], 1.0])
+            x0, y0 = np.floor(quad.min(axis=0)).astype(int)
+            x1, y1 = np.ceil(quad.max(axis=0)).astype(int)
+            bounds = (max(0, x0), max(0, y0), min(width, x1 + 1), min(height, y1 + 1))
+            sources[k] = (scratch, size, np.linalg.inv(from_source), bounds)
+
+        canvas = None
+        writer = None
+        out_file = open(out_path, "wb") if pil_format == "PNG" else None
+        if out_file is not None:
+            writer = StreamingPngWriter(
+                out_file, width, height, compress_level=settings.stitch_png_compress_level
+            )
+        else:
+            canvas = np.empty((height, width, 3), dtype=np.uint8)
+
+        rows_per_strip = max(1, strip_pixels // width)
+        try:
+            for s0 in range(0, height, rows_per_strip):
+                s1 = min(s0 + rows_per_strip, height)
+                total = np.zeros((s1 - s0, width, 3), dtype=np.float32)
+                weights = np.zeros((s1 - s0, width), dtype=np.float32)
+                for scratch, size, inverse, (bx0, by0, bx1, by1) in sources.values():
+                    top, bottom = max(s0, by0), min(s1, by1)
+                    if top >= bottom or bx0 >= bx1:
+                        continue
+                    block_rows = max(1, _BLOCK_PIXELS // (bx1 - bx0))
+                    for r0 in range(top, bottom, block_rows):
+                        r1 = min(r0 + block_rows, bottom)
+                        ys, xs = np.mgrid[r0:r1, bx0:bx1].astype(np.float64)
+                        sampled = _sample_block(scratch, size, inverse, xs + 0.5, ys + 0.5)
+                        if sampled is None:
+                            continue
+                        rgb, weight = sampled
+                        total[r0 - s0:r1 - s0, bx0:bx1] += rgb
+                        weights[r0 - s0:r1 - s0, bx0:bx1] += weight
+
+                covered = weights > 0
+                strip = np.empty_like(total)
+                strip[...] = bg
+                strip[covered] = total[covered] / weights[covered][:, None]
+                strip = np.rint(strip).clip(0, 255).astype(np.uint8)
+                if writer is not None:
+                    writer.write(strip)
+                else:
+                    canvas[s0:s1] = strip
+            if writer is not None:
+                writer.close()
+        finally:
+            if out_file is not None:
+                out_file.close()
+
+        if canvas is not None:
+            save_kwargs = {"quality": quality} if pil_format in ("JPEG", "WEBP") else {}
+            Image.fromarray(canvas).save(out_path, format=pil_format, **save_kwargs)
+    finally:
+        for scratch, *_ in sources.values():
+            if os.path.exists(scratch):
+                os.remove(scratch)
+
+    return {"width": width, "height": height, "aligned": sorted(transforms), "reference": reference}
@@ -0,0 +1,104 @@
+"""Runs bcrypt hashing and verification off the event loop.
+
+A bcrypt call takes 100-300 ms of CPU at the default cost. Called inline
+from an async handler it freezes every other request on the worker, so a
+burst of logins would stall unrelated downloads. Calls run on a small
+dedicated thread pool instead (bcrypt releases the GIL). At most
+``password_hash_max_concurrency`` run at once, and once
+``password_hash_max_waiting`` callers are queued new ones are rejected,
+so an auth storm degrades into fast 503s instead of unbounded latency.
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, TypeVar
+
+from ..config import settings
+from ..utils.auth import get_password_hash, verify_password
+
+T = TypeVar("T")
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when too many hash/verify calls are already waiting."""
+
+
+class PasswordHasher:
+    """Bounded, metered thread pool for password hashing."""
+
+    def __init__(self, max_concurrency: int, max_waiting: int):
+        self.max_concurrency = max_concurrency
+        self.max_waiting = max_waiting
+        self._executor: ThreadPoolExecutor | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+        self._waiting = 0
+        self._running = 0
+        self.calls_total = 0
+        self.rejected_total = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    async def hash(self, password: str) -> str:
+        return await self._run(get_password_hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, password, hashed_password)
+
+    async def _run(self, fn: Callable[..., T], *args) -> T:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_concurrency, thread_name_prefix="bcrypt"
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        if self._waiting >= self.max_waiting:
+            self.rejected_total += 1
+            raise PasswordHasherBusy()
+
+        queued_at = time.perf_counter()
+        self._waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+
+        wait = time.perf_counter() - queued_at
+        self.calls_total += 1
+        self.wait_seconds_total += wait
+        self.wait_seconds_max = max(self.wait_seconds_max, wait)
+        self._running += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, partial(fn, *args))
+        finally:
+            self._running -= 1
+            self._semaphore.release()
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self._semaphore = None
+
+    def stats(self) -> dict:
+        return {
+            "bcrypt_rounds": settings.bcrypt_rounds,
+            "max_concurrency": self.max_concurrency,
+            "running": self._running,
+            "waiting": self._waiting,
+            "calls_total": self.calls_total,
+            "rejected_total": self.rejected_total,
+            "wait_seconds_avg": (
+                round(self.wait_seconds_total / self.calls_total, 4)
+                if self.calls_total else None
+            ),
+            "wait_seconds_max": round(self.wait_seconds_max, 4),
+        }
+
+
+password_hasher = PasswordHasher(
+    max_concurrency=settings.password_hash_max_concurrency,
+    max_waiting=settings.password_hash_max_waiting,
+)
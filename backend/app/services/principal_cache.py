@@ -0,0 +1,100 @@
+"""In-process cache of authenticated users.
+
+``get_current_user`` runs on every authenticated request; caching the
+resolved User by token subject means repeat requests need no DB round trip
+just to learn who the caller is. Entries expire after
+``auth_cache_ttl_seconds`` and the least recently used ones are evicted
+beyond ``auth_cache_size``.
+
+Entries are immutable ``Principal`` values copied from the row, never the
+ORM instance itself: an instance stays tied to the session that loaded it
+(a rollback there expires it, and it cannot refresh once that session is
+closed), while the cache is shared by every request. Handlers that modify
+or delete the user load the row in their own session. Anything that changes
+or removes a user must call ``invalidate_user`` so other requests stop
+seeing the old values (other API processes pick the change up when the TTL
+runs out).
+"""
+
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import NamedTuple
+
+from ..config import settings
+from ..models.user import User
+
+
+class Principal(NamedTuple):
+    """The authenticated caller, detached from any database session."""
+
+    id: str
+    name: str
+    email: str
+    created_at: datetime
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(id=user.id, name=user.name, email=user.email, created_at=user.created_at)
+
+
+class PrincipalCache:
+    """TTL + LRU map from token subject to Principal."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, Principal]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, subject: str) -> Principal | None:
+        entry = self._entries.get(subject)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, principal = entry
+        if expires_at <= time.monotonic():
+            del self._entries[subject]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(subject)
+        self.hits += 1
+        return principal
+
+    def put(self, subject: str, principal: Principal) -> None:
+        if self.maxsize <= 0:
+            return
+        self._entries[subject] = (time.monotonic() + self.ttl, principal)
+        self._entries.move_to_end(subject)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate_user(self, user_id: str) -> None:
+        """Drop every entry that resolves to ``user_id``, whatever the subject."""
+        stale = [key for key, (_, cached) in self._entries.items() if cached.id == user_id]
+        for key in stale:
+            del self._entries[key]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+
+principal_cache = PrincipalCache(
+    maxsize=settings.auth_cache_size,
+    ttl=settings.auth_cache_ttl_seconds,
+)
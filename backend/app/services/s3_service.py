@@ -1,11 +1,93 @@
-"""Service for interacting with AWS S3 storage."""
+"""Service for interacting with AWS S3 storage.
+
+Reads of whole objects go through a local disk cache (see disk_cache), so
+repeated renders and previews of the same photos skip the S3 round trip.
+"""
+import asyncio
 import logging
+import os
+import random
+import shutil
+from contextlib import AsyncExitStack, asynccontextmanager
+from functools import partial
+from typing import AsyncIterator
+
+import aiofiles
 import aioboto3
+from aiobotocore.config import AioConfig
 from botocore.exceptions import ClientError
 from ..config import settings
+from .disk_cache import disk_cache
 
 logger = logging.getLogger(__name__)
 
+# S3 DeleteObjects accepts at most 1000 keys per request
+_DELETE_BATCH_SIZE = 1000
+
+# Errors worth retrying with backoff (throttling and transient server errors)
+_RETRYABLE_ERROR_CODES = {
+    "SlowDown",
+    "Throttling",
+    "ThrottlingException",
+    "RequestLimitExceeded",
+    "ServiceUnavailable",
+    "InternalError",
+    "503",
+}
+
+
+class S3ObjectStream:
+    """An open S3 GET response whose body is relayed to the caller chunk by chunk."""
+
+    def __init__(self, response: dict, exit_stack: AsyncExitStack):
+        self._response = response
+        self._exit_stack = exit_stack
+        self._closed = False
+        self.content_length: int = response["ContentLength"]
+        self.content_range: str | None = response.get("ContentRange")
+        self.content_type: str | None = response.get("ContentType")
+        self.etag: str | None = response.get("ETag")
+        self.last_modified = response.get("LastModified")
+
+    async def iter_chunks(self, chunk_size: int) -> AsyncIterator[bytes]:
+        """Yield the object body as it arrives from S3, closing the stream at the end."""
+        try:
+            async for chunk in self._response["Body"].iter_chunks(chunk_size):
+                yield chunk
+        finally:
+            await self.aclose()
+
+    async def aclose(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._response["Body"].close()
+        await self._exit_stack.aclose()
+
+
+async def _write_stream(stream: S3ObjectStream, path: str) -> int:
+    total = 0
+    async with aiofiles.open(path, "wb") as f:
+        async for chunk in stream.iter_chunks(settings.download_chunk_size):
+            await f.write(chunk)
+            total += len(chunk)
+    return total
+
+
+def _link_or_copy(src: str, dst: str) -> int:
+    """Hard-link a cached file to ``dst`` (copy across filesystems); returns its size."""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+    return os.path.getsize(dst)
+
+
+async def _iter_path(path: str, chunk_size: int) -> AsyncIterator[bytes]:
+    async with aiofiles.open(path, "rb") as f:
+        while chunk := await f.read(chunk_size):
+            yield chunk
+
 
 class S3Service:
     """Service for uploading, downloading, and deleting files from S3."""
@@ -18,6 +100,97 @@ class S3Service:
         )
         self.bucket_name = settings.s3_bucket_name
         self.endpoint_url = settings.aws_endpoint_url
+        self.multipart_part_size = settings.s3_multipart_part_size
+        self.max_pool_connections = settings.s3_max_pool_connections
+
+        # One long-lived client (and connection pool) shared by all requests
+        self._s3_client = None
+        self._client_stack: AsyncExitStack | None = None
+        self._client_lock = asyncio.Lock()
+
+        # Pool statistics
+        self._in_flight = 0
+        self._peak_in_flight = 0
+        self._requests_total = 0
+
+    async def start(self) -> None:
+        """Open the shared S3 client. Called once on application startup."""
+        async with self._client_lock:
+            if self._s3_client is not None:
+                return
+            config = AioConfig(
+                max_pool_connections=self.max_pool_connections,
+                connect_timeout=settings.s3_connect_timeout,
+                read_timeout=settings.s3_read_timeout,
+                connector_args={"keepalive_timeout": settings.s3_keepalive_timeout},
+            )
+            stack = AsyncExitStack()
+            self._s3_client = await stack.enter_async_context(
+                self.session.client("s3", endpoint_url=self.endpoint_url, config=config)
+            )
+            self._client_stack = stack
+            logger.info(
+                f"S3 client started (max_pool_connections={self.max_pool_connections})"
+            )
+        await disk_cache.start()
+
+    async def close(self) -> None:
+        """Close the shared S3 client and its connection pool. Called on shutdown."""
+        async with self._client_lock:
+            if self._client_stack is not None:
+                await self._client_stack.aclose()
+            self._s3_client = None
+            self._client_stack = None
+            logger.info("S3 client closed")
+
+    @asynccontextmanager
+    async def _client(self):
+        """Borrow the shared client, starting it lazily outside the app lifecycle."""
+        if self._s3_client is None:
+            await self.start()
+
+        self._in_flight += 1
+        self._requests_total += 1
+        self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+        try:
+            yield self._s3_client
+        finally:
+            self._in_flight -= 1
+
+    def pool_stats(self) -> dict:
+        """
+        Report connection pool statistics for the shared client.
+
+        Returns:
+            dict with configured pool size, in-flight/peak/total operations
+            and, when available, open and idle connection counts
+        """
+        stats = {
+            "started": self._s3_client is not None,
+            "max_pool_connections": self.max_pool_connections,
+            "in_flight": self._in_flight,
+            "peak_in_flight": self._peak_in_flight,
+            "requests_total": self._requests_total,
+            "connections_in_use": None,
+            "connections_idle": None,
+        }
+        if self._s3_client is None:
+            return stats
+
+        # aiobotocore keeps one aiohttp session per proxy; these are internals,
+        # so treat them as best effort
+        try:
+            sessions = self._s3_client._endpoint.http_session._sessions.values()
+            in_use = idle = 0
+            for http_session in sessions:
+                connector = http_session.connector
+                in_use += len(connector._acquired)
+                idle += sum(len(conns) for conns in connector._conns.values())
+            stats["connections_in_use"] = in_use
+            stats["connections_idle"] = idle
+        except AttributeError:
+            pass
+        return stats
 
     async def upload_file(
         self,
@@ -40,9 +213,7 @@ class S3Service:
             Exception: If upload fails
         """
         try:
-            async with self.session.client(
-                "s3", endpoint_url=self.endpoint_url
-            ) as s3_client:
+            async with self._client() as s3_client:
                 await s3_client.put_object(
                     Bucket=self.bucket_name,
                     Key=s3_key,
@@ -55,6 +226,125 @@ class S3Service:
             logger.error(f"Failed to upload file to S3: {e}")
             raise Exception(f"S3 upload failed: {str(e)}")
 
+    async def upload_stream(
+        self,
+        chunks: AsyncIterator[bytes],
+        s3_key: str,
+        content_type: str = "application/octet-stream",
+    ) -> int:
+        """
+        Upload a file to S3 from an async stream of chunks.
+
+        Chunks are buffered up to the multipart part size and sent as
+        individual parts, so memory stays bounded no matter how large the
+        file is. Streams that fit into a single part are sent with a plain
+        PUT. If anything fails (including cancellation of the request) the
+        multipart upload is aborted so no orphaned parts are left in S3.
+
+        Args:
+            chunks: Async iterator yielding the file content
+            s3_key: The S3 key (path) where the file will be stored
+            content_type: The MIME type of the file
+
+        Returns:
+            Total number of bytes uploaded
+
+        Raises:
+            Exception: If upload fails
+        """
+        part_size = self.multipart_part_size
+        buffer = bytearray()
+        total = 0
+        upload_id: str | None = None
+        parts: list[dict] = []
+
+        try:
+            async with self._client() as s3_client:
+                try:
+                    async for chunk in chunks:
+                        if not chunk:
+                            continue
+                        buffer += chunk
+                        total += len(chunk)
+
+                        while len(buffer) >= part_size:
+                            if upload_id is None:
+                                response = await s3_client.create_multipart_upload(
+                                    Bucket=self.bucket_name,
+                                    Key=s3_key,
+                                    ContentType=content_type,
+                                )
+                                upload_id = response["UploadId"]
+                            part = bytes(buffer[:part_size])
+                            del buffer[:part_size]
+                            parts.append(
+                                await self._upload_part(
+                                    s3_client, s3_key, upload_id, len(parts) + 1, part
+                                )
+                            )
+
+                    if upload_id is None:
+                        await s3_client.put_object(
+                            Bucket=self.bucket_name,
+                            Key=s3_key,
+                            Body=bytes(buffer),
+                            ContentType=content_type,
+                        )
+                    else:
+                        if buffer:
+                            parts.append(
+                                await self._upload_part(
+                                    s3_client, s3_key, upload_id, len(parts) + 1, bytes(buffer)
+                                )
+                            )
+                        await s3_client.complete_multipart_upload(
+                            Bucket=self.bucket_name,
+                            Key=s3_key,
+                            UploadId=upload_id,
+                            MultipartUpload={"Parts": parts},
+                        )
+                except BaseException:
+                    if upload_id is not None:
+                        await self._abort_multipart_upload(s3_client, s3_key, upload_id)
+                    raise
+
+            logger.info(
+                f"Successfully uploaded file to S3: {s3_key} "
+                f"({total} bytes, {max(len(parts), 1)} part(s))"
+            )
+            return total
+        except ClientError as e:
+            logger.error(f"Failed to upload file to S3: {e}")
+            raise Exception(f"S3 upload failed: {str(e)}")
+
+    async def _upload_part(
+        self,
+        s3_client,
+        s3_key: str,
+        upload_id: str,
+        part_number: int,
+        data: bytes,
+    ) -> dict:
+        response = await s3_client.upload_part(
+            Bucket=self.bucket_name,
+            Key=s3_key,
+            UploadId=upload_id,
+            PartNumber=part_number,
+            Body=data,
+        )
+        return {"ETag": response["ETag"], "PartNumber": part_number}
+
+    async def _abort_multipart_upload(
+        self, s3_client, s3_key: str, upload_id: str
+    ) -> None:
+        try:
+            await s3_client.abort_multipart_upload(
+                Bucket=self.bucket_name, Key=s3_key, UploadId=upload_id
+            )
+            logger.info(f"Aborted multipart upload for {s3_key}")
+        except Exception as e:
+            logger.warning(f"Failed to abort multipart upload {upload_id} for {s3_key}: {e}")
+
     async def download_file(self, s3_key: str) -> bytes:
         """
         Download a file from S3.
@@ -68,10 +358,16 @@ class S3Service:
         Raises:
             Exception: If download fails
         """
+        cached = disk_cache.acquire(s3_key)
+        if cached is not None:
+            try:
+                async with aiofiles.open(cached, "rb") as f:
+                    return await f.read()
+            finally:
+                disk_cache.release(s3_key)
+
         try:
-            async with self.session.client(
-                "s3", endpoint_url=self.endpoint_url
-            ) as s3_client:
+            async with self._client() as s3_client:
                 response = await s3_client.get_object(
                     Bucket=self.bucket_name, Key=s3_key
                 )
@@ -83,6 +379,152 @@ class S3Service:
             logger.error(f"Failed to download file from S3: {e}")
             raise Exception(f"S3 download failed: {str(e)}")
 
+    async def open_stream(
+        self,
+        s3_key: str,
+        *,
+        byte_range: tuple[int, int] | None = None,
+    ) -> S3ObjectStream:
+        """
+        Open a streaming download of a file (or a byte range of it) from S3.
+
+        Nothing is buffered: the returned stream relays S3 body chunks as
+        they arrive. The caller must either exhaust ``iter_chunks`` or call
+        ``aclose`` to release the connection.
+
+        Args:
+            s3_key: The S3 key of the file to download
+            byte_range: Optional inclusive (start, end) byte offsets
+
+        Returns:
+            An open S3ObjectStream
+
+        Raises:
+            Exception: If the object cannot be opened
+        """
+        exit_stack = AsyncExitStack()
+        try:
+            s3_client = await exit_stack.enter_async_context(
+                self._client()
+            )
+            params = {"Bucket": self.bucket_name, "Key": s3_key}
+            if byte_range is not None:
+                params["Range"] = f"bytes={byte_range[0]}-{byte_range[1]}"
+            response = await s3_client.get_object(**params)
+            return S3ObjectStream(response, exit_stack)
+        except ClientError as e:
+            await exit_stack.aclose()
+            logger.error(f"Failed to open S3 stream: {e}")
+            raise Exception(f"S3 download failed: {str(e)}")
+        except BaseException:
+            await exit_stack.aclose()
+            raise
+
+    async def read_head(self, s3_key: str, length: int) -> bytes:
+        """
+        Read the first ``length`` bytes of a file with a ranged GET.
+
+        Served from the disk cache when the object is cached locally.
+
+        Args:
+            s3_key: The S3 key of the file
+            length: Number of bytes to read (fewer if the object is smaller)
+
+        Returns:
+            The leading bytes of the file
+
+        Raises:
+            Exception: If the object cannot be read
+        """
+        cached = disk_cache.acquire(s3_key)
+        if cached is not None:
+            try:
+                async with aiofiles.open(cached, "rb") as f:
+                    return await f.read(length)
+            finally:
+                disk_cache.release(s3_key)
+
+        stream = await self.open_stream(s3_key, byte_range=(0, length - 1))
+        try:
+            chunks = [chunk async for chunk in stream.iter_chunks(64 * 1024)]
+        finally:
+            await stream.aclose()
+        return b"".join(chunks)
+
+    async def download_to_path(self, s3_key: str, path: str) -> int:
+        """
+        Stream a file from S3 straight to a local path without buffering it in memory.
+
+        Served from (and added to) the disk cache; a cached object is
+        hard-linked to ``path`` without copying where possible.
+
+        Args:
+            s3_key: The S3 key of the file to download
+            path: Local file path to write to
+
+        Returns:
+            Number of bytes written
+
+        Raises:
+            Exception: If download fails
+        """
+        cached = await self.acquire_local(s3_key, fill=False)
+        if cached is None:
+            stream = await self.open_stream(s3_key)
+            try:
+                cached = await disk_cache.fill(
+                    s3_key, stream.content_length, partial(_write_stream, stream)
+                )
+                if cached is None:
+                    # Too large to cache (or caching disabled)
+                    return await _write_stream(stream, path)
+            finally:
+                await stream.aclose()
+        try:
+            return await asyncio.to_thread(_link_or_copy, cached, path)
+        finally:
+            disk_cache.release(s3_key)
+
+    async def acquire_local(self, s3_key: str, *, fill: bool = True) -> str | None:
+        """
+        Path of a local cached copy of ``s3_key``, downloading it on a miss if ``fill``.
+
+        The file is pinned in the cache until ``release_local`` is called.
+
+        Returns:
+            The path, or None if the object is not (and will not be) cached
+        """
+        cached = disk_cache.acquire(s3_key)
+        if cached is not None or not fill or not disk_cache.enabled:
+            return cached
+        stream = await self.open_stream(s3_key)
+        try:
+            return await disk_cache.fill(
+                s3_key, stream.content_length, partial(_write_stream, stream)
+            )
+        finally:
+            await stream.aclose()
+
+    def release_local(self, s3_key: str) -> None:
+        """Unpin a file returned by ``acquire_local``."""
+        disk_cache.release(s3_key)
+
+    async def upload_path(
+        self,
+        path: str,
+        s3_key: str,
+        content_type: str = "application/octet-stream",
+    ) -> int:
+        """
+        Stream a local file to S3 (multipart for large files).
+
+        Returns:
+            Number of bytes uploaded
+        """
+        return await self.upload_stream(
+            _iter_path(path, settings.upload_read_chunk_size), s3_key, content_type
+        )
+
     async def delete_file(self, s3_key: str) -> bool:
         """
         Delete a file from S3.
@@ -97,64 +539,126 @@ class S3Service:
             Exception: If deletion fails
         """
         try:
-            async with self.session.client(
-                "s3", endpoint_url=self.endpoint_url
-            ) as s3_client:
+            async with self._client() as s3_client:
                 await s3_client.delete_object(Bucket=self.bucket_name, Key=s3_key)
                 logger.info(f"Successfully deleted file from S3: {s3_key}")
-                return True
+            await disk_cache.discard([s3_key])
+            return True
         except ClientError as e:
             logger.error(f"Failed to delete file from S3: {e}")
             raise Exception(f"S3 deletion failed: {str(e)}")
 
-    async def delete_files(self, s3_keys: list[str]) -> dict:
+    async def delete_files(
+        self,
+        s3_keys: list[str],
+        *,
+        concurrency: int | None = None,
+    ) -> dict:
         """
-        Delete multiple files from S3 in a single batch request.
+        Delete multiple files from S3 with concurrent batch requests.
         S3 allows up to 1000 keys per batch delete.
 
         Args:
             s3_keys: List of S3 keys to delete
+            concurrency: Batches in flight at once (default: s3_delete_concurrency)
 
         Returns:
             dict with 'deleted' (list of keys) and 'errors' (list of failed keys)
         """
-        if not s3_keys:
-            return {"deleted": [], "errors": []}
-
         results = {"deleted": [], "errors": []}
+        async for batch in self.iter_delete_batches(s3_keys, concurrency=concurrency):
+            results["deleted"].extend(batch["deleted"])
+            results["errors"].extend(batch["errors"])
 
-        try:
-            async with self.session.client(
-                "s3", endpoint_url=self.endpoint_url
-            ) as s3_client:
-                for i in range(0, len(s3_keys), 1000):
-                    batch = s3_keys[i:i + 1000]
-                    delete_objects = {"Objects": [{"Key": key} for key in batch]}
-
-                    response = await s3_client.delete_objects(
-                        Bucket=self.bucket_name,
-                        Delete=delete_objects,
-                    )
-
-                    for deleted in response.get("Deleted", []):
-                        results["deleted"].append(deleted["Key"])
-
-                    for error in response.get("Errors", []):
-                        logger.error(
-                            f"Failed to delete {error['Key']}: {error['Message']}"
-                        )
-                        results["errors"].append(error["Key"])
-
+        if s3_keys:
             logger.info(
                 f"Batch delete: {len(results['deleted'])} succeeded, "
                 f"{len(results['errors'])} failed"
             )
-        except ClientError as e:
-            logger.error(f"Batch delete failed: {e}")
-            results["errors"].extend(s3_keys)
-
         return results
 
+    async def iter_delete_batches(
+        self,
+        s3_keys: list[str],
+        *,
+        concurrency: int | None = None,
+    ) -> AsyncIterator[dict]:
+        """
+        Delete keys in batches of up to 1000, yielding each batch's outcome as it completes.
+
+        Up to ``concurrency`` DeleteObjects requests run at once. Each batch
+        is retried with exponential backoff when S3 throttles it (or reports
+        retryable per-key errors), so a slow batch never holds back the
+        report for the others and one failure never hides keys that were
+        deleted.
+
+        Yields:
+            dict with 'deleted' and 'errors' (lists of keys) for one batch
+        """
+        if not s3_keys:
+            return
+        concurrency = max(1, concurrency or settings.s3_delete_concurrency)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run(batch: list[str]) -> dict:
+            async with semaphore:
+                return await self._delete_batch(batch)
+
+        tasks = [
+            asyncio.create_task(run(s3_keys[i:i + _DELETE_BATCH_SIZE]))
+            for i in range(0, len(s3_keys), _DELETE_BATCH_SIZE)
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                batch = await next_done
+                await disk_cache.discard(batch["deleted"])
+                yield batch
+        finally:
+            # Consumer stopped early (or was cancelled): don't leave requests behind
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _delete_batch(self, batch: list[str]) -> dict:
+        """DeleteObjects for up to 1000 keys, retrying throttled requests and keys."""
+        result = {"deleted": [], "errors": []}
+        pending = batch
+        for attempt in range(settings.s3_delete_max_attempts):
+            if attempt:
+                delay = settings.s3_delete_retry_base_seconds * 2 ** (attempt - 1)
+                await asyncio.sleep(delay * random.uniform(0.5, 1.5))
+
+            try:
+                async with self._client() as s3_client:
+                    response = await s3_client.delete_objects(
+                        Bucket=self.bucket_name,
+                        Delete={"Objects": [{"Key": key} for key in pending]},
+                    )
+            except ClientError as e:
+                code = e.response.get("Error", {}).get("Code")
+                if code in _RETRYABLE_ERROR_CODES:
+                    logger.warning(f"Batch delete throttled ({code}), attempt {attempt + 1}")
+                    continue
+                logger.error(f"Batch delete failed: {e}")
+                result["errors"].extend(pending)
+                return result
+
+            result["deleted"].extend(d["Key"] for d in response.get("Deleted", []))
+            retry = []
+            for error in response.get("Errors", []):
+                if error.get("Code") in _RETRYABLE_ERROR_CODES:
+                    retry.append(error["Key"])
+                else:
+                    logger.error(f"Failed to delete {error['Key']}: {error.get('Message')}")
+                    result["errors"].append(error["Key"])
+            if not retry:
+                return result
+            pending = retry
+
+        logger.error(f"Batch delete: giving up on {len(pending)} keys after throttling")
+        result["errors"].extend(pending)
+        return result
+
     async def file_exists(self, s3_key: str) -> bool:
         """
         Check if a file exists in S3.
@@ -166,9 +670,7 @@ class S3Service:
             True if the file exists, False otherwise
         """
         try:
-            async with self.session.client(
-                "s3", endpoint_url=self.endpoint_url
-            ) as s3_client:
+            async with self._client() as s3_client:
                 await s3_client.head_object(Bucket=self.bucket_name, Key=s3_key)
                 return True
         except ClientError:
@@ -194,25 +696,35 @@ class S3Service:
             return f"https://{self.bucket_name}.s3.{settings.aws_region}.amazonaws.com/{s3_key}"
 
     async def generate_presigned_url(
-        self, s3_key: str, expiration: int = 3600
+        self,
+        s3_key: str,
+        expiration: int = 3600,
+        *,
+        content_type: str | None = None,
+        content_disposition: str | None = None,
     ) -> str:
         """
         Generate a presigned URL for temporary access to a private file.
         Args:
             s3_key: The S3 key of the file
             expiration: Time in seconds for the URL to remain valid (default: 1 hour)
+            content_type: Optional Content-Type S3 should send with the response
+            content_disposition: Optional Content-Disposition S3 should send
         Returns:
             A presigned URL
         Raises:
             Exception: If URL generation fails
         """
+        params = {"Bucket": self.bucket_name, "Key": s3_key}
+        if content_type:
+            params["ResponseContentType"] = content_type
+        if content_disposition:
+            params["ResponseContentDisposition"] = content_disposition
         try:
-            async with self.session.client(
-                "s3", endpoint_url=self.endpoint_url
-            ) as s3_client:
+            async with self._client() as s3_client:
                 url = await s3_client.generate_presigned_url(
                     "get_object",
-                    Params={"Bucket": self.bucket_name, "Key": s3_key},
+                    Params=params,
                     ExpiresIn=expiration,
                 )
                 return url
@@ -220,6 +732,141 @@ class S3Service:
             logger.error(f"Failed to generate presigned URL: {e}")
             raise Exception(f"Presigned URL generation failed: {str(e)}")
 
+    async def generate_presigned_put_url(
+        self, s3_key: str, content_type: str, expiration: int = 3600
+    ) -> str:
+        """
+        Generate a presigned URL a client can PUT a file to directly.
+        The upload must send the same Content-Type header that was signed.
+        """
+        try:
+            async with self._client() as s3_client:
+                return await s3_client.generate_presigned_url(
+                    "put_object",
+                    Params={
+                        "Bucket": self.bucket_name,
+                        "Key": s3_key,
+                        "ContentType": content_type,
+                    },
+                    ExpiresIn=expiration,
+                )
+        except ClientError as e:
+            logger.error(f"Failed to generate presigned PUT URL: {e}")
+            raise Exception(f"Presigned URL generation failed: {str(e)}")
+
+    async def create_multipart_upload(self, s3_key: str, content_type: str) -> str:
+        """
+        Start a multipart upload whose parts will be sent by a client.
+
+        Returns:
+            The S3 UploadId
+        """
+        try:
+            async with self._client() as s3_client:
+                response = await s3_client.create_multipart_upload(
+                    Bucket=self.bucket_name, Key=s3_key, ContentType=content_type
+                )
+                return response["UploadId"]
+        except ClientError as e:
+            logger.error(f"Failed to create multipart upload: {e}")
+            raise Exception(f"S3 upload failed: {str(e)}")
+
+    async def generate_presigned_part_urls(
+        self,
+        s3_key: str,
+        upload_id: str,
+        part_count: int,
+        expiration: int = 3600,
+    ) -> list[str]:
+        """Generate one presigned upload_part URL per part (part numbers start at 1)."""
+        try:
+            async with self._client() as s3_client:
+                return [
+                    await s3_client.generate_presigned_url(
+                        "upload_part",
+                        Params={
+                            "Bucket": self.bucket_name,
+                            "Key": s3_key,
+                            "UploadId": upload_id,
+                            "PartNumber": part_number,
+                        },
+                        ExpiresIn=expiration,
+                    )
+                    for part_number in range(1, part_count + 1)
+                ]
+        except ClientError as e:
+            logger.error(f"Failed to generate presigned part URLs: {e}")
+            raise Exception(f"Presigned URL generation failed: {str(e)}")
+
+    async def complete_multipart_upload(
+        self, s3_key: str, upload_id: str, parts: list[dict]
+    ) -> None:
+        """
+        Complete a client-driven multipart upload.
+
+        Args:
+            parts: [{"PartNumber": int, "ETag": str}, ...] as reported by the client
+        """
+        try:
+            async with self._client() as s3_client:
+                await s3_client.complete_multipart_upload(
+                    Bucket=self.bucket_name,
+                    Key=s3_key,
+                    UploadId=upload_id,
+                    MultipartUpload={
+                        "Parts": sorted(parts, key=lambda p: p["PartNumber"])
+                    },
+                )
+        except ClientError as e:
+            logger.error(f"Failed to complete multipart upload: {e}")
+            raise Exception(f"S3 upload failed: {str(e)}")
+
+    async def abort_multipart_upload(self, s3_key: str, upload_id: str) -> None:
+        """Abort a multipart upload so its parts stop taking up storage."""
+        async with self._client() as s3_client:
+            await self._abort_multipart_upload(s3_client, s3_key, upload_id)
+
+    async def head_file(self, s3_key: str) -> dict | None:
+        """
+        Fetch object metadata without downloading it.
+
+        Returns:
+            dict with ``size``, ``content_type`` and ``etag``, or None if missing
+        """
+        try:
+            async with self._client() as s3_client:
+                response = await s3_client.head_object(
+                    Bucket=self.bucket_name, Key=s3_key
+                )
+                return {
+                    "size": response["ContentLength"],
+                    "content_type": response.get("ContentType"),
+                    "etag": response.get("ETag"),
+                }
+        except ClientError:
+            return None
+
+    async def iter_objects(self, prefix: str) -> AsyncIterator[list[dict]]:
+        """
+        List a bucket prefix page by page (up to 1000 objects per page).
+
+        Yields:
+            Lists of dicts with ``key``, ``size`` and ``last_modified``
+        """
+        async with self._client() as s3_client:
+            paginator = s3_client.get_paginator("list_objects_v2")
+            async for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix):
+                contents = page.get("Contents", [])
+                if contents:
+                    yield [
+                        {
+                            "key": obj["Key"],
+                            "size": obj["Size"],
+                            "last_modified": obj["LastModified"],
+                        }
+                        for obj in contents
+                    ]
+
 
 # Singleton instance
 s3_service = S3Service()
@@ -5,10 +5,15 @@ from passlib.context import CryptContext
 import hashlib
 
 from ..config import settings
+from ..schemas.user import TokenData
 
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.access_token_expire_minutes
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.bcrypt_rounds,
+)
 
 def _prehash_password(password: str) -> str:
     """Pre-hash password with SHA256 to handle passwords longer than 72 bytes (bcrypt limit)"""
@@ -30,10 +35,14 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
     return encoded_jwt
 
-def decode_access_token(token: str) -> Optional[str]:
+def decode_access_token(token: str) -> Optional[TokenData]:
+    """Return the token's email ("sub") and user id ("uid"), or None if invalid"""
     try:
         payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
-        email: str = payload.get("sub")
-        return email
     except JWTError:
         return None
+    email: str | None = payload.get("sub")
+    user_id: str | None = payload.get("uid")
+    if email is None and user_id is None:
+        return None
+    return TokenData(email=email, user_id=user_id)
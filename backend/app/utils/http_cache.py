@@ -0,0 +1,73 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+
+def format_http_date(value: datetime) -> str:
+    """Format a datetime as an IMF-fixdate (naive values are taken as UTC)."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def _parse_http_date(value: str) -> Optional[datetime]:
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def _etag_in(header: str, etag: str) -> bool:
+    """Weak comparison of ``etag`` against a comma-separated list of entity tags."""
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque for candidate in header.split(",")
+    )
+
+
+def is_not_modified(
+    *,
+    etag: str,
+    last_modified: datetime,
+    if_none_match: Optional[str],
+    if_modified_since: Optional[str],
+) -> bool:
+    """
+    Evaluate conditional GET headers (RFC 9110 section 13.2.2).
+
+    ``If-None-Match`` takes precedence; ``If-Modified-Since`` is only
+    consulted when it is absent. Unparseable dates are ignored.
+
+    Returns:
+        True if a 304 Not Modified should be sent
+    """
+    if if_none_match:
+        return _etag_in(if_none_match, etag)
+    if if_modified_since:
+        since = _parse_http_date(if_modified_since)
+        if since is None:
+            return False
+        if last_modified.tzinfo is None:
+            last_modified = last_modified.replace(tzinfo=timezone.utc)
+        # HTTP dates have one-second resolution
+        return last_modified.replace(microsecond=0) <= since
+    return False
+
+
+def if_range_matches(if_range: Optional[str], etag: str) -> bool:
+    """
+    Whether a Range request may be honoured given its ``If-Range`` header.
+
+    Only strong entity tags are compared (dates are not precise enough to
+    validate a partial response), so a date or a stale tag means "send the
+    whole representation".
+    """
+    if not if_range:
+        return True
+    value = if_range.strip()
+    return not value.startswith("W/") and value == etag
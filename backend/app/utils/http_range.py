@@ -0,0 +1,51 @@
+from typing import Optional
+
+
+class RangeNotSatisfiable(Exception):
+    """Raised when a Range header is well-formed but lies outside the resource."""
+
+
+def parse_range_header(range_header: Optional[str], size: int) -> Optional[tuple[int, int]]:
+    """
+    Parse a single-range ``Range: bytes=...`` header.
+
+    Supports ``start-end``, open-ended ``start-`` and suffix ``-length`` forms.
+    Headers that are absent, malformed, use another unit or ask for several
+    ranges are ignored (None), which means the full resource is served.
+
+    Returns:
+        Inclusive (start, end) byte offsets, or None
+
+    Raises:
+        RangeNotSatisfiable: If the range does not overlap the resource
+    """
+    if not range_header:
+        return None
+
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+
+    start_s, sep, end_s = spec.strip().partition("-")
+    if not sep:
+        return None
+    start_s, end_s = start_s.strip(), end_s.strip()
+    if not (start_s.isdigit() or end_s.isdigit()):
+        return None
+    if (start_s and not start_s.isdigit()) or (end_s and not end_s.isdigit()):
+        return None
+
+    if not start_s:
+        # Suffix range: the last N bytes
+        length = int(end_s)
+        if length == 0 or size == 0:
+            raise RangeNotSatisfiable(range_header)
+        return max(size - length, 0), size - 1
+
+    start = int(start_s)
+    end = int(end_s) if end_s else size - 1
+    if end_s and end < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable(range_header)
+    return start, min(end, size - 1)
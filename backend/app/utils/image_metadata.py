@@ -0,0 +1,119 @@
+from datetime import datetime, timedelta, timezone
+from typing import BinaryIO
+
+from PIL import ExifTags, Image
+
+# Photo columns filled from the image header (see read_image_metadata)
+METADATA_FIELDS = (
+    "width",
+    "height",
+    "orientation",
+    "taken_at",
+    "camera_make",
+    "camera_model",
+    "has_icc",
+)
+
+# EXIF orientations that rotate the image by 90/270 degrees
+_TRANSPOSED_ORIENTATIONS = (5, 6, 7, 8)
+_EXIF_DATETIME_FORMAT = "%Y:%m:%d %H:%M:%S"
+
+
+def empty_metadata() -> dict:
+    return dict.fromkeys(METADATA_FIELDS)
+
+
+def _exif_text(value, max_length: int = 100) -> str | None:
+    if isinstance(value, bytes):
+        value = value.decode("utf-8", "replace")
+    if not isinstance(value, str):
+        return None
+    value = value.strip("\x00 \t\r\n")
+    return value[:max_length] or None
+
+
+def _parse_exif_datetime(value, offset) -> datetime | None:
+    """
+    Parse an EXIF "YYYY:MM:DD HH:MM:SS" timestamp.
+
+    EXIF stores local wall-clock time; with an OffsetTime* tag it is
+    converted to UTC, otherwise the wall-clock time is stored as if UTC.
+    """
+    text = _exif_text(value, 32)
+    if text is None:
+        return None
+    try:
+        taken = datetime.strptime(text[:19], _EXIF_DATETIME_FORMAT)
+    except ValueError:
+        return None
+    tz = timezone.utc
+    offset = _exif_text(offset, 8)
+    if offset and len(offset) == 6 and offset[0] in "+-" and offset[3] == ":":
+        try:
+            delta = timedelta(hours=int(offset[1:3]), minutes=int(offset[4:6]))
+            tz = timezone(delta if offset[0] == "+" else -delta)
+        except ValueError:
+            pass
+    return taken.replace(tzinfo=tz).astimezone(timezone.utc)
+
+
+def _header_exif(img: Image.Image) -> Image.Exif:
+    """EXIF from what Image.open parsed, never decoding pixels to find more."""
+    if img.format == "PNG":
+        # PngImageFile.getexif() decodes the image when no eXIf chunk precedes
+        # the pixel data
+        exif = Image.Exif()
+        if "exif" in img.info:
+            exif.load(img.info["exif"])
+        return exif
+    return img.getexif()
+
+
+def read_image_metadata(fileobj: BinaryIO) -> dict | None:
+    """
+    Read dimensions, EXIF orientation, capture time, camera and ICC presence.
+
+    Only the header is parsed (Pillow reads pixel data lazily and it is
+    never loaded here), so a prefix of the file is enough for JPEG, PNG,
+    TIFF and most other formats. ``width``/``height`` are as displayed,
+    i.e. swapped for EXIF orientations that rotate by 90 degrees.
+
+    Returns:
+        dict with every METADATA_FIELDS key (None where unknown), or None if
+        the data is not a readable image (or the prefix is too short)
+    """
+    fileobj.seek(0)
+    try:
+        with Image.open(fileobj) as img:
+            width, height = img.size
+            has_icc = bool(img.info.get("icc_profile"))
+            exif = _header_exif(img)
+            exif_ifd = exif.get_ifd(ExifTags.IFD.Exif)
+    except Exception:
+        # UnidentifiedImageError, truncated headers, malformed EXIF, ...
+        return None
+    finally:
+        fileobj.seek(0)
+
+    orientation = exif.get(ExifTags.Base.Orientation, 1)
+    if not isinstance(orientation, int) or not 1 <= orientation <= 8:
+        orientation = 1
+    if orientation in _TRANSPOSED_ORIENTATIONS:
+        width, height = height, width
+
+    taken_at = _parse_exif_datetime(
+        exif_ifd.get(ExifTags.Base.DateTimeOriginal),
+        exif_ifd.get(ExifTags.Base.OffsetTimeOriginal),
+    ) or _parse_exif_datetime(
+        exif.get(ExifTags.Base.DateTime),
+        exif_ifd.get(ExifTags.Base.OffsetTime),
+    )
+    return {
+        "width": width,
+        "height": height,
+        "orientation": orientation,
+        "taken_at": taken_at,
+        "camera_make": _exif_text(exif.get(ExifTags.Base.Make)),
+        "camera_model": _exif_text(exif.get(ExifTags.Base.Model)),
+        "has_icc": has_icc,
+    }
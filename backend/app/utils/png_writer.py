@@ -0,0 +1,91 @@
+import struct
+import zlib
+from typing import BinaryIO
+
+import numpy as np
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+_FILTER_PAETH = 4
+# Rows filtered per block; bounds the int16 temporaries of the Paeth filter
+_BLOCK_BYTES = 4 * 1024 * 1024
+
+
+def _paeth_filter(raw: np.ndarray, above: np.ndarray, bpp: int) -> np.ndarray:
+    """
+    Apply the PNG Paeth filter to whole rows at once.
+
+    Paeth predicts each byte from its raw (unfiltered) left, upper and
+    upper-left neighbours, so every row can be filtered independently
+    given the row above it.
+    """
+    raw16 = raw.astype(np.int16)
+    b = above.astype(np.int16)
+    a = np.zeros_like(raw16)
+    a[:, bpp:] = raw16[:, :-bpp]
+    c = np.zeros_like(b)
+    c[:, bpp:] = b[:, :-bpp]
+
+    pa = np.abs(b - c)
+    pb = np.abs(a - c)
+    pc = np.abs(a + b - 2 * c)
+    predictor = np.where((pa <= pb) & (pa <= pc), a, np.where(pb <= pc, b, c))
+    return ((raw16 - predictor) & 0xFF).astype(np.uint8)
+
+
+class StreamingPngWriter:
+    """
+    Encode an 8-bit RGB PNG incrementally, strip by strip.
+
+    Only the current strip and the last row of the previous one are held in
+    memory; compressed data goes straight to ``fileobj`` as IDAT chunks, so
+    images far larger than RAM can be written.
+    """
+
+    def __init__(self, fileobj: BinaryIO, width: int, height: int, *, compress_level: int = 6):
+        self._file = fileobj
+        self.width = width
+        self.height = height
+        self._rows_written = 0
+        self._compressor = zlib.compressobj(compress_level)
+        # The row "above" the first one is all zeros (PNG spec)
+        self._previous_row = np.zeros(width * 3, dtype=np.uint8)
+
+        self._file.write(_PNG_SIGNATURE)
+        # 8-bit truecolour, deflate, adaptive filtering, no interlace
+        self._chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+
+    def write(self, rows: np.ndarray) -> None:
+        """Append rows given as a (rows, width, 3) uint8 array."""
+        if rows.ndim != 3 or rows.shape[1:] != (self.width, 3):
+            raise ValueError(f"Expected (rows, {self.width}, 3) array, got {rows.shape}")
+        if self._rows_written + rows.shape[0] > self.height:
+            raise ValueError("More rows than the image height")
+
+        raw = np.ascontiguousarray(rows, dtype=np.uint8).reshape(rows.shape[0], -1)
+        block = max(1, _BLOCK_BYTES // raw.shape[1])
+        for start in range(0, raw.shape[0], block):
+            chunk = raw[start:start + block]
+            above = np.vstack([self._previous_row[None, :], chunk[:-1]])
+            lines = np.empty((chunk.shape[0], chunk.shape[1] + 1), dtype=np.uint8)
+            lines[:, 0] = _FILTER_PAETH
+            lines[:, 1:] = _paeth_filter(chunk, above, 3)
+            self._idat(self._compressor.compress(lines.tobytes()))
+            self._previous_row = chunk[-1].copy()
+        self._rows_written += rows.shape[0]
+
+    def close(self) -> None:
+        """Flush the compressor and write the trailer. Does not close the file."""
+        if self._rows_written != self.height:
+            raise ValueError(f"Wrote {self._rows_written} of {self.height} rows")
+        self._idat(self._compressor.flush())
+        self._chunk(b"IEND", b"")
+
+    def _idat(self, data: bytes) -> None:
+        if data:
+            self._chunk(b"IDAT", data)
+
+    def _chunk(self, kind: bytes, data: bytes) -> None:
+        self._file.write(struct.pack(">I", len(data)))
+        self._file.write(kind)
+        self._file.write(data)
+        self._file.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(kind)) & 0xFFFFFFFF))
@@ -0,0 +1,31 @@
+from datetime import datetime, timedelta
+from typing import Optional
+from jose import JWTError, jwt
+
+from ..config import settings
+
+UPLOAD_TICKET_TYPE = "upload"
+
+
+def create_upload_ticket(data: dict, expires_in: int) -> str:
+    """
+    Sign the server-chosen facts of a direct upload (photo id, S3 key, owner,
+    declared size...) so the finalize step can trust them without storing
+    pending uploads anywhere.
+    """
+    to_encode = data.copy()
+    to_encode.update({
+        "typ": UPLOAD_TICKET_TYPE,
+        "exp": datetime.utcnow() + timedelta(seconds=expires_in),
+    })
+    return jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
+
+
+def decode_upload_ticket(ticket: str) -> Optional[dict]:
+    try:
+        payload = jwt.decode(ticket, settings.secret_key, algorithms=[settings.algorithm])
+    except JWTError:
+        return None
+    if payload.get("typ") != UPLOAD_TICKET_TYPE:
+        return None
+    return payload
@@ -0,0 +1,121 @@
+"""Benchmark S3Service.delete_files against a local S3 stand-in.
+
+Usage (from the backend directory):
+    python benchmarks/delete_files.py [--keys 10000] [--concurrency 1 8 16] [--latency-ms 200]
+    python benchmarks/delete_files.py --endpoint http://localhost:9000 --bucket bench
+
+Without ``--endpoint`` an in-process moto server is started (``pip install
+"moto[server]"``); point ``--endpoint`` at MinIO for numbers closer to a
+real deployment. Each run uploads ``--keys`` empty objects and times their
+deletion at every concurrency level.
+
+moto on localhost answers in well under a millisecond and is bound by its
+own (GIL-serialized) CPU time, so concurrency barely helps there. Real S3
+spends tens to hundreds of milliseconds per DeleteObjects round trip; use
+``--latency-ms`` to add that delay to each request and see the effect of
+overlapping batches.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+async def _put_objects(s3_service, prefix: str, count: int) -> list[str]:
+    keys = [f"{prefix}{i:07d}" for i in range(count)]
+    semaphore = asyncio.Semaphore(64)
+
+    async def put(key: str) -> None:
+        async with semaphore:
+            async with s3_service._client() as s3_client:
+                await s3_client.put_object(Bucket=s3_service.bucket_name, Key=key, Body=b"")
+
+    await asyncio.gather(*(put(key) for key in keys))
+    return keys
+
+
+async def run(keys_per_run: int, levels: list[int], latency_ms: float) -> None:
+    from app.services.s3_service import s3_service
+
+    await s3_service.start()
+    if latency_ms:
+        async def simulate_latency(**kwargs):
+            await asyncio.sleep(latency_ms / 1000)
+
+        s3_service._s3_client.meta.events.register(
+            "before-send.s3.DeleteObjects", simulate_latency
+        )
+    try:
+        async with s3_service._client() as s3_client:
+            try:
+                await s3_client.create_bucket(Bucket=s3_service.bucket_name)
+            except s3_client.exceptions.ClientError:
+                pass  # already exists
+
+        baseline = None
+        for concurrency in levels:
+            keys = await _put_objects(s3_service, f"bench/{concurrency}/", keys_per_run)
+            started = time.perf_counter()
+            batches = 0
+            deleted = errors = 0
+            async for batch in s3_service.iter_delete_batches(keys, concurrency=concurrency):
+                batches += 1
+                deleted += len(batch["deleted"])
+                errors += len(batch["errors"])
+            elapsed = time.perf_counter() - started
+            baseline = baseline or elapsed
+            print(
+                f"concurrency={concurrency:>3}  batches={batches:>4}  deleted={deleted:>7}  "
+                f"errors={errors:>4}  {elapsed:7.2f}s  {deleted / elapsed:9.0f} keys/s  "
+                f"speedup x{baseline / elapsed:.1f}"
+            )
+    finally:
+        await s3_service.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--keys", type=int, default=10000, help="Objects per run")
+    parser.add_argument(
+        "--concurrency", type=int, nargs="+", default=[1, 4, 8, 16],
+        help="Concurrency levels to compare (the first one is the baseline)",
+    )
+    parser.add_argument("--endpoint", help="S3 endpoint (e.g. MinIO); default: in-process moto")
+    parser.add_argument("--bucket", default="delete-files-bench")
+    parser.add_argument(
+        "--latency-ms", type=float, default=0.0,
+        help="Simulated round-trip time added to every DeleteObjects request",
+    )
+    args = parser.parse_args()
+
+    server = None
+    endpoint = args.endpoint
+    if endpoint is None:
+        import logging
+
+        from moto.server import ThreadedMotoServer
+
+        logging.getLogger("werkzeug").setLevel(logging.ERROR)
+        server = ThreadedMotoServer(port=5077, verbose=False)
+        server.start()
+        endpoint = "http://127.0.0.1:5077"
+        os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+        os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+        os.environ.setdefault("AWS_REGION", "us-east-1")
+
+    os.environ["AWS_ENDPOINT_URL"] = endpoint
+    os.environ["S3_BUCKET_NAME"] = args.bucket
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    try:
+        asyncio.run(run(args.keys, args.concurrency, args.latency_ms))
+    finally:
+        if server is not None:
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
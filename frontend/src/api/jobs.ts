@@ -0,0 +1,28 @@
+import { api } from "./client";
+import type { Job } from "../types/job";
+
+export type { Job };
+
+export const getJob = async (jobId: string): Promise<Job> => {
+  const resp = await api.get(`/jobs/${jobId}`);
+  return resp.data;
+};
+
+// Object URL of the preview of a running job's result (see Job.preview)
+export const fetchJobPreviewBlob = async (jobId: string): Promise<string> => {
+  const resp = await api.get(`/jobs/${jobId}/preview`, { responseType: "blob" });
+  return URL.createObjectURL(resp.data);
+};
+
+export const waitForJob = async (
+  jobId: string,
+  onProgress?: (job: Job) => void,
+  intervalMs = 1000
+): Promise<Job> => {
+  for (;;) {
+    const job = await getJob(jobId);
+    onProgress?.(job);
+    if (job.status === "succeeded" || job.status === "failed") return job;
+    await new Promise((resolve) => setTimeout(resolve, intervalMs));
+  }
+};
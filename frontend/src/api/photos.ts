@@ -14,26 +14,62 @@ export const uploadPhoto = async (projectId: string, file: File) => {
   return resp.data.item as string; // id фото
 };
 
-export const listPhotos = async (
+export interface BatchUploadItem {
+  filename: string;
+  ok: boolean;
+  photo_id: string | null;
+  size: number | null;
+  error: string | null;
+}
+
+export const uploadPhotos = async (projectId: string, files: File[]) => {
+  const form = new FormData();
+  files.forEach((file) => form.append("files", file));
+
+  const resp = await api.post(`/projects/${projectId}/photos/batch`, form, {
+    headers: { "Content-Type": "multipart/form-data" },
+  });
+
+  return resp.data.items as BatchUploadItem[];
+};
+
+export interface PhotoPage {
+  items: PhotoItem[];
+  next_cursor: string | null;
+}
+
+export const listPhotosPage = async (
   projectId: string,
   limit = 100,
-  offset = 0
-): Promise<PhotoItem[]> => {
+  cursor?: string | null
+): Promise<PhotoPage> => {
   const resp = await api.get(`/projects/${projectId}/photos`, {
-    params: { limit, offset },
+    params: cursor ? { limit, cursor } : { limit },
   });
-  return resp.data.items;
+  return resp.data;
 };
 
+export const listPhotos = async (
+  projectId: string,
+  limit = 100
+): Promise<PhotoItem[]> => {
+  const page = await listPhotosPage(projectId, limit);
+  return page.items;
+};
+
+export type PhotoSize = "original" | "thumb" | "preview";
+
 export const photoUrl = (projectId: string, photoId: string) => {
   return `${api.defaults.baseURL}/projects/${projectId}/photos/${photoId}`;
 };
 
 export const fetchPhotoBlob = async (
   projectId: string,
-  photoId: string
+  photoId: string,
+  size: PhotoSize = "original"
 ): Promise<string> => {
   const resp = await api.get(`/projects/${projectId}/photos/${photoId}`, {
+    params: size === "original" ? undefined : { size },
     responseType: "blob",
   });
   return URL.createObjectURL(resp.data);
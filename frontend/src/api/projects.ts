@@ -8,11 +8,26 @@ export const createProject = async (data: ProjectCreate): Promise<Project> => {
   return resp.data;
 };
 
-export const listProjects = async (limit = 100, offset = 0): Promise<Project[]> => {
-  const resp = await api.get("/projects", { params: { limit, offset } });
+export interface ProjectPage {
+  items: Project[];
+  next_cursor: string | null;
+}
+
+export const listProjectsPage = async (
+  limit = 100,
+  cursor?: string | null
+): Promise<ProjectPage> => {
+  const resp = await api.get("/projects", {
+    params: cursor ? { limit, cursor } : { limit },
+  });
   return resp.data;
 };
 
+export const listProjects = async (limit = 100): Promise<Project[]> => {
+  const page = await listProjectsPage(limit);
+  return page.items;
+};
+
 export const getProject = async (projectId: string): Promise<Project> => {
   const resp = await api.get(`/projects/${projectId}`);
   return resp.data;
@@ -0,0 +1,12 @@
+import { api } from "./client";
+import type { StitchOptions } from "../types/stitch";
+
+export type { StitchOptions };
+
+export const stitchProject = async (
+  projectId: string,
+  options: StitchOptions = {}
+): Promise<string> => {
+  const resp = await api.post(`/projects/${projectId}/stitch`, options);
+  return resp.data.job_id as string; // poll with waitForJob()
+};
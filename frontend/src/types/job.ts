@@ -0,0 +1,22 @@
+export type JobStatus = "queued" | "running" | "succeeded" | "failed";
+
+export type JobPreview = {
+  mime: string;
+  width: number;
+  height: number;
+};
+
+export type Job = {
+  id: string;
+  kind: string;
+  status: JobStatus;
+  progress: number;
+  project_id: string | null;
+  result: Record<string, any> | null;
+  // Low-res preview of the result, served by GET /jobs/{id}/preview
+  preview?: JobPreview | null;
+  error: string | null;
+  created_at: string;
+  started_at: string | null;
+  finished_at: string | null;
+};
@@ -4,4 +4,14 @@ export type PhotoItem = {
   mime: string;
   size: number;
   created_at: string;
+  // "stitch" for the output of a stitch job
+  source: "upload" | "stitch";
+  // From the image header; null for non-images
+  width: number | null;
+  height: number | null;
+  orientation: number | null;
+  taken_at: string | null;
+  camera_make: string | null;
+  camera_model: string | null;
+  has_icc: boolean | null;
 };
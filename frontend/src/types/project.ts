@@ -5,6 +5,7 @@ export type Project = {
   description: string | null;
   created_at: string;
   photo_count?: number;
+  total_bytes?: number;
 };
 
 export type ProjectCreate = {
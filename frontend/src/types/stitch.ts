@@ -0,0 +1,12 @@
+export type StitchLayout = "grid" | "horizontal" | "vertical";
+
+export type StitchOptions = {
+  layout?: StitchLayout;
+  photo_ids?: string[];
+  cell_size?: number;
+  spacing?: number;
+  columns?: number;
+  background?: string;
+  output_format?: "jpeg" | "png" | "webp";
+  quality?: number;
+};